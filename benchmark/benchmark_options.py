@@ -0,0 +1,90 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+"""
+Measures the time used to add the options of the dependencies.
+
+The options of every dependency are added during the resolve step, which
+runs for every waf command. Run the benchmark from the root of the
+repository:
+
+    python benchmark/benchmark_options.py --dependencies 500
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from wurf.options import Options  # noqa: E402
+from wurf.dependency import Dependency  # noqa: E402
+
+
+def create_dependencies(count):
+
+    dependencies = []
+
+    for index in range(count):
+        dependencies.append(Dependency(
+            name='dependency{}'.format(index),
+            resolver='git',
+            method='checkout',
+            checkout='1.0.0',
+            sources=['github.com/acme-corp/dependency{}.git'.format(index)],
+            recurse=True,
+            optional=False))
+
+    return dependencies
+
+
+def run(count, repeat):
+
+    dependencies = create_dependencies(count=count)
+
+    # A typical command line with a few of the dependency options
+    args = ['configure', '-v', '--resolve_path', '/tmp/resolved',
+            '--dependency0_path', '/tmp/dependency0',
+            '--dependency1_checkout=master', 'build']
+
+    best = None
+
+    for _ in range(repeat):
+
+        start = time.time()
+
+        options = Options(
+            args=args, parser=argparse.ArgumentParser(add_help=False),
+            default_resolve_path='resolved_dependencies',
+            default_symlinks_path='resolve_symlinks',
+            supported_git_protocols=['https://'])
+
+        for dependency in dependencies:
+            options.add_dependency(dependency)
+            options.path(dependency=dependency)
+
+        elapsed = time.time() - start
+
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return best
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--dependencies', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    best = run(count=args.dependencies, repeat=args.repeat)
+
+    print('Added the options of {} dependencies in {:.3f} s'.format(
+        args.dependencies, best))
+
+
+if __name__ == '__main__':
+    main()
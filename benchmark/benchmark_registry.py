@@ -0,0 +1,119 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+"""
+Measures the overhead of the Registry when building the resolver chains.
+
+The resolvers are only constructed, not run, so no git commands are invoked
+and no network access is needed. Run the benchmark from the root of the
+repository:
+
+    python benchmark/benchmark_registry.py --dependencies 1000
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import shutil
+
+sys.path.insert(0, os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from wurf.registry import build_registry  # noqa: E402
+from wurf.dependency import Dependency  # noqa: E402
+
+
+class Context(object):
+    """ Minimal stand-in for the Waf context. """
+
+    def to_log(self, msg):
+        pass
+
+
+class WafUtils(object):
+    """ Minimal stand-in for the waflib.Utils module. """
+
+    @staticmethod
+    def check_dir(path):
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+
+def create_dependencies(count):
+
+    dependencies = []
+
+    for index in range(count):
+        dependencies.append(Dependency(
+            name='dependency{}'.format(index),
+            resolver='git',
+            method='checkout',
+            checkout='1.0.0',
+            sources=['github.com/acme-corp/dependency{}.git'.format(index)],
+            recurse=True,
+            optional=False))
+
+    return dependencies
+
+
+def run(count, repeat):
+
+    project_path = tempfile.mkdtemp()
+
+    try:
+        registry = build_registry(
+            ctx=Context(), git_binary='git',
+            default_resolve_path=os.path.join(project_path, 'resolved'),
+            resolve_config_path=os.path.join(project_path, 'build'),
+            default_symlinks_path=os.path.join(project_path, 'symlinks'),
+            semver=None, archive_extractor=None, waf_utils=WafUtils,
+            args=['configure'], project_path=project_path,
+            waf_lock_file='.lock-waf')
+
+        options = registry.require('options')
+        dependencies = create_dependencies(count=count)
+
+        # Adding the options is not part of the measurement
+        for dependency in dependencies:
+            options.add_dependency(dependency)
+
+        best = None
+
+        for _ in range(repeat):
+
+            start = time.time()
+
+            for dependency in dependencies:
+                with registry.provide_temporary() as temporary:
+                    temporary.provide_value('dependency', dependency)
+                    registry.require('dependency_resolver')
+
+            elapsed = time.time() - start
+
+            if best is None or elapsed < best:
+                best = elapsed
+
+        return best
+
+    finally:
+        shutil.rmtree(project_path)
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--dependencies', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    best = run(count=args.dependencies, repeat=args.repeat)
+
+    print('Built {} resolver chains in {:.3f} s ({:.3f} s per 1000 '
+          'dependencies)'.format(args.dependencies, best,
+                                 best * 1000.0 / args.dependencies))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,479 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+"""
+Measures the time used by the waf commands which resolve or load the
+dependencies of a project, using synthetic dependency graphs.
+
+For every graph a set of local git repositories is generated, one for each
+dependency, and an application depending on them. The sources of the
+dependencies are rewritten to the local repositories with the git
+"insteadOf" setting, so the benchmark runs offline. The following commands
+are timed:
+
+    cold_configure   configure without any resolved dependencies
+    warm_configure   configure again with the dependencies resolved
+    build_startup    build, which loads the dependencies (load chain)
+    help             --help
+
+The graph shapes are:
+
+    wide      the application depends on all dependencies
+    deep      every dependency depends on the next one
+    diamond   layers of dependencies, where every dependency depends on
+              two dependencies in the next layer
+
+The variants are:
+
+    checkout             the dependencies check out the master branch
+    semver               the dependencies select the newest tag using semver
+    submodules           as checkout, and every dependency has a submodule
+    semver_submodules    as semver, and every dependency has a submodule
+
+The waf binary is built with "python waf build". Run the benchmark from the
+root of the repository:
+
+    python benchmark/benchmark_resolve.py --sizes 10,100,500 \\
+        --output resolve.json
+
+The results are written as JSON. Pass the results of a previous commit with
+--compare to print the change of every measurement:
+
+    python benchmark/benchmark_resolve.py --compare resolve.json
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+# The base of the URLs used as sources of the dependencies
+SOURCE_BASE = 'github.com/wurf-benchmark/'
+
+SHAPES = ['wide', 'deep', 'diamond']
+
+# Dict mapping a variant to (tags, submodules)
+VARIANTS = {
+    'checkout': (False, False),
+    'semver': (True, False),
+    'submodules': (False, True),
+    'semver_submodules': (True, True)}
+
+COMMANDS = ['cold_configure', 'warm_configure', 'build_startup', 'help']
+
+WSCRIPT = """#! /usr/bin/env python
+# encoding: utf-8
+
+APPNAME = '{name}'
+VERSION = '1.0.0'
+
+
+def configure(conf):
+    pass
+
+
+def build(bld):
+    pass
+"""
+
+
+def create_graph(shape, nodes):
+    """ Creates a dependency graph.
+
+    :param shape: The shape of the graph, one of SHAPES.
+    :param nodes: The number of dependencies as an int.
+    :return: A tuple (roots, edges) where roots is a list of the
+        dependencies of the application, and edges is a dict mapping a
+        dependency to a list of its dependencies. The dependencies are
+        numbered from 0.
+    """
+    edges = dict((node, []) for node in range(nodes))
+
+    if shape == 'wide':
+        return list(range(nodes)), edges
+
+    if shape == 'deep':
+        for node in range(nodes - 1):
+            edges[node] = [node + 1]
+
+        return [0], edges
+
+    # The diamond graph has about as many layers as dependencies per layer
+    width = max(2, int(nodes ** 0.5))
+    layers = [list(range(start, min(start + width, nodes)))
+              for start in range(0, nodes, width)]
+
+    for layer, next_layer in zip(layers, layers[1:]):
+        for index, node in enumerate(layer):
+            edges[node] = sorted(set(
+                [next_layer[index % len(next_layer)],
+                 next_layer[(index + 1) % len(next_layer)]]))
+
+    return layers[0], edges
+
+
+def dependency_name(node):
+    return 'dependency{}'.format(node)
+
+
+def dependency_definition(node, tags):
+
+    definition = {
+        'name': dependency_name(node),
+        'resolver': 'git',
+        'sources': [SOURCE_BASE + dependency_name(node) + '.git']}
+
+    if tags:
+        definition['method'] = 'semver'
+        definition['major'] = 1
+    else:
+        definition['method'] = 'checkout'
+        definition['checkout'] = 'master'
+
+    return definition
+
+
+class Workspace(object):
+    """ The folder with the generated repositories and application. """
+
+    def __init__(self, path):
+        self.path = path
+        self.repositories_path = os.path.join(path, 'repositories')
+        self.home_path = os.path.join(path, 'home')
+        self.app_path = os.path.join(path, 'app')
+
+        os.makedirs(self.repositories_path)
+        os.makedirs(self.home_path)
+
+        # The git configuration used by the benchmark, such that the
+        # dependencies are cloned from the local repositories
+        with open(os.path.join(self.home_path, '.gitconfig'), 'w') as config:
+            config.write(
+                '[url "file://{}/"]\n'
+                '\tinsteadOf = https://{}\n'
+                '[protocol "file"]\n'
+                '\tallow = always\n'
+                '[user]\n'
+                '\tname = Benchmark\n'
+                '\temail = benchmark@example.com\n'.format(
+                    self.repositories_path.replace(os.sep, '/'),
+                    SOURCE_BASE))
+
+        self.env = dict(os.environ)
+        self.env['HOME'] = self.home_path
+        self.env['NOCLIMB'] = '1'
+
+    def run(self, args, cwd):
+        """ Runs a command, raising an exception if it fails.
+
+        :return: The output of the command as a string.
+        """
+        process = subprocess.Popen(
+            args, cwd=cwd, env=self.env, stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT)
+
+        output = process.communicate()[0].decode('utf-8', 'replace')
+
+        if process.returncode != 0:
+            raise RuntimeError('{} failed in {}:\n{}'.format(
+                ' '.join(args), cwd, output))
+
+        return output
+
+    def git(self, args, cwd):
+        return self.run(['git'] + args, cwd=cwd)
+
+    def create_repository(self, name, dependencies, tags, submodule):
+        """ Creates a git repository for a dependency or the application.
+
+        :param name: The name of the repository.
+        :param dependencies: The dependency definitions as a list of dicts.
+        :param tags: True if the tags 1.0.0 and 1.1.0 should be created.
+        :param submodule: True if the shared submodule should be added.
+        :return: The path to the repository.
+        """
+        path = os.path.join(self.repositories_path, name + '.git')
+        os.makedirs(path)
+
+        self.git(['init', '-q'], cwd=path)
+        self.git(['symbolic-ref', 'HEAD', 'refs/heads/master'], cwd=path)
+
+        with open(os.path.join(path, 'wscript'), 'w') as wscript:
+            wscript.write(WSCRIPT.format(name=name))
+
+        with open(os.path.join(path, 'resolve.json'), 'w') as resolve_json:
+            json.dump(dependencies, resolve_json, indent=4)
+
+        if submodule:
+            self.git(['submodule', 'add', '-q',
+                      'https://' + SOURCE_BASE + 'submodule.git',
+                      'submodule'], cwd=path)
+
+        self.git(['add', '.'], cwd=path)
+        self.git(['commit', '-q', '-m', 'First commit'], cwd=path)
+
+        if tags:
+            self.git(['tag', '1.0.0'], cwd=path)
+
+        with open(os.path.join(path, 'version.txt'), 'w') as version:
+            version.write('1.1.0\n')
+
+        self.git(['add', '.'], cwd=path)
+        self.git(['commit', '-q', '-m', 'Second commit'], cwd=path)
+
+        if tags:
+            self.git(['tag', '1.1.0'], cwd=path)
+
+        return path
+
+    def create(self, shape, nodes, variant, waf):
+        """ Creates the repositories and the application. """
+
+        tags, submodules = VARIANTS[variant]
+        roots, edges = create_graph(shape=shape, nodes=nodes)
+
+        if submodules:
+            self.create_repository(
+                name='submodule', dependencies=[], tags=False,
+                submodule=False)
+
+        for node in range(nodes):
+            self.create_repository(
+                name=dependency_name(node),
+                dependencies=[dependency_definition(node=n, tags=tags)
+                              for n in edges[node]],
+                tags=tags, submodule=submodules)
+
+        # The application is cloned, as a project would be
+        path = self.create_repository(
+            name='app',
+            dependencies=[dependency_definition(node=n, tags=tags)
+                          for n in roots],
+            tags=False, submodule=False)
+
+        self.git(['clone', '-q', path, self.app_path], cwd=self.path)
+
+        shutil.copy(waf, os.path.join(self.app_path, 'waf'))
+
+    def time_waf(self, python, args):
+        """ Runs waf in the application.
+
+        :return: The time used in seconds.
+        """
+        start = time.time()
+        self.run([python, 'waf'] + args, cwd=self.app_path)
+        return time.time() - start
+
+    def clean(self):
+        """ Removes the resolved dependencies and the build folder. """
+
+        for folder in ['resolved_dependencies', 'resolve_symlinks', 'build']:
+            path = os.path.join(self.app_path, folder)
+
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+
+
+def measure(workspace, nodes, python, repeat, configure_args):
+    """ Times the commands in the application.
+
+    :return: A dict mapping the commands to the time in seconds. The warm
+        commands are run several times, the best time is used.
+    """
+    configure = ['configure'] + configure_args
+
+    # The first run unpacks waf, which is not part of the measurements
+    workspace.time_waf(python=python, args=['--version'])
+
+    workspace.clean()
+    result = {'cold_configure': workspace.time_waf(
+        python=python, args=configure)}
+
+    # Make sure that all dependencies were resolved
+    resolved = len(os.listdir(
+        os.path.join(workspace.app_path, 'resolve_symlinks')))
+
+    if resolved != nodes:
+        raise RuntimeError('Resolved {} of {} dependencies'.format(
+            resolved, nodes))
+
+    def best(args):
+        return min(workspace.time_waf(python=python, args=args)
+                   for _ in range(repeat))
+
+    result['warm_configure'] = best(configure)
+    result['build_startup'] = best(['build'])
+    result['help'] = best(['--help'])
+
+    return result
+
+
+def run_benchmark(shape, nodes, variant, waf, python, repeat, configure_args,
+                  keep):
+
+    path = tempfile.mkdtemp(prefix='wurf-benchmark-')
+
+    try:
+        workspace = Workspace(path=path)
+
+        start = time.time()
+        workspace.create(shape=shape, nodes=nodes, variant=variant, waf=waf)
+        setup = time.time() - start
+
+        result = measure(workspace=workspace, nodes=nodes, python=python,
+                         repeat=repeat, configure_args=configure_args)
+        result['setup'] = setup
+
+    except RuntimeError as e:
+        result = {'error': str(e)}
+
+    finally:
+        if keep:
+            print('Kept the workspace in {}'.format(path))
+        else:
+            shutil.rmtree(path, ignore_errors=True)
+
+    result.update({'shape': shape, 'nodes': nodes, 'variant': variant})
+    return result
+
+
+def command_output(args, cwd=None):
+    try:
+        output = subprocess.check_output(args, cwd=cwd)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    return output.decode('utf-8').strip()
+
+
+def result_key(result):
+    return (result['shape'], result['nodes'], result['variant'])
+
+
+def compare(results, previous):
+    """ Prints the change of every measurement compared to the previous
+    results.
+    """
+    previous_results = dict((result_key(r), r) for r in previous['results'])
+
+    print('Compared with commit {}:'.format(previous.get('commit')))
+
+    for result in results:
+        old = previous_results.get(result_key(result))
+
+        if old is None:
+            continue
+
+        for command in COMMANDS:
+            if command not in result or command not in old:
+                continue
+
+            print('  {:8} {:4} {:18} {:15} {:7.3f} s -> {:7.3f} s '
+                  '({:+.0%})'.format(
+                      result['shape'], result['nodes'], result['variant'],
+                      command, old[command], result[command],
+                      result[command] / old[command] - 1))
+
+
+def print_result(result):
+
+    if 'error' in result:
+        # The complete output is stored in the results
+        error = '\n'.join(result['error'].strip().split('\n')[-3:])
+
+        print('{shape:8} {nodes:4} {variant:18} failed:\n{}'.format(
+            error, **result))
+        return
+
+    print('{shape:8} {nodes:4} {variant:18} '
+          'cold_configure={cold_configure:.3f} '
+          'warm_configure={warm_configure:.3f} '
+          'build_startup={build_startup:.3f} help={help:.3f}'.format(
+              **result))
+
+
+def main():
+
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip(),
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--waf', default=os.path.join(root, 'build', 'waf'),
+                        help='The waf binary to benchmark.')
+    parser.add_argument('--python', default=sys.executable,
+                        help='The Python interpreter used to run waf.')
+    parser.add_argument('--shapes', default=','.join(SHAPES))
+    parser.add_argument('--sizes', default='10,100')
+    parser.add_argument('--variants', default='checkout,semver,submodules')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--resolve_jobs', type=int, default=None,
+                        help='Passed to configure.')
+    parser.add_argument('--output', default=None,
+                        help='The file where the results are written.')
+    parser.add_argument('--compare', default=None,
+                        help='The results of a previous run.')
+    parser.add_argument('--keep', action='store_true',
+                        help='Keep the generated repositories.')
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.waf):
+        parser.error('The waf binary {} does not exist, build it with '
+                     '"python waf build"'.format(args.waf))
+
+    shapes = args.shapes.split(',')
+    sizes = [int(size) for size in args.sizes.split(',')]
+    variants = args.variants.split(',')
+
+    for shape in shapes:
+        if shape not in SHAPES:
+            parser.error('Unknown shape {}'.format(shape))
+
+    for variant in variants:
+        if variant not in VARIANTS:
+            parser.error('Unknown variant {}'.format(variant))
+
+    configure_args = []
+
+    if args.resolve_jobs:
+        configure_args.append('--resolve_jobs={}'.format(args.resolve_jobs))
+
+    results = []
+
+    for shape in shapes:
+        for nodes in sizes:
+            for variant in variants:
+                result = run_benchmark(
+                    shape=shape, nodes=nodes, variant=variant,
+                    waf=os.path.abspath(args.waf), python=args.python,
+                    repeat=args.repeat, configure_args=configure_args,
+                    keep=args.keep)
+
+                print_result(result)
+                results.append(result)
+
+    report = {
+        'commit': command_output(['git', 'rev-parse', 'HEAD'], cwd=root),
+        'python': command_output(
+            [args.python, '-c',
+             'import platform; print(platform.python_version())']),
+        'git': command_output(['git', '--version']),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'configure_args': configure_args,
+        'results': results}
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=4, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare, 'r') as previous:
+            compare(results=results, previous=json.load(previous))
+
+
+if __name__ == '__main__':
+    main()
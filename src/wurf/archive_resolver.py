@@ -2,14 +2,29 @@
 # encoding: utf-8
 
 import os
+import json
+import shutil
 import hashlib
+import tempfile
 
 
 class ArchiveResolver(object):
     """
     Extracts an archive
+
+    The extract folder is named after the SHA256 digest of the archive. After
+    a successful extraction a stamp with the digest and the extractor version
+    is stored next to the folder, so an unchanged archive is not extracted
+    again. The archive is extracted into a temporary folder, which is renamed
+    when the extraction is complete, so an interrupted extraction never
+    leaves a partially extracted folder behind.
     """
 
+    # Increment the version when the extracted files may change e.g. if the
+    # extractor is changed. Archives extracted by an older version are
+    # extracted again.
+    EXTRACTOR_VERSION = 1
+
     def __init__(self, archive_extractor, resolver, cwd):
 
         """ Construct a new instance.
@@ -33,14 +48,69 @@ class ArchiveResolver(object):
 
         assert os.path.isfile(path)
 
-        # Use the path retuned to create a unique location for extracted files
-        extract_hash = hashlib.sha1(path.encode('utf-8')).hexdigest()[:6]
+        # Use the content of the archive to create a unique location for
+        # the extracted files
+        archive_hash = self.__archive_hash(path=path)
 
-        # The folder for storing the requested checkout
-        extract_folder = 'extract-' + extract_hash
+        # The folder for storing the extracted files
+        extract_folder = 'extract-' + archive_hash[:6]
 
         extract_path = os.path.join(self.cwd, extract_folder)
+        stamp_path = extract_path + '.stamp.json'
+
+        stamp = {'sha256': archive_hash,
+                 'extractor_version': self.EXTRACTOR_VERSION}
+
+        if os.path.isdir(extract_path) and \
+                self.__read_stamp(stamp_path=stamp_path) == stamp:
+            return extract_path
+
+        # The old stamp must be removed before the folder is changed
+        if os.path.isfile(stamp_path):
+            os.remove(stamp_path)
+
+        temp_path = tempfile.mkdtemp(prefix=extract_folder + '.',
+                                     suffix='.tmp', dir=self.cwd)
+
+        try:
+            self.archive_extractor(path=path, to_path=temp_path)
+
+            if os.path.isdir(extract_path):
+                shutil.rmtree(extract_path)
 
-        self.archive_extractor(path=path, to_path=extract_path)
+            os.rename(temp_path, extract_path)
+        except Exception:
+            if os.path.isdir(temp_path):
+                shutil.rmtree(temp_path)
+            raise
+
+        with open(stamp_path, 'w') as stamp_file:
+            json.dump(stamp, stamp_file, indent=4, sort_keys=True)
 
         return extract_path
+
+    def __archive_hash(self, path):
+        """ :return: The SHA256 digest of the archive as a hex string. """
+
+        digest = hashlib.sha256()
+
+        with open(path, 'rb') as archive_file:
+            while True:
+                chunk = archive_file.read(64 * 1024)
+                if not chunk:
+                    break
+                digest.update(chunk)
+
+        return digest.hexdigest()
+
+    def __read_stamp(self, stamp_path):
+        """ :return: The stamp as a dict, or None if there is no stamp. """
+
+        if not os.path.isfile(stamp_path):
+            return None
+
+        try:
+            with open(stamp_path, 'r') as stamp_file:
+                return json.load(stamp_file)
+        except ValueError:
+            return None
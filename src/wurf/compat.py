@@ -1,11 +1,50 @@
 #! /usr/bin/env python
 # encoding: utf-8
 
+import os
 import sys
 import codecs
 
 IS_PY2 = sys.version_info[0] == 2
 
+if IS_PY2:
+
+    # The three argument raise statement is a syntax error on Python 3
+    exec("def _reraise(exc_info):\n"
+         "    raise exc_info[0], exc_info[1], exc_info[2]\n")
+else:
+
+    def _reraise(exc_info):
+        raise exc_info[1].with_traceback(exc_info[2])
+
+
+def reraise(exc_info):
+    """ Raises an exception again with its original traceback, e.g. an
+    exception caught in another thread.
+
+    :param exc_info: The tuple (type, value, traceback) returned by
+        sys.exc_info().
+    """
+    _reraise(exc_info)
+
+
+def replace(source, destination):
+    """ Renames the source file to destination, replacing the destination
+    if it exists. On POSIX systems the rename is atomic.
+
+    :param source: The path to the source file as a string.
+    :param destination: The path to the destination file as a string.
+    """
+    if hasattr(os, 'replace'):
+        os.replace(source, destination)
+        return
+
+    # On Python 2 os.rename(...) cannot replace an existing file on Windows
+    if os.name == 'nt' and os.path.isfile(destination):
+        os.remove(destination)
+
+    os.rename(source, destination)
+
 
 def check_locale_python3():
     """ Python 3 depends on the locale to be specified to properly handle
@@ -0,0 +1,156 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+import socket
+import threading
+
+from .compat import IS_PY2
+
+if IS_PY2:
+
+    # Python 2
+    import httplib as http_client
+else:
+
+    # Python 3
+    import http.client as http_client
+
+
+class ConnectionPool(object):
+    """ Keeps HTTP connections alive, such that several requests to the
+    same host reuse the connection.
+
+    A connection is checked out of the pool for the duration of a request
+    and returned when the response has been read. Idle connections are kept
+    per scheme, host and port. Only a limited number of idle connections are
+    kept for each host, additional connections are closed when they are
+    returned.
+    """
+
+    # The maximum number of idle connections kept for each host
+    MAX_IDLE = 4
+
+    def __init__(self, max_idle=MAX_IDLE, timeout=None):
+        """ Construct an instance.
+
+        :param max_idle: The maximum number of idle connections kept for
+            each host as an int.
+        :param timeout: The number of seconds to wait for the server when
+            connecting or reading as a float, or None to wait forever.
+        """
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self.lock = threading.Lock()
+
+        # Dict mapping a (scheme, netloc) tuple to a list of idle
+        # connections
+        self.idle = {}
+
+    def request(self, method, scheme, netloc, path, headers=None):
+        """ Sends a request, reusing an idle connection if possible.
+
+        If an idle connection was closed by the server, the request is sent
+        again on a new connection.
+
+        :param method: The HTTP method as a string e.g. 'GET'.
+        :param scheme: The scheme as a string, 'http' or 'https'.
+        :param netloc: The host, optionally with a port, as a string.
+        :param path: The path, including the query, as a string.
+        :param headers: A dict with additional headers, or None.
+        :return: A tuple (connection, response). The connection must be
+            passed to release(...) when the response has been read.
+        """
+        headers = dict(headers) if headers else {}
+        key = (scheme, netloc)
+
+        connection = self.__checkout(key=key)
+
+        if connection is not None:
+            try:
+                connection.request(method, path, headers=headers)
+                return connection, connection.getresponse()
+            except (http_client.HTTPException, socket.error):
+                # The server closed the idle connection
+                connection.close()
+
+        connection = self.__connect(scheme=scheme, netloc=netloc)
+
+        try:
+            connection.request(method, path, headers=headers)
+            return connection, connection.getresponse()
+        except Exception:
+            connection.close()
+            raise
+
+    def release(self, connection, response):
+        """ Returns a connection to the pool.
+
+        The connection is only kept if the response was read completely and
+        the server did not ask to close the connection.
+
+        :param connection: The connection returned by request(...).
+        :param response: The response returned by request(...).
+        """
+        if getattr(response, 'will_close', True) or \
+                not response.isclosed():
+            response.close()
+            connection.close()
+            return
+
+        key = (connection.wurf_scheme, connection.wurf_netloc)
+
+        with self.lock:
+            idle = self.idle.setdefault(key, [])
+
+            if len(idle) < self.max_idle:
+                idle.append(connection)
+                return
+
+        connection.close()
+
+    def close(self):
+        """ Closes all idle connections. """
+
+        with self.lock:
+            idle, self.idle = self.idle, {}
+
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
+
+    def __checkout(self, key):
+
+        with self.lock:
+            idle = self.idle.get(key)
+
+            if idle:
+                return idle.pop()
+
+        return None
+
+    def __connect(self, scheme, netloc):
+
+        kwargs = {}
+
+        if self.timeout:
+            kwargs['timeout'] = self.timeout
+
+        # The connection classes are looked up when they are needed, this
+        # allows tools like vcrpy to replace them in tests
+        if scheme == 'https':
+            connection = http_client.HTTPSConnection(netloc, **kwargs)
+        else:
+            connection = http_client.HTTPConnection(netloc, **kwargs)
+
+        # Remember the key used for the pool
+        connection.wurf_scheme = scheme
+        connection.wurf_netloc = netloc
+
+        return connection
+
+    def __repr__(self):
+        """
+        :return: Representation of this object as a string
+        """
+        return "%s(max_idle=%r, timeout=%r)" % (
+            self.__class__.__name__, self.max_idle, self.timeout)
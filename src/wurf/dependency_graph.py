@@ -0,0 +1,332 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+import os
+import json
+import collections
+
+from .dependency import Dependency
+from .error import Error
+
+
+class DependencyGraph(object):
+    """ Discovers the full dependency graph before anything is resolved.
+
+    Normally the dependency graph is only discovered while resolving, since
+    we have to fetch a dependency before we can read its resolve.json file.
+    This serializes the discovery with the network operations.
+
+    The DependencyGraph instead reads the resolve.json files directly from
+    the git repositories already cloned in the resolve path, using
+    'git show <ref>:resolve.json'. Once the graph is known, all repositories
+    are fetched in one batch using the ResolveScheduler. The fetched
+    repositories may define new dependencies, so we repeat until the graph
+    no longer changes.
+
+    Finally we check that all definitions of a dependency are equal (i.e.
+    have the same SHA1). A conflict is reported before anything is checked
+    out.
+
+    Dependencies added in the resolve(...) function of a wscript cannot be
+    discovered, these are fetched by the normal resolve.
+    """
+
+    def __init__(self, registry, ctx, git, semver_selector,
+                 resolve_scheduler, args):
+        """ Construct an instance.
+
+        :param registry: A Registry instance.
+        :param ctx: A Waf Context instance.
+        :param git: A Git instance.
+        :param semver_selector: A SemverSelector instance.
+        :param resolve_scheduler: A ResolveScheduler instance.
+        :param args: The command-line arguments passed as a list.
+        """
+        self.registry = registry
+        self.ctx = ctx
+        self.git = git
+        self.semver_selector = semver_selector
+        self.resolve_scheduler = resolve_scheduler
+        self.args = args
+
+        # The dependencies in the graph, in the order they were discovered.
+        # The layout is: { 'name': Dependency }
+        self.nodes = collections.OrderedDict()
+
+        # The dependencies defined by a dependency. The layout is:
+        # { 'name': ['child1', 'child2'] }
+        self.edges = {}
+
+        # The names of the dependencies we already tried to fetch
+        self.fetched = set()
+
+    def discover(self, path):
+        """ Discover and fetch the dependencies defined in the resolve.json
+        file in the folder path.
+
+        :param path: The path to the top-level project as a string.
+        :return: The nodes of the graph as an OrderedDict.
+        """
+        resolve_path = os.path.join(path, 'resolve.json')
+
+        if not os.path.isfile(resolve_path):
+            return self.nodes
+
+        with open(resolve_path, 'r') as resolve_file:
+            dependencies = [Dependency(**d) for d in json.load(resolve_file)]
+
+        conflicts = self.__walk(dependencies=dependencies)
+
+        while True:
+
+            unfetched = [d for d in self.nodes.values()
+                         if d.name not in self.fetched and
+                         d.resolver == 'git' and not self.__user_path(d) and
+                         not self.__is_pinned(d)]
+
+            if not unfetched:
+                break
+
+            self.__fetch(dependencies=unfetched)
+
+            conflicts = self.__walk(dependencies=dependencies)
+
+        if conflicts:
+            dependency, seen_dependency = conflicts[0]
+
+            raise Error(
+                "SHA1 mismatch when adding:\n{}\n"
+                "the previous definition was:\n{}".format(
+                    dependency, seen_dependency))
+
+        return self.nodes
+
+    def __walk(self, dependencies):
+        """ Builds the graph from the repositories available locally.
+
+        :param dependencies: The top-level dependencies as a list.
+        :return: A list of (dependency, seen_dependency) tuples containing
+            the SHA1 conflicts.
+        """
+        self.nodes = collections.OrderedDict()
+        self.edges = {}
+
+        conflicts = []
+
+        queue = collections.deque(
+            [(None, dependency) for dependency in dependencies])
+
+        while queue:
+
+            parent, dependency = queue.popleft()
+
+            if parent is not None:
+
+                # Internal dependencies are only used by the top-level
+                if dependency.internal:
+                    continue
+
+                self.edges.setdefault(parent, []).append(dependency.name)
+
+            if dependency.name in self.nodes:
+
+                seen_dependency = self.nodes[dependency.name]
+
+                if seen_dependency.sha1 != dependency.sha1:
+                    conflicts.append((dependency, seen_dependency))
+
+                continue
+
+            self.nodes[dependency.name] = dependency
+
+            if not dependency.recurse:
+                continue
+
+            for child in self.__children(dependency=dependency):
+                queue.append((dependency.name, child))
+
+        return conflicts
+
+    def __children(self, dependency):
+        """ Reads the dependencies defined by a dependency.
+
+        :param dependency: A Dependency instance.
+        :return: A list of Dependency instances.
+        """
+        user_path = self.__user_path(dependency)
+
+        if user_path:
+            resolve_path = os.path.join(
+                os.path.expanduser(user_path), 'resolve.json')
+
+            if not os.path.isfile(resolve_path):
+                return []
+
+            with open(resolve_path, 'r') as resolve_file:
+                return [Dependency(**d) for d in json.load(resolve_file)]
+
+        if dependency.resolver != 'git':
+            return []
+
+        for source in dependency.sources:
+
+            path = self.__git_resolver(
+                dependency=dependency, source=source).master_path()
+
+            if not os.path.isdir(path):
+                continue
+
+            try:
+                resolve_json = self.__show_resolve_json(
+                    dependency=dependency, path=path)
+            except Error:
+                self.ctx.logger.debug(
+                    "Could not read resolve.json for {} in {}".format(
+                        dependency.name, path), exc_info=True)
+                continue
+
+            return [Dependency(**d) for d in json.loads(resolve_json)]
+
+        return []
+
+    def __show_resolve_json(self, dependency, path):
+        """ Reads the resolve.json file of the version we would check out.
+
+        :param dependency: A Dependency instance.
+        :param path: The path to the git repository as a string.
+        :return: The content of the resolve.json file as a string.
+        """
+        checkout = self.__user_checkout(dependency)
+
+        if not checkout and dependency.method == 'checkout':
+            checkout = dependency.checkout
+
+        if not checkout and dependency.method == 'semver':
+            checkout = self.semver_selector.select_tag(
+                major=dependency.major, tags=self.git.tags(cwd=path),
+                minor=dependency.minor)
+
+        if not checkout:
+            return self.git.show(ref='HEAD', path='resolve.json', cwd=path)
+
+        try:
+            return self.git.show(ref=checkout, path='resolve.json', cwd=path)
+        except Error:
+            # A branch is only available as a remote branch in the clone
+            return self.git.show(ref='origin/' + checkout,
+                                 path='resolve.json', cwd=path)
+
+    def __fetch(self, dependencies):
+        """ Fetches the git repositories of the dependencies in parallel.
+
+        :param dependencies: A list of Dependency instances.
+        """
+        self.ctx.start_msg('Fetch {} discovered dependencies'.format(
+            len(dependencies)))
+
+        jobs = []
+
+        for dependency in dependencies:
+
+            self.fetched.add(dependency.name)
+
+            # The resolvers are built here, since the registry should only
+            # be used from the main thread.
+            resolvers = [self.__git_resolver(dependency=dependency,
+                                             source=source)
+                         for source in dependency.sources]
+
+            def fetch(dependency=dependency, resolvers=resolvers):
+                return self.__fetch_sources(
+                    dependency=dependency, resolvers=resolvers)
+
+            jobs.append(self.resolve_scheduler.submit(function=fetch))
+
+        fetched = [job.result() for job in jobs]
+
+        self.ctx.end_msg('{} fetched'.format(
+            len([path for path in fetched if path])))
+
+    def __fetch_sources(self, dependency, resolvers):
+        """ Fetches the first available source of the dependency.
+
+        :return: The path to the git repository or None if all sources
+            failed.
+        """
+        for resolver in resolvers:
+
+            try:
+                return resolver.resolve()
+            except Error:
+                # The normal resolve will try the sources again and report
+                # the error if the dependency is not optional
+                self.ctx.logger.debug("Fetch failed in {}:".format(
+                    resolver), exc_info=True)
+
+        return None
+
+    def __is_pinned(self, dependency):
+        """ Checks if the dependency is pinned to a tag or commit which is
+        already available in one of the cloned repositories. Such a
+        dependency does not have to be fetched.
+
+        :param dependency: A Dependency instance.
+        :return: True if the dependency is pinned otherwise False.
+        """
+        checkout = self.__user_checkout(dependency)
+
+        if not checkout and dependency.method == 'checkout':
+            checkout = dependency.checkout
+
+        if not checkout:
+            return False
+
+        for source in dependency.sources:
+
+            path = self.__git_resolver(
+                dependency=dependency, source=source).master_path()
+
+            if os.path.isdir(path) and \
+                    self.git.is_pinned(checkout=checkout, cwd=path):
+                return True
+
+        return False
+
+    def __git_resolver(self, dependency, source):
+
+        with self.registry.provide_temporary() as temporary:
+            temporary.provide_value('dependency', dependency)
+            temporary.provide_value('source', source)
+
+            return self.registry.require('git_resolver')
+
+    def __user_path(self, dependency):
+        return self.__user_option('--%s_path' % dependency.name)
+
+    def __user_checkout(self, dependency):
+        return self.__user_option('--%s_checkout' % dependency.name)
+
+    def __user_option(self, option):
+        """ Finds the value of an option in the command-line arguments.
+
+        The options are not parsed by the Options instance at this point,
+        so we look for the option ourselves.
+
+        :param option: The option as a string e.g. '--foo_path'
+        :return: The value of the option or None if not found.
+        """
+        for index, arg in enumerate(self.args):
+
+            if arg.startswith(option + '='):
+                return arg[len(option) + 1:]
+
+            if arg == option and index + 1 < len(self.args):
+                return self.args[index + 1]
+
+        return None
+
+    def __repr__(self):
+        """
+        :return: Representation of this object as a string
+        """
+        return "%s(nodes=%r)" % (self.__class__.__name__, list(self.nodes))
@@ -3,6 +3,7 @@
 
 import os
 import json
+import collections
 
 from .dependency import Dependency
 from .error import Error
@@ -10,7 +11,8 @@ from .error import Error
 
 class DependencyManager(object):
 
-    def __init__(self, registry, dependency_cache, ctx, options):
+    def __init__(self, registry, dependency_cache, ctx, options,
+                 resolve_scheduler):
         """ Construct an instance.
 
         As the manager resolves dependencies it will store the results
@@ -29,12 +31,16 @@ class DependencyManager(object):
         :param cache: Dict where paths to dependencies should be stored.
         :param ctx: A Waf Context instance.
         :param options: Options instance for collecing / parsing options
+        :param resolve_scheduler: A ResolveScheduler instance. If the
+            scheduler runs more than one job, the dependencies are resolved
+            in the background (see resolve_pending(...)).
         """
 
         self.registry = registry
         self.dependency_cache = dependency_cache
         self.ctx = ctx
         self.options = options
+        self.resolve_scheduler = resolve_scheduler
 
         # Dict where we will store the dependencies already added. For
         # example two libraries may have an overlap in their
@@ -45,6 +51,13 @@ class DependencyManager(object):
         # purposes).
         self.seen_dependencies = {}
 
+        # Stack of dependencies being resolved in the background. There is
+        # one OrderedDict (mapping the dependency name to the dependency and
+        # its resolver) for every wscript we have recursed into. This allows
+        # us to add the dependencies to the dependency_cache in the order
+        # they were defined, no matter which resolve finishes first.
+        self.pending_dependencies = [collections.OrderedDict()]
+
         # Actions to be executed once all dependencies have been resolved
         # will only be invoked if the post_resolve(...) fuction is invoked.
         self.post_resolve_actions = []
@@ -89,6 +102,52 @@ class DependencyManager(object):
             tmp.provide_value('dependency', dependency)
             resolver = self.registry.require('dependency_resolver')
 
+        if self.resolve_scheduler.jobs > 1:
+            # The resolver is already running in the background. We finish
+            # the dependency once all dependencies of the current wscript
+            # have been added, such that their resolves can run in parallel.
+            self.pending_dependencies[-1][dependency.name] = \
+                (dependency, resolver)
+        else:
+            self.__finish_dependency(dependency=dependency, resolver=resolver)
+
+    def resolve_pending(self):
+        """ Finishes the dependencies added by the current wscript.
+
+        The dependencies are finished in the order they were added. This
+        gives the same dependency_cache order as resolving the dependencies
+        one at a time.
+        """
+        pending = self.pending_dependencies[-1]
+
+        while pending:
+            name = next(iter(pending))
+            self.__finish_pending(name=name)
+
+    def __is_pending(self, name):
+        """ :return: True if a dependency with the given name is pending """
+        return any(name in pending for pending in self.pending_dependencies)
+
+    def __finish_pending(self, name):
+        """ Finishes a pending dependency if one exists with the given name.
+
+        :param name: The name of the dependency as a string
+        """
+        for pending in reversed(self.pending_dependencies):
+
+            if name in pending:
+                dependency, resolver = pending.pop(name)
+                self.__finish_dependency(
+                    dependency=dependency, resolver=resolver)
+                return
+
+    def __finish_dependency(self, dependency, resolver):
+        """ Waits for the resolver and recurses into the dependency.
+
+        :param dependency: A Dependency instance.
+        :param resolver: The resolver for the dependency.
+        """
+
         path = resolver.resolve()
 
         if not path:
@@ -98,12 +157,19 @@ class DependencyManager(object):
             {'path': path, 'recurse': dependency.recurse}
 
         if dependency.recurse:
-            # We do not require the 'resolve' function to be implemented in
-            # dependency projects. Therefore the mandatory=False.
-            #
-            # str() is needed as waf does not handle unicode in its find_node
-            # function (invoked from within recurse).
-            self.ctx.recurse([str(path)], mandatory=False)
+
+            self.pending_dependencies.append(collections.OrderedDict())
+
+            try:
+                # We do not require the 'resolve' function to be implemented
+                # in dependency projects. Therefore the mandatory=False.
+                #
+                # str() is needed as waf does not handle unicode in its
+                # find_node function (invoked from within recurse).
+                self.ctx.recurse([str(path)], mandatory=False)
+                self.resolve_pending()
+            finally:
+                self.pending_dependencies.pop()
 
     def __skip_dependency(self, dependency):
         """ Checks if we should skip the dependency.
@@ -127,6 +193,15 @@ class DependencyManager(object):
                     "the previous definition was:\n{}".format(
                         dependency, seen_dependency))
 
+            # When resolving in parallel, the previous definition may still
+            # be pending. A sequential resolve would have finished it at
+            # this point, together with the dependencies added before it
+            # by the current wscript. We do the same to get the same
+            # dependency_cache order.
+            if self.__is_pending(name=dependency.name):
+                self.resolve_pending()
+                self.__finish_pending(name=dependency.name)
+
             # If the current dependency is non-optional and we have already
             # seen the same dependency as optional
             if not dependency.optional and seen_dependency.optional:
@@ -0,0 +1,160 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+import os
+import shutil
+import tempfile
+
+
+class DownloadCache(object):
+    """ Content-addressed cache of downloaded files.
+
+    The files are stored under their SHA256 digest, e.g. a file with the
+    digest "ab12..." is stored as:
+
+        cache_path/ab/ab12.../filename
+
+    The folder of a file is created in a temporary folder and then renamed,
+    so the cache never contains partially written files. The cache may be
+    shared by several projects and waf processes.
+    """
+
+    def __init__(self, cache_path):
+        """ Construct an instance.
+
+        :param cache_path: The folder containing the cached files as a
+            string.
+        """
+        self.cache_path = cache_path
+
+    def get(self, sha256):
+        """ Finds a cached file.
+
+        :param sha256: The SHA256 digest of the file as a hex string.
+        :return: The path to the cached file as a string or None if the file
+            is not in the cache.
+        """
+        object_path = self.__object_path(sha256=sha256)
+
+        if not os.path.isdir(object_path):
+            return None
+
+        filenames = os.listdir(object_path)
+
+        if len(filenames) != 1:
+            return None
+
+        return os.path.join(object_path, filenames[0])
+
+    def add(self, path, sha256):
+        """ Adds a file to the cache.
+
+        The caller must ensure that the digest matches the content of the
+        file.
+
+        :param path: The path to the file as a string.
+        :param sha256: The SHA256 digest of the file as a hex string.
+        :return: The path to the cached file as a string.
+        """
+        cached = self.get(sha256=sha256)
+
+        if cached:
+            return cached
+
+        object_path = self.__object_path(sha256=sha256)
+        parent_path = os.path.dirname(object_path)
+
+        if not os.path.isdir(parent_path):
+            try:
+                os.makedirs(parent_path)
+            except OSError:
+                # Another process may have created the folder
+                if not os.path.isdir(parent_path):
+                    raise
+
+        temp_path = tempfile.mkdtemp(prefix='tmp-', dir=parent_path)
+
+        try:
+            _link_or_copy(
+                source=path,
+                destination=os.path.join(temp_path, os.path.basename(path)))
+
+            os.rename(temp_path, object_path)
+        except OSError:
+            shutil.rmtree(temp_path)
+
+            # Another process may have added the same file
+            cached = self.get(sha256=sha256)
+
+            if not cached:
+                raise
+
+            return cached
+
+        return self.get(sha256=sha256)
+
+    def link(self, sha256, folder_path, filename=None):
+        """ Makes a cached file available in a folder.
+
+        The file is hard linked into the folder if possible, otherwise it is
+        copied.
+
+        :param sha256: The SHA256 digest of the file as a hex string.
+        :param folder_path: The folder where the file should be placed as a
+            string.
+        :param filename: The name of the file in the folder as a string. If
+            None the name of the cached file is used.
+        :return: The path to the file in the folder as a string or None if
+            the file is not in the cache.
+        """
+        cached = self.get(sha256=sha256)
+
+        if not cached:
+            return None
+
+        if not filename:
+            filename = os.path.basename(cached)
+
+        path = os.path.join(folder_path, filename)
+
+        if os.path.isfile(path):
+
+            if _same_file(path, cached):
+                return path
+
+            os.remove(path)
+
+        _link_or_copy(source=cached, destination=path)
+
+        return path
+
+    def __object_path(self, sha256):
+        sha256 = sha256.lower()
+        return os.path.join(self.cache_path, sha256[:2], sha256)
+
+    def __repr__(self):
+        """
+        :return: Representation of this object as a string
+        """
+        return "%s(cache_path=%r)" % (self.__class__.__name__, self.cache_path)
+
+
+def _same_file(first, second):
+    try:
+        return os.path.samefile(first, second)
+    except (AttributeError, OSError):
+        # os.path.samefile(...) is not available on Windows in Python 2
+        return False
+
+
+def _link_or_copy(source, destination):
+    """ Creates a hard link to the source file, or copies it if hard links
+    are not supported e.g. if the files are on different file systems.
+
+    :param source: The path to the source file as a string.
+    :param destination: The path to the new file as a string.
+    """
+    try:
+        os.link(source, destination)
+    except (AttributeError, OSError):
+        shutil.copy2(source, destination)
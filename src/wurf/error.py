@@ -22,6 +22,13 @@ class CmdAndLogError(Error):
         super(CmdAndLogError, self).__init__(msg)
 
 
+class HttpError(Error):
+    """Exception raised when a server answers with an HTTP error status"""
+    def __init__(self, msg, status):
+        self.status = status
+        super(HttpError, self).__init__(msg)
+
+
 class DependencyError(Error):
     def __init__(self, msg, dependency):
         super(DependencyError, self).__init__(msg, help_message(dependency))
@@ -2,7 +2,6 @@
 # encoding: utf-8
 
 import os
-import json
 from .error import DependencyError
 
 
@@ -13,7 +12,7 @@ class ExistingTagResolver(object):
     """
 
     def __init__(self, ctx, dependency, semver_selector, tag_database,
-                 resolver, cwd):
+                 resolver, resolve_manifest):
         """ Construct a new ExistingTagResolver instance.
 
         :param ctx: A Waf Context instance.
@@ -21,15 +20,15 @@ class ExistingTagResolver(object):
         :param semver_selector: A SemverSelector instance.
         :param tag_database: A TagDatabase instance.
         :param resolver: A resolver instance.
-        :param cwd: Current working directory as a string. This is the place
-            where we should create new folders etc.
+        :param resolve_manifest: A ResolveManifest instance where the paths
+            of the checked out tags are stored.
         """
         self.ctx = ctx
         self.dependency = dependency
         self.semver_selector = semver_selector
         self.tag_database = tag_database
         self.resolver = resolver
-        self.cwd = cwd
+        self.resolve_manifest = resolve_manifest
 
     def resolve(self):
         """
@@ -38,7 +37,7 @@ class ExistingTagResolver(object):
         :return: The path to the existing tag, otherwise None.
         """
 
-        tags = self.__load_tag_file()
+        tags = self.resolve_manifest.tags(name=self.dependency.name)
 
         # Try to resolve path from tag file and tag database
         path = self.__resolve_path(tags=tags)
@@ -60,28 +59,9 @@ class ExistingTagResolver(object):
             raise DependencyError(msg="No git tag available",
                                   dependency=self.dependency)
 
-        self.__store_tag_file(tags=tags)
+        self.resolve_manifest.store_tags(name=self.dependency.name, tags=tags)
         return path
 
-    def __load_tag_file(self):
-
-        tag_path = os.path.join(
-            self.cwd, self.dependency.name + '.tags.json')
-
-        if not os.path.isfile(tag_path):
-            return {}
-
-        with open(tag_path, 'r') as tag_file:
-            return json.load(tag_file)
-
-    def __store_tag_file(self, tags):
-
-        tag_path = os.path.join(
-            self.cwd, self.dependency.name + '.tags.json')
-
-        with open(tag_path, 'w') as tag_file:
-            return json.dump(tags, tag_file, indent=4)
-
     def __resolve_path(self, tags):
 
         # Query the tags for this dependency from the online database
@@ -90,9 +70,10 @@ class ExistingTagResolver(object):
         if not project_tags:
             return None
 
-        # Select the most recent tag for this major version
+        # Select the most recent tag for this major (and minor) version
         most_recent = self.semver_selector.select_tag(
-            self.dependency.major, project_tags)
+            major=self.dependency.major, tags=project_tags,
+            minor=self.dependency.minor)
 
         if most_recent not in tags:
             # We do not have a path to the most recent tag
@@ -3,18 +3,39 @@
 
 import os
 import re
+import shutil
+
+from .error import Error
 
 
 class Git(object):
 
-    def __init__(self, git_binary, ctx):
+    # The first version of git supporting 'git submodule update --jobs'
+    PARALLEL_SUBMODULES_VERSION = (2, 9)
+
+    def __init__(self, git_binary, ctx, retry_policy=None,
+                 submodule_jobs=None, shallow_submodules=False):
         """ Construct a new Git instance.
 
         :param git_binary: A string containing the path to a git executable.
         :param ctx: A Waf Context instance.
+        :param retry_policy: A RetryPolicy instance used for the commands
+            accessing the network, or None to run the commands once without
+            a timeout.
+        :param submodule_jobs: The number of submodules fetched in parallel
+            by 'git submodule update' as an int, or None to use the default
+            of git.
+        :param shallow_submodules: If True the submodules are fetched with a
+            history truncated to the recorded commit.
         """
         self.git_binary = git_binary
         self.ctx = ctx
+        self.retry_policy = retry_policy
+        self.submodule_jobs = submodule_jobs
+        self.shallow_submodules = shallow_submodules
+
+        # The version of git, read the first time it is needed
+        self.__version = None
 
     def version(self):
         """
@@ -41,20 +62,191 @@ class Git(object):
 
         return output
 
-    def clone(self, repository, directory, cwd):
+    def clone(self, repository, directory, cwd, reference=None, depth=None,
+              branch=None, filter_spec=None, single_branch=False):
         """
         Runs 'git clone <repository> <directory>' in the directory cwd.
+
+        :param reference: Path to a local repository as a string. If
+            specified, objects available in the reference repository are not
+            downloaded but borrowed using 'git clone --reference'.
+        :param depth: If specified, a shallow clone with a history truncated
+            to the number of commits is created using 'git clone --depth'.
+        :param branch: If specified, the branch or tag is checked out instead
+            of the remote HEAD using 'git clone --branch'.
+        :param filter_spec: If specified, a partial clone is created using
+            'git clone --filter', e.g. 'blob:none' only downloads the file
+            contents when they are checked out.
+        :param single_branch: If True, only the history of one branch is
+            cloned using 'git clone --single-branch'.
+        """
+        args = [self.git_binary, 'clone']
+
+        if reference:
+            args += ['--reference', reference]
+
+        if depth:
+            args += ['--depth', str(depth)]
+
+        if branch:
+            args += ['--branch', branch]
+
+        if filter_spec:
+            args += ['--filter=' + filter_spec]
+
+        if single_branch:
+            args += ['--single-branch']
+
+        args += [repository, directory]
+
+        # A clone which timed out may leave the directory behind, this must
+        # be removed before the clone is retried
+        path = os.path.join(cwd, directory)
+        existed = os.path.exists(path)
+
+        def cleanup():
+            if not existed and os.path.isdir(path):
+                shutil.rmtree(path)
+
+        self.__network_cmd_and_log(args, cwd=cwd, cleanup=cleanup)
+
+    def clone_mirror(self, repository, directory, cwd):
+        """
+        Runs 'git clone --mirror <repository> <directory>' in the directory
+        cwd.
+
+        Automatic garbage collection is disabled in the mirror, since other
+        repositories may borrow objects from it.
         """
-        args = [self.git_binary, 'clone', repository, directory]
+        args = [self.git_binary, 'clone', '--mirror', '--config',
+                'gc.auto=0', repository, directory]
+
+        path = os.path.join(cwd, directory)
+        existed = os.path.exists(path)
+
+        def cleanup():
+            if not existed and os.path.isdir(path):
+                shutil.rmtree(path)
+
+        self.__network_cmd_and_log(args, cwd=cwd, cleanup=cleanup)
+
+    def fetch(self, cwd):
+        """
+        Runs 'git fetch' in the directory cwd
+        """
+        args = [self.git_binary, 'fetch']
+        self.__network_cmd_and_log(args, cwd=cwd)
+
+    def fetch_ref(self, refspec, cwd, depth=None, retry=True):
+        """
+        Runs 'git fetch origin <refspec>' in the directory cwd.
+
+        :param refspec: The refspec as a string, e.g. a commit id or
+            '+refs/tags/1.0.0:refs/tags/1.0.0'.
+        :param depth: If specified, the history is truncated to the number
+            of commits using 'git fetch --depth'.
+        :param retry: If False a failed fetch is not retried.
+        """
+        args = [self.git_binary, 'fetch']
+
+        if depth:
+            args += ['--depth', str(depth)]
+
+        args += ['origin', refspec]
+        self.__network_cmd_and_log(args, cwd=cwd, retry=retry)
+
+    def add_remote_branch(self, branch, cwd):
+        """
+        Runs 'git remote set-branches --add origin <branch>' in the directory
+        cwd, such that the branch is fetched and can be checked out in a
+        repository cloned with a single branch.
+        """
+        args = [self.git_binary, 'remote', 'set-branches', '--add', 'origin',
+                branch]
         self.ctx.cmd_and_log(args, cwd=cwd)
 
-    def pull(self, cwd):
+    def fetch_all(self, cwd, unshallow=False):
+        """
+        Runs 'git fetch --tags origin +refs/heads/*:refs/remotes/origin/*' in
+        the directory cwd, fetching all branches and tags, also if the
+        repository was cloned with a single branch.
+
+        :param unshallow: If True, the complete history is fetched using
+            'git fetch --unshallow'. The repository must be shallow.
+        """
+        args = [self.git_binary, 'fetch', '--tags']
+
+        if unshallow:
+            args += ['--unshallow']
+
+        args += ['origin', '+refs/heads/*:refs/remotes/origin/*']
+        self.__network_cmd_and_log(args, cwd=cwd)
+
+    def fetch_tags(self, cwd, depth=None, retry=True):
+        """
+        Runs 'git fetch --tags origin' in the directory cwd, fetching the
+        tags missing from a shallow or single branch clone.
+
+        :param depth: If specified, the history of the tags is truncated to
+            the number of commits using 'git fetch --depth'.
+        :param retry: If False a failed fetch is not retried.
+        """
+        args = [self.git_binary, 'fetch', '--tags']
+
+        if depth:
+            args += ['--depth', str(depth)]
+
+        args += ['origin']
+        self.__network_cmd_and_log(args, cwd=cwd, retry=retry)
+
+    def is_shallow(self, cwd):
+        """
+        Checks whether the repository in the directory cwd is a shallow
+        clone, i.e. whether its history is truncated.
+
+        :param cwd: The current working directory as a string
+        """
+        args = [self.git_binary, 'rev-parse', '--git-dir']
+        git_dir = self.ctx.cmd_and_log(args, cwd=cwd).strip()
+
+        return os.path.isfile(os.path.join(cwd, git_dir, 'shallow'))
+
+    def missing_alternates(self, cwd):
+        """
+        Reads the alternate object stores of the repository in the
+        directory cwd, i.e. the repositories it borrows objects from.
+
+        A repository with a missing alternate object store is broken, e.g.
+        if it was cloned with a reference which has since been deleted.
+
+        :param cwd: The current working directory as a string
+        :return: The paths to the alternate object stores which do not exist
+            as a list of strings.
+        """
+        objects_path = os.path.join(cwd, '.git', 'objects')
+        alternates_path = os.path.join(objects_path, 'info', 'alternates')
+
+        if not os.path.isfile(alternates_path):
+            return []
+
+        with open(alternates_path, 'r') as alternates_file:
+            alternates = [line.strip() for line in alternates_file]
+
+        # Relative paths are relative to the objects folder
+        alternates = [os.path.join(objects_path, a) for a in alternates
+                      if a and not a.startswith('#')]
+
+        return [a for a in alternates if not os.path.isdir(a)]
+
+    def pull(self, cwd, retry=True):
         """
         Runs 'git pull' in the directory cwd
+
+        :param retry: If False a failed pull is not retried.
         """
 
         args = [self.git_binary, 'pull']
-        self.ctx.cmd_and_log(args, cwd=cwd)
+        self.__network_cmd_and_log(args, cwd=cwd, retry=retry)
 
     def branch(self, cwd):
         """
@@ -111,6 +303,60 @@ class Git(object):
         args = [self.git_binary, 'checkout', branch]
         self.ctx.cmd_and_log(args, cwd=cwd)
 
+    def has_commit(self, ref, cwd):
+        """
+        Runs 'git cat-file -e <ref>^{commit}' in the directory cwd, to check
+        whether the ref points to a commit available in the repository.
+
+        :param ref: The branch, tag or commit as a string
+        :param cwd: The current working directory as a string
+        :return: True if the commit is available otherwise False
+        """
+        args = [self.git_binary, 'cat-file', '-e', ref + '^{commit}']
+
+        try:
+            self.ctx.cmd_and_log(args, cwd=cwd)
+        except Error:
+            return False
+
+        return True
+
+    def is_pinned(self, checkout, cwd):
+        """
+        Checks if the checkout is a tag or a full commit id (SHA1) already
+        available in the repository in directory cwd.
+
+        Tags and commits are considered immutable, so there is no need to
+        fetch the repository to resolve them. Branches and abbreviated
+        commit ids are never pinned.
+
+        :param checkout: The branch, tag or commit as a string
+        :param cwd: The current working directory as a string
+        """
+        if re.match('^[0-9a-f]{40}$', checkout):
+            return self.has_commit(ref=checkout, cwd=cwd)
+
+        return self.has_commit(ref='refs/tags/' + checkout, cwd=cwd)
+
+    def worktree_add(self, path, branch, cwd):
+        """
+        Runs 'git worktree add <path> <branch>' in the directory cwd.
+
+        The new working tree shares the object database of the repository
+        in cwd. As with 'git checkout' a tag or commit is checked out in
+        detached HEAD state.
+        """
+        args = [self.git_binary, 'worktree', 'add', path, branch]
+        self.ctx.cmd_and_log(args, cwd=cwd)
+
+    def worktree_prune(self, cwd):
+        """
+        Runs 'git worktree prune' in the directory cwd, this removes the
+        information about working trees which no longer exist.
+        """
+        args = [self.git_binary, 'worktree', 'prune']
+        self.ctx.cmd_and_log(args, cwd=cwd)
+
     def has_submodules(ctx, cwd):
         """
         Returns true if the repository in directory cwd contains the
@@ -135,19 +381,69 @@ class Git(object):
     def update_submodules(self, cwd):
         """
         Runs 'git submodule update' in the directory cwd
+
+        If supported by git, the submodules are fetched in parallel using
+        '--jobs' and shallow using '--depth 1'. If the recorded commit of a
+        submodule cannot be fetched shallow, e.g. because the server does not
+        allow fetching a commit by its SHA1, the update is run again with
+        the full history.
         """
         args = [self.git_binary, 'submodule', 'update']
-        self.ctx.cmd_and_log(args, cwd=cwd)
+
+        if not self.__supports_parallel_submodules():
+            self.__network_cmd_and_log(args, cwd=cwd)
+            return
+
+        if self.submodule_jobs:
+            args += ['--jobs', str(self.submodule_jobs)]
+
+        if not self.shallow_submodules:
+            self.__network_cmd_and_log(args, cwd=cwd)
+            return
+
+        try:
+            self.__network_cmd_and_log(
+                args + ['--depth', '1'], cwd=cwd, retry=False)
+        except Error as e:
+            self.ctx.to_log(
+                "Shallow submodule update failed, fetching the full "
+                "history: {}\n".format(e))
+            self.__network_cmd_and_log(args, cwd=cwd)
+
+    def submodules_up_to_date(self, cwd):
+        """
+        Runs 'git submodule status' in the directory cwd and checks that all
+        submodules are initialized and checked out at the commit recorded in
+        the repository. This does not access the network.
+        """
+        if not self.has_submodules(cwd=cwd):
+            return True
+
+        args = [self.git_binary, 'submodule', 'status']
+        output = self.ctx.cmd_and_log(args, cwd=cwd)
+
+        # The status of each submodule is prefixed with '-' if it is not
+        # initialized, '+' if the checked out commit does not match and 'U'
+        # if it has merge conflicts
+        for line in output.split('\n'):
+            if line and line[0] in '-+U':
+                return False
+
+        return True
 
     def pull_submodules(self, cwd):
         """
         Runs 'git submodule sync', 'git submodule init', and
-        'git submodule update' unless the repository doesn't have submodules.
+        'git submodule update' unless the repository doesn't have submodules
+        or all submodules are checked out at the commits recorded in the
+        repository.
         """
-        if self.has_submodules(cwd=cwd):
-            self.sync_submodules(cwd=cwd)
-            self.init_submodules(cwd=cwd)
-            self.update_submodules(cwd=cwd)
+        if self.submodules_up_to_date(cwd=cwd):
+            return
+
+        self.sync_submodules(cwd=cwd)
+        self.init_submodules(cwd=cwd)
+        self.update_submodules(cwd=cwd)
 
     def tags(self, cwd):
         """
@@ -161,6 +457,94 @@ class Git(object):
         tags = output.split('\n')
         return [t for t in tags if t != '']
 
+    def remote_head(self, repository, retry=True):
+        """
+        Runs 'git ls-remote <repository> HEAD' and returns the commit of the
+        HEAD of the remote repository. This is a cheap way to check that a
+        remote repository can be reached.
+
+        :param repository: The URL of the repository as a string
+        :param retry: If False a failed command is not retried.
+        :return: The commit id as a string, or None if the repository has no
+            HEAD.
+        """
+        args = [self.git_binary, 'ls-remote', repository, 'HEAD']
+        output = self.__network_cmd_and_log(args, retry=retry).strip()
+
+        if not output:
+            return None
+
+        return output.split()[0]
+
+    def remote_refs(self, repository, patterns, cwd=None, retry=True):
+        """
+        Runs 'git ls-remote <repository> <patterns>' and returns the names
+        of the matching refs in the remote repository.
+
+        :param repository: The URL or the name of the remote as a string
+        :param patterns: The refs to look for as a list of strings, e.g.
+            ['refs/tags/1.0.0', 'refs/heads/1.0.0'].
+        :param cwd: The current working directory as a string, this is
+            needed if the repository is the name of a remote.
+        :param retry: If False a failed command is not retried.
+        :return: The names of the refs as a list of strings.
+        """
+        args = [self.git_binary, 'ls-remote', repository] + list(patterns)
+
+        if cwd:
+            output = self.__network_cmd_and_log(args, cwd=cwd, retry=retry)
+        else:
+            output = self.__network_cmd_and_log(args, retry=retry)
+
+        refs = []
+
+        for line in output.split('\n'):
+            line = line.strip()
+
+            if line:
+                refs.append(line.split('\t')[-1])
+
+        return refs
+
+    def remote_tags(self, repository, retry=True):
+        """
+        Runs 'git ls-remote --tags <repository>' and returns the tags
+        available in the remote repository, without cloning it.
+
+        :param repository: The URL of the repository as a string
+        :param retry: If False a failed command is not retried.
+        """
+        args = [self.git_binary, 'ls-remote', '--tags', repository]
+        output = self.__network_cmd_and_log(args, retry=retry)
+
+        tags = []
+
+        # Every line has the format "<sha1>\trefs/tags/<tag>". Annotated tags
+        # are listed twice, the second time with the '^{}' suffix denoting
+        # the commit pointed to by the tag.
+        for line in output.split('\n'):
+
+            ref = line.split('\t')[-1].strip()
+
+            if not ref.startswith('refs/tags/') or ref.endswith('^{}'):
+                continue
+
+            tags.append(ref[len('refs/tags/'):])
+
+        return tags
+
+    def show(self, ref, path, cwd):
+        """
+        Runs 'git show <ref>:<path>' in the directory cwd and returns the
+        content of the file, without checking out the ref.
+
+        :param ref: The branch, tag or commit as a string
+        :param path: The path of the file in the repository as a string
+        :param cwd: The current working directory as a string
+        """
+        args = [self.git_binary, 'show', '{}:{}'.format(ref, path)]
+        return self.ctx.cmd_and_log(args, cwd=cwd)
+
     def remote_origin_url(self, cwd):
         """
         Runs 'git config --get remote.origin.url' in the directory cwd and
@@ -172,3 +556,84 @@ class Git(object):
         output = self.ctx.cmd_and_log(args, cwd=cwd)
 
         return output.strip()
+
+    def __supports_parallel_submodules(self):
+
+        if self.__version is None:
+            self.__version = self.version()
+
+        return self.__version >= self.PARALLEL_SUBMODULES_VERSION
+
+    def __network_cmd_and_log(self, args, cleanup=None, retry=True,
+                              **kwargs):
+        """ Runs a git command which accesses the network, using the retry
+        policy.
+
+        Only failures caused by a timeout or the network are retried.
+
+        :param args: The command as a list.
+        :param cleanup: A function called after a failed attempt, before the
+            command is retried, or None.
+        :param retry: If False the command is run once, using the timeout of
+            the retry policy. This is used for commands which are expected
+            to fail sometimes, where the caller has a fallback.
+        :param kwargs: The keyword arguments passed to cmd_and_log(...).
+        """
+        if self.retry_policy is None:
+            return self.ctx.cmd_and_log(args, **kwargs)
+
+        if self.retry_policy.timeout:
+            kwargs['timeout'] = self.retry_policy.timeout
+
+        if not retry:
+            return self.ctx.cmd_and_log(args, **kwargs)
+
+        def run():
+            try:
+                return self.ctx.cmd_and_log(args, **kwargs)
+            except Error:
+                if cleanup:
+                    cleanup()
+                raise
+
+        return self.retry_policy.run(
+            description='git ' + ' '.join(args[1:]), function=run,
+            is_transient=_is_transient)
+
+
+# Parts of the error messages of git and waf, in lower case, which show that
+# the network failed. Other errors, e.g. an unknown repository or ref or a
+# failed authentication, will fail again if the command is retried.
+TRANSIENT_ERRORS = (
+    'timed out',
+    'timeout',
+    'could not resolve host',
+    'temporary failure in name resolution',
+    'failed to connect',
+    'could not connect',
+    "couldn't connect",
+    'connection refused',
+    'connection reset',
+    'connection closed',
+    'network is unreachable',
+    'the remote end hung up',
+    'early eof',
+    'rpc failed',
+    'unexpected disconnect',
+    'ssl_read',
+    'gnutls',
+    'returned error: 5',
+    'service unavailable',
+    'bad gateway')
+
+
+def _is_transient(error):
+    """ :return: False if retrying a git command will not help, i.e. if the
+        command did not fail because of a timeout or a network error.
+    """
+    if not isinstance(error, Error):
+        return True
+
+    message = str(error).lower()
+
+    return any(part in message for part in TRANSIENT_ERRORS)
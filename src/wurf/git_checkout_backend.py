@@ -0,0 +1,116 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+import os
+import shutil
+import stat
+
+from .directory import copy_directory
+from .resolve_profile import profile_span
+
+
+def _remove_checkout(checkout_path):
+    """ Removes a partially created checkout.
+
+    The checkout_path must be removed if the checkout is not successful, as
+    the folder would be considered a valid checkout when the user configures
+    again.
+    """
+    if not os.path.isdir(checkout_path):
+        return
+
+    def onerror(func, path, exc_info):
+        if not os.access(path, os.W_OK):
+            os.chmod(path, stat.S_IWUSR)
+            func(path)
+        else:
+            raise
+
+    shutil.rmtree(checkout_path, onerror=onerror)
+
+
+class CopyCheckoutBackend(object):
+    """ Creates a checkout by copying the repository.
+
+    The copy includes the object database, so every checkout is a complete
+    and independent git repository.
+    """
+
+    def __init__(self, git, resolve_profile=None):
+        """ Construct an instance.
+
+        :param git: A Git instance
+        :param resolve_profile: A ResolveProfile instance used to record the
+            copies, or None.
+        """
+        self.git = git
+        self.resolve_profile = resolve_profile
+
+    def create(self, repository_path, checkout, checkout_path):
+        """ Creates a checkout of the repository.
+
+        :param repository_path: The path to the repository as a string.
+        :param checkout: The branch, tag, or sha1 as a string.
+        :param checkout_path: The path where the checkout should be created
+            as a string.
+        """
+        try:
+            with profile_span(resolve_profile=self.resolve_profile,
+                              name='copy_directory', category='io',
+                              args={'path': repository_path}):
+
+                copy_directory(path=repository_path, to_path=checkout_path)
+
+            self.git.checkout(branch=checkout, cwd=checkout_path)
+        except Exception:
+            _remove_checkout(checkout_path=checkout_path)
+            # The blank "raise" re-raises the last exception
+            raise
+
+    def __repr__(self):
+        """
+        :return: Representation of this object as a string
+        """
+        return "%s()" % self.__class__.__name__
+
+
+class WorktreeCheckoutBackend(object):
+    """ Creates a checkout using 'git worktree add'.
+
+    All checkouts share the object database of the repository, so only the
+    working tree is written. The checkouts are only valid as long as the
+    repository they were created from exists.
+    """
+
+    def __init__(self, git):
+        """ Construct an instance.
+
+        :param git: A Git instance
+        """
+        self.git = git
+
+    def create(self, repository_path, checkout, checkout_path):
+        """ Creates a checkout of the repository.
+
+        :param repository_path: The path to the repository as a string.
+        :param checkout: The branch, tag, or sha1 as a string.
+        :param checkout_path: The path where the checkout should be created
+            as a string.
+        """
+        # A checkout folder deleted by hand is still registered as a
+        # worktree, which makes 'git worktree add' fail
+        self.git.worktree_prune(cwd=repository_path)
+
+        try:
+            self.git.worktree_add(path=checkout_path, branch=checkout,
+                                  cwd=repository_path)
+        except Exception:
+            _remove_checkout(checkout_path=checkout_path)
+            self.git.worktree_prune(cwd=repository_path)
+            raise
+
+    def __repr__(self):
+        """
+        :return: Representation of this object as a string
+        """
+        return "%s()" % self.__class__.__name__
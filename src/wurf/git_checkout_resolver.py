@@ -3,9 +3,9 @@
 
 import hashlib
 import os
-import shutil
+import re
 
-from .directory import copy_directory
+from .error import Error
 
 
 class GitCheckoutResolver(object):
@@ -13,7 +13,8 @@ class GitCheckoutResolver(object):
     Git Commit Resolver functionality. Checks out a specific commit.
     """
 
-    def __init__(self, git, resolver, ctx, dependency, checkout, cwd):
+    def __init__(self, git, resolver, ctx, dependency, checkout, cwd,
+                 checkout_backend, resolve_stamps):
         """ Construct an instance.
 
         :param git: A WurfGit instance
@@ -23,6 +24,10 @@ class GitCheckoutResolver(object):
         :param checkout: The branch, tag, or sha1 as a string.
         :param cwd: Current working directory as a string. This is the place
             where we should create new folders etc.
+        :param checkout_backend: The backend used to create the checkout
+            folder e.g. a CopyCheckoutBackend instance.
+        :param resolve_stamps: A ResolveStamps instance used to verify
+            checkouts without running git.
         """
         self.git = git
         self.resolver = resolver
@@ -30,13 +35,57 @@ class GitCheckoutResolver(object):
         self.dependency = dependency
         self.checkout = checkout
         self.cwd = cwd
+        self.checkout_backend = checkout_backend
+        self.resolve_stamps = resolve_stamps
 
     def resolve(self):
         """ Fetches the dependency if necessary.
 
         :return: The path to the resolved dependency as a string.
         """
-        path = self.resolver.resolve()
+        path = self.resolver.master_path()
+
+        # Use the path of the master repository to create a unique location
+        # for this checkout
+        repo_hash = hashlib.sha1(path.encode('utf-8')).hexdigest()[:6]
+
+        # The folder for storing the requested checkout
+        folder_name = self.checkout + '-' + repo_hash
+        checkout_path = os.path.join(self.cwd, folder_name)
+
+        # If the checkout was verified by a previous resolve and did not
+        # change since, we are done
+        commit = self.resolve_stamps.verify(
+            checkout_path=checkout_path, dependency=self.dependency,
+            checkout=self.checkout)
+
+        if commit:
+            self.ctx.to_log('wurf: GitCheckoutResolver {} stamp is valid '
+                            '-> {}'.format(self.dependency.name,
+                                           checkout_path))
+
+            self.dependency.current_source = self.resolver.repository_url()
+            self.dependency.git_commit = commit
+
+            return checkout_path
+
+        # A tag or commit already available in the repository cannot change,
+        # so we do not need to fetch anything
+        pinned = os.path.isdir(path) and \
+            self.git.is_pinned(checkout=self.checkout, cwd=path)
+
+        if pinned:
+            self.ctx.to_log('wurf: GitCheckoutResolver {} is pinned to {}, '
+                            'skipping fetch'.format(self.dependency.name,
+                                                    self.checkout))
+
+            self.dependency.current_source = self.resolver.repository_url()
+        else:
+            path = self.resolver.resolve()
+
+            # The repository may be a shallow or single branch clone which
+            # does not contain the checkout
+            self.__fetch_checkout(path=path)
 
         assert os.path.isdir(path)
 
@@ -46,38 +95,17 @@ class GitCheckoutResolver(object):
         if self.git.current_commit(cwd=path) == self.checkout:
             return path
 
-        # Use the path retuned to create a unique location for this checkout
-        repo_hash = hashlib.sha1(path.encode('utf-8')).hexdigest()[:6]
-
-        # The folder for storing the requested checkout
-        folder_name = self.checkout + '-' + repo_hash
-        checkout_path = os.path.join(self.cwd, folder_name)
-
         self.ctx.to_log('wurf: GitCheckoutResolver name {} -> {}'.format(
             self.dependency.name, checkout_path))
 
         # If the folder for the chosen version does not exist,
-        # then copy the master and checkout that version
+        # then create it from the master and checkout that version
         if not os.path.isdir(checkout_path):
-            try:
-                copy_directory(path=path, to_path=checkout_path)
-                self.git.checkout(branch=self.checkout, cwd=checkout_path)
-            except Exception:
-                # The checkout_path must be removed if the checkout is not
-                # successful, as the folder would be considered a valid
-                # checkout when the user configures again
-                def onerror(func, path, exc_info):
-                    import stat
-                    if not os.access(path, os.W_OK):
-                        os.chmod(path, stat.S_IWUSR)
-                        func(path)
-                    else:
-                        raise
-
-                shutil.rmtree(checkout_path, onerror=onerror)
-                # The blank "raise" re-raises the last exception
-                raise
-        else:
+            self.checkout_backend.create(
+                repository_path=path, checkout=self.checkout,
+                checkout_path=checkout_path)
+
+        elif not pinned:
 
             if not self.git.is_detached_head(cwd=checkout_path):
                 # If the checkout is a tag or a commit (we will be in detached
@@ -85,15 +113,82 @@ class GitCheckoutResolver(object):
                 # the pull operation should be executed to update a branch.
                 self.git.pull(cwd=checkout_path)
 
-        # If the project contains submodules, we also get those
+        # If the project contains submodules, we also get those. The
+        # submodules are only updated if they are not checked out at the
+        # commits recorded in the checkout.
         self.git.pull_submodules(cwd=checkout_path)
 
         # Record the commmit id of the current working copy
         self.dependency.git_commit = \
             self.git.current_commit(cwd=checkout_path)
 
+        # The checkout was fetched, so it may be pinned now
+        if pinned or self.git.is_pinned(checkout=self.checkout, cwd=path):
+            self.resolve_stamps.store(
+                checkout_path=checkout_path, dependency=self.dependency,
+                checkout=self.checkout, commit=self.dependency.git_commit)
+
         return checkout_path
 
+    def __fetch_checkout(self, path):
+        """ Fetches the checkout if it is not available in the repository.
+
+        Only the requested tag, branch or commit is fetched. If that is not
+        possible, e.g. because the server does not allow fetching a commit
+        id, all branches and tags are fetched, including the complete
+        history if the repository is shallow.
+
+        :param path: The path to the repository as a string.
+        """
+        if self.__has_checkout(path=path):
+            return
+
+        self.ctx.to_log('wurf: GitCheckoutResolver {} fetching {}'.format(
+            self.dependency.name, self.checkout))
+
+        shallow = self.git.is_shallow(cwd=path)
+        depth = 1 if shallow else None
+
+        if re.match('^[0-9a-f]{40}$', self.checkout):
+            refspecs = [self.checkout]
+        else:
+            refs = self.git.remote_refs(
+                repository='origin', cwd=path,
+                patterns=['refs/tags/' + self.checkout,
+                          'refs/heads/' + self.checkout])
+
+            refspecs = ['+{0}:{1}'.format(
+                ref, ref.replace('refs/heads/', 'refs/remotes/origin/'))
+                for ref in refs]
+
+        for refspec in refspecs:
+            try:
+                if refspec.startswith('+refs/heads/'):
+                    self.git.add_remote_branch(
+                        branch=self.checkout, cwd=path)
+
+                # If the ref cannot be fetched, all refs are fetched below
+                self.git.fetch_ref(refspec=refspec, cwd=path, depth=depth,
+                                   retry=False)
+            except Error as e:
+                self.ctx.to_log('Exception when fetching {}:'.format(
+                    refspec))
+                self.ctx.to_log(e)
+
+            if self.__has_checkout(path=path):
+                return
+
+        self.git.fetch_all(cwd=path, unshallow=shallow)
+
+    def __has_checkout(self, path):
+        """ :return: True if the tag, branch or commit is available in
+            the repository.
+        """
+        if self.git.has_commit(ref=self.checkout, cwd=path):
+            return True
+
+        return self.git.has_commit(ref='origin/' + self.checkout, cwd=path)
+
     def __repr__(self):
         """
         :return: Representation of this object as a string
@@ -0,0 +1,290 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+import os
+import re
+
+
+class GitInspector(object):
+    """ Answers read-only queries about a git repository without running git.
+
+    The HEAD, the loose refs, the packed-refs file and the .git/config file
+    are read directly. This avoids starting a git process for every query,
+    which is noticeable when configuring a project with many dependencies.
+
+    Queries the GitInspector cannot answer (e.g. if the repository uses an
+    unknown layout) are answered by running git. All other attributes, such
+    as clone(...) or pull(...), are forwarded to the Git instance, so a
+    GitInspector can be used in place of a Git instance.
+    """
+
+    def __init__(self, git):
+        """ Construct an instance.
+
+        :param git: A Git instance
+        """
+        self.git = git
+
+    def current_commit(self, cwd):
+        """ Returns the commit id (SHA1) currently checked out in cwd. """
+        commit = self.__resolve_ref(cwd=cwd, ref='HEAD')
+
+        if commit is None:
+            return self.git.current_commit(cwd=cwd)
+
+        return commit
+
+    def current_branch(self, cwd):
+        """ Returns the branch currently checked out in cwd.
+
+        In detached HEAD state the branch has the same format as printed by
+        'git branch' e.g. "(HEAD detached at 6ad5d5b)".
+        """
+        head = self.__read_head(cwd=cwd)
+
+        if head is None:
+            return self.git.current_branch(cwd=cwd)
+
+        if head.startswith('ref: refs/heads/'):
+            return head[len('ref: refs/heads/'):]
+
+        if re.match('^[0-9a-f]{40}$', head):
+            return '(HEAD detached at {})'.format(head[:7])
+
+        return self.git.current_branch(cwd=cwd)
+
+    def is_detached_head(self, cwd):
+        """ Checks if the repository in cwd is in detached HEAD state. """
+        head = self.__read_head(cwd=cwd)
+
+        if head is None:
+            return self.git.is_detached_head(cwd=cwd)
+
+        return not head.startswith('ref: ')
+
+    def tags(self, cwd):
+        """ Returns the tags in the repository in cwd. """
+        refs = self.__read_refs(cwd=cwd, prefix='refs/tags/')
+
+        if refs is None:
+            return self.git.tags(cwd=cwd)
+
+        return sorted(ref[len('refs/tags/'):] for ref in refs)
+
+    def is_pinned(self, checkout, cwd):
+        """ Checks if the checkout is a tag or a full commit id (SHA1) already
+        available in the repository in cwd. See Git.is_pinned(...).
+        """
+        if re.match('^[0-9a-f]{40}$', checkout):
+
+            git_dir, common_dir = self.__git_dirs(cwd=cwd)
+
+            if common_dir is not None:
+                object_path = os.path.join(
+                    common_dir, 'objects', checkout[:2], checkout[2:])
+
+                if os.path.isfile(object_path):
+                    return True
+
+            # The object may be in a pack file
+            return self.git.is_pinned(checkout=checkout, cwd=cwd)
+
+        refs = self.__read_refs(cwd=cwd, prefix='refs/tags/')
+
+        if refs is None:
+            return self.git.is_pinned(checkout=checkout, cwd=cwd)
+
+        return 'refs/tags/' + checkout in refs
+
+    def remote_origin_url(self, cwd):
+        """ Returns the URL of the origin remote of the repository in cwd. """
+        git_dir, common_dir = self.__git_dirs(cwd=cwd)
+
+        if common_dir is None:
+            return self.git.remote_origin_url(cwd=cwd)
+
+        config_path = os.path.join(common_dir, 'config')
+
+        if not os.path.isfile(config_path):
+            return self.git.remote_origin_url(cwd=cwd)
+
+        section = None
+
+        with open(config_path, 'r') as config_file:
+            for line in config_file:
+
+                line = line.strip()
+
+                match = re.match(r'^\[\s*([^\]"\s]+)(?:\s+"(.*)")?\s*\]', line)
+
+                if match:
+                    section = (match.group(1).lower(), match.group(2))
+                    continue
+
+                if section != ('remote', 'origin'):
+                    continue
+
+                match = re.match(r'^url\s*=\s*(.*)$', line, re.IGNORECASE)
+
+                if match:
+                    return match.group(1).strip().strip('"')
+
+        # The url may be defined in an included file
+        return self.git.remote_origin_url(cwd=cwd)
+
+    def __git_dirs(self, cwd):
+        """ Finds the git directory of the repository in cwd.
+
+        :return: A tuple (git_dir, common_dir) where git_dir contains the
+            HEAD and common_dir contains the refs and objects. The folders
+            differ for a working tree created with 'git worktree add'. If the
+            folders cannot be found (None, None) is returned.
+        """
+        git_dir = os.path.join(cwd, '.git')
+
+        if os.path.isfile(git_dir):
+
+            # Submodules and working trees contain a .git file with the
+            # path to the git directory e.g. "gitdir: ../.git/modules/foo"
+            with open(git_dir, 'r') as git_file:
+                content = git_file.read().strip()
+
+            if not content.startswith('gitdir: '):
+                return None, None
+
+            git_dir = os.path.join(cwd, content[len('gitdir: '):])
+
+        if not os.path.isdir(git_dir):
+            return None, None
+
+        common_dir = git_dir
+        common_path = os.path.join(git_dir, 'commondir')
+
+        if os.path.isfile(common_path):
+            with open(common_path, 'r') as common_file:
+                common_dir = os.path.join(git_dir, common_file.read().strip())
+
+        # The refs of repositories using the reftable format are stored in
+        # a binary format
+        if os.path.isdir(os.path.join(common_dir, 'reftable')):
+            return None, None
+
+        return os.path.normpath(git_dir), os.path.normpath(common_dir)
+
+    def __read_head(self, cwd):
+        """ :return: The content of the HEAD file or None. """
+        git_dir, _ = self.__git_dirs(cwd=cwd)
+
+        if git_dir is None:
+            return None
+
+        head_path = os.path.join(git_dir, 'HEAD')
+
+        if not os.path.isfile(head_path):
+            return None
+
+        with open(head_path, 'r') as head_file:
+            return head_file.read().strip()
+
+    def __resolve_ref(self, cwd, ref):
+        """ Resolves a ref e.g. 'HEAD' or 'refs/heads/master' to a commit id.
+
+        :return: The commit id as a string or None if the ref could not be
+            resolved.
+        """
+        git_dir, common_dir = self.__git_dirs(cwd=cwd)
+
+        if git_dir is None:
+            return None
+
+        # Symbolic refs may point to other symbolic refs, but git limits
+        # the depth to 5
+        for _ in range(5):
+
+            value = None
+
+            for folder in (git_dir, common_dir):
+                ref_path = os.path.join(folder, ref)
+
+                if os.path.isfile(ref_path):
+                    with open(ref_path, 'r') as ref_file:
+                        value = ref_file.read().strip()
+                    break
+
+            if value is None:
+                value = self.__packed_refs(common_dir=common_dir).get(ref)
+
+            if value is None:
+                return None
+
+            if value.startswith('ref: '):
+                ref = value[len('ref: '):]
+                continue
+
+            if re.match('^[0-9a-f]{40}$', value):
+                return value
+
+            return None
+
+        return None
+
+    def __read_refs(self, cwd, prefix):
+        """ Finds the refs starting with prefix, e.g. 'refs/tags/'.
+
+        :return: A set containing the names of the refs or None if the refs
+            could not be read.
+        """
+        git_dir, common_dir = self.__git_dirs(cwd=cwd)
+
+        if common_dir is None:
+            return None
+
+        refs = set(ref for ref in self.__packed_refs(common_dir=common_dir)
+                   if ref.startswith(prefix))
+
+        refs_path = os.path.join(common_dir, *prefix.split('/'))
+
+        for root, _, files in os.walk(refs_path):
+            for filename in files:
+                path = os.path.join(root, filename)
+                ref = os.path.relpath(path, common_dir).replace(os.sep, '/')
+                refs.add(ref)
+
+        return refs
+
+    def __packed_refs(self, common_dir):
+        """ Reads the packed-refs file.
+
+        :return: A dict mapping the refs to the commit ids.
+        """
+        packed_path = os.path.join(common_dir, 'packed-refs')
+
+        refs = {}
+
+        if not os.path.isfile(packed_path):
+            return refs
+
+        with open(packed_path, 'r') as packed_file:
+            for line in packed_file:
+
+                # Comments start with '#' and the commit pointed to by
+                # the previous annotated tag starts with '^'
+                if line.startswith('#') or line.startswith('^'):
+                    continue
+
+                values = line.split()
+
+                if len(values) == 2:
+                    refs[values[1]] = values[0]
+
+        return refs
+
+    def __getattr__(self, name):
+        """ Forward all other attributes to the Git instance. """
+        return getattr(self.git, name)
+
+    def __repr__(self):
+        """
+        :return: Representation of this object as a string
+        """
+        return "%s(git=%r)" % (self.__class__.__name__, self.git)
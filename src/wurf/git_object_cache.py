@@ -0,0 +1,127 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+import os
+import shutil
+import hashlib
+import threading
+
+from .error import Error
+
+
+class GitObjectCache(object):
+    """ Machine-wide cache of git objects shared between projects.
+
+    For every repository URL the cache contains a bare mirror. New clones
+    borrow objects from the mirror using 'git clone --reference', so only the
+    objects missing from the mirror are downloaded and stored in the clone.
+
+    The cache may be shared by several projects and waf processes. The
+    mirrors are never pruned or garbage collected, since the clones
+    reference the objects in them. A clone whose mirror was deleted is
+    cloned again by the GitResolver.
+    """
+
+    def __init__(self, git, ctx, cache_path):
+        """ Construct an instance.
+
+        :param git: A Git instance
+        :param ctx: A Waf Context instance.
+        :param cache_path: The folder containing the mirrors as a string.
+        """
+        self.git = git
+        self.ctx = ctx
+        self.cache_path = cache_path
+
+        # The mirrors already updated by this process
+        self.updated = set()
+
+        # Mirrors may be requested from resolves running in parallel. We
+        # use a lock per mirror, such that different mirrors can be
+        # updated at the same time.
+        self.lock = threading.Lock()
+        self.mirror_locks = {}
+
+    def mirror(self, repository):
+        """ Returns an up-to-date mirror of the repository.
+
+        The mirror is cloned if needed, otherwise it is fetched once per
+        process.
+
+        :param repository: The URL of the repository as a string.
+        :return: The path to the mirror as a string.
+        """
+        # Use the SHA1 hash of the repository url to uniquely identify the
+        # mirror
+        repo_hash = hashlib.sha1(repository.encode('utf-8')).hexdigest()
+        mirror_path = os.path.join(self.cache_path, repo_hash + '.git')
+
+        with self.lock:
+            mirror_lock = self.mirror_locks.setdefault(
+                mirror_path, threading.Lock())
+
+        with mirror_lock:
+
+            if mirror_path in self.updated:
+                return mirror_path
+
+            if not os.path.isdir(mirror_path):
+                self.__clone(repository=repository, mirror_path=mirror_path)
+            else:
+                try:
+                    self.git.fetch(cwd=mirror_path)
+                except Error as e:
+                    # The mirror is still a valid reference, the objects
+                    # missing from it will be downloaded by the clone
+                    self.ctx.to_log('Exception when updating the mirror:')
+                    self.ctx.to_log(e)
+
+            self.updated.add(mirror_path)
+
+        return mirror_path
+
+    def is_referenced(self, path):
+        """ Checks if a repository borrows objects from another repository,
+        i.e. if it was cloned with a reference.
+
+        :param path: The path to the repository as a string.
+        :return: True if the repository uses an alternate object store.
+        """
+        return os.path.isfile(os.path.join(
+            path, '.git', 'objects', 'info', 'alternates'))
+
+    def __clone(self, repository, mirror_path):
+        """ Clones the mirror.
+
+        The mirror is cloned to a temporary folder and then renamed. This
+        ensures that other processes never see a partial mirror.
+        """
+        temporary_path = '{}.{}.tmp'.format(mirror_path, os.getpid())
+
+        if os.path.isdir(temporary_path):
+            shutil.rmtree(temporary_path)
+
+        self.git.clone_mirror(
+            repository=repository,
+            directory=os.path.basename(temporary_path),
+            cwd=self.cache_path)
+
+        try:
+            os.rename(temporary_path, mirror_path)
+        except OSError:
+            # Another process created the mirror while we were cloning
+            shutil.rmtree(temporary_path)
+
+            if not os.path.isdir(mirror_path):
+                raise Error('Could not create git mirror {}'.format(
+                    mirror_path))
+
+        self.ctx.to_log('wurf: GitObjectCache {} -> {}'.format(
+            repository, mirror_path))
+
+    def __repr__(self):
+        """
+        :return: Representation of this object as a string
+        """
+        return "%s(cache_path=%r)" % (self.__class__.__name__,
+                                      self.cache_path)
@@ -2,15 +2,41 @@
 # encoding: utf-8
 
 import os
+import shutil
 import hashlib
 
 
 class GitResolver(object):
     """
     Base Git Resolver functionality. Clones/pulls a git repository.
+
+    The clone strategy selects how much of the repository is cloned:
+
+    - 'full' clones the complete history.
+    - 'shallow' only clones the newest commit of the default branch, or of
+      the branch or tag which is cloned.
+    - 'blobless' clones the complete history, but the file contents are
+      only downloaded when they are checked out.
+    - 'single_branch' clones the history of the default branch.
+
+    If no clone strategy is selected, the repository is cloned with the
+    default strategy passed to clone(...), e.g. the GitSemverResolver clones
+    a single tag shallowly.
+
+    Tags, branches and commits missing from the clone are fetched when they
+    are checked out, see GitCheckoutResolver.
     """
 
-    def __init__(self, git, ctx, dependency, git_url_rewriter, source, cwd):
+    # The arguments passed to Git.clone(...) for each clone strategy
+    CLONE_STRATEGIES = {
+        'full': {},
+        'shallow': {'depth': 1},
+        'blobless': {'filter_spec': 'blob:none'},
+        'single_branch': {'single_branch': True}}
+
+    def __init__(self, git, ctx, dependency, git_url_rewriter, source, cwd,
+                 fetched_repositories, git_object_cache=None,
+                 clone_strategy=None, source_race=None):
 
         """ Construct a new WurfGitResolver instance.
 
@@ -21,13 +47,50 @@ class GitResolver(object):
         :param source: The URL of the dependency as a string
         :param cwd: Current working directory as a string. This is the place
             where we should create new folders etc.
+        :param fetched_repositories: A set containing the paths of the
+            repositories already cloned or pulled during this resolve. These
+            are not pulled again.
+        :param git_object_cache: A GitObjectCache instance or None. If
+            specified new clones will borrow objects from the cache.
+        :param clone_strategy: The clone strategy as a string, one of the
+            keys in CLONE_STRATEGIES, or None if no strategy was selected.
+        :param source_race: The SourceRace of the dependency, which is
+            told before the repository is cloned or pulled, or None.
         """
+        assert clone_strategy is None or \
+            clone_strategy in self.CLONE_STRATEGIES
+
         self.git = git
         self.ctx = ctx
         self.dependency = dependency
         self.git_url_rewriter = git_url_rewriter
         self.source = source
         self.cwd = cwd
+        self.fetched_repositories = fetched_repositories
+        self.git_object_cache = git_object_cache
+        self.clone_strategy = clone_strategy
+        self.source_race = source_race
+
+    def repository_url(self):
+        """
+        :return: The URL of the repository after rewriting as a string.
+        """
+        return self.git_url_rewriter.rewrite_url(self.source)
+
+    def master_path(self):
+        """
+        :return: The path where the repository is cloned as a string. The
+            path may not exist yet.
+        """
+        repo_url = self.repository_url()
+
+        # Use the first 6 characters of the SHA1 hash of the repository url
+        # to uniquely identify the repository
+        repo_hash = hashlib.sha1(repo_url.encode('utf-8')).hexdigest()[:6]
+
+        # The folder for storing the master branch of this repository
+        folder_name = 'master-' + repo_hash
+        return os.path.join(self.cwd, folder_name)
 
     def resolve(self):
         """
@@ -35,32 +98,51 @@ class GitResolver(object):
 
         :return: The path to the resolved dependency as a string.
         """
-        repo_url = self.git_url_rewriter.rewrite_url(self.source)
+        repo_url = self.repository_url()
 
         # Store the current source in the dependency object
         self.dependency.current_source = repo_url
 
-        # Use the first 6 characters of the SHA1 hash of the repository url
-        # to uniquely identify the repository
-        repo_hash = hashlib.sha1(repo_url.encode('utf-8')).hexdigest()[:6]
+        master_path = self.master_path()
+        folder_name = os.path.basename(master_path)
 
-        # The folder for storing the master branch of this repository
-        folder_name = 'master-' + repo_hash
-        master_path = os.path.join(self.cwd, folder_name)
+        if master_path in self.fetched_repositories:
+            # The repository was already updated during this resolve, e.g.
+            # when the dependency graph was discovered
+            return master_path
+
+        if self.source_race:
+            self.source_race.fetch(source=self.source)
+
+        if os.path.isdir(master_path):
+            # A clone which borrowed objects from a deleted git object cache
+            # cannot be used, it is cloned again
+            missing = self.git.missing_alternates(cwd=master_path)
+
+            if missing:
+                self.ctx.to_log('wurf: GitResolver removing {}, missing '
+                                'alternates {}'.format(master_path, missing))
+                shutil.rmtree(master_path)
 
         # If the master folder does not exist, do a git clone first
         if not os.path.isdir(master_path):
-            self.git.clone(repository=repo_url, directory=folder_name,
-                           cwd=self.cwd)
+            self.clone(directory=folder_name)
         else:
             # We only want to pull if we haven't just cloned. This avoids
             # having to type in the username and password twice when using
             # https as a git protocol.
             try:
+                # Update the mirror first, then the pull only moves the
+                # objects from the remote which are not in the mirror
+                if self.git_object_cache and \
+                        self.git_object_cache.is_referenced(path=master_path):
+                    self.git_object_cache.mirror(repository=repo_url)
+
                 # git pull will fail if the repository is unavailable
                 # This is not a problem if we have already downloaded
-                # the required version for this dependency
-                self.git.pull(cwd=master_path)
+                # the required version for this dependency, so the pull is
+                # not retried
+                self.git.pull(cwd=master_path, retry=False)
             except Exception as e:
                 self.ctx.to_log('Exception when executing git pull:')
                 self.ctx.to_log(e)
@@ -70,8 +152,37 @@ class GitResolver(object):
         # If the project contains submodules we also get those
         self.git.pull_submodules(cwd=master_path)
 
+        self.fetched_repositories.add(master_path)
+
         return master_path
 
+    def clone(self, directory, branch=None, default_strategy='full'):
+        """ Clones the repository using the clone strategy. If the git object
+        cache is used, the objects are borrowed from its mirror.
+
+        :param directory: The name of the folder to clone into, in the
+            current working directory, as a string.
+        :param branch: If specified, the branch or tag is checked out
+            instead of the remote HEAD.
+        :param default_strategy: The clone strategy used if no strategy
+            was selected, one of the keys in CLONE_STRATEGIES.
+        """
+        repo_url = self.repository_url()
+
+        reference = None
+
+        if self.git_object_cache:
+            reference = self.git_object_cache.mirror(repository=repo_url)
+
+        strategy = self.clone_strategy or default_strategy
+        kwargs = dict(self.CLONE_STRATEGIES[strategy])
+
+        if branch:
+            kwargs['branch'] = branch
+
+        self.git.clone(repository=repo_url, directory=directory,
+                       cwd=self.cwd, reference=reference, **kwargs)
+
     def __repr__(self):
         """
         :return: Representation of this object as a string
@@ -6,6 +6,7 @@ import shutil
 import hashlib
 
 from .error import DependencyError
+from .error import Error
 
 
 class GitSemverResolver(object):
@@ -16,7 +17,8 @@ class GitSemverResolver(object):
     """
 
     def __init__(self, git, resolver, ctx, semver_selector,
-                 dependency, cwd):
+                 dependency, cwd, checkout_backend, resolve_stamps,
+                 refresh_tags=False, source_race=None):
         """ Construct an instance.
 
         :param git: A WurfGit instance
@@ -26,6 +28,15 @@ class GitSemverResolver(object):
         :param dependency: The dependency instance.
         :param cwd: Current working directory as a string. This is the place
             where we should create new folders etc.
+        :param checkout_backend: The backend used to create the checkout
+            folder e.g. a CopyCheckoutBackend instance.
+        :param resolve_stamps: A ResolveStamps instance used to verify
+            checkouts without running git.
+        :param refresh_tags: If True the remote tags are always listed,
+            otherwise the tag checked out by a previous resolve is used if
+            its stamp is valid.
+        :param source_race: The SourceRace of the dependency, which is
+            told before the remote tags are listed, or None.
         """
         self.git = git
         self.git_resolver = resolver
@@ -33,48 +44,242 @@ class GitSemverResolver(object):
         self.semver_selector = semver_selector
         self.dependency = dependency
         self.cwd = cwd
+        self.checkout_backend = checkout_backend
+        self.resolve_stamps = resolve_stamps
+        self.refresh_tags = refresh_tags
+        self.source_race = source_race
 
     def resolve(self):
         """ Fetches the dependency if necessary.
+
+        If the tag checked out by a previous resolve has a valid stamp, it
+        is used without contacting the remote, unless the tags should be
+        refreshed. Otherwise the tags are listed using 'git ls-remote' such
+        that we can select the tag before anything is cloned. Only the
+        selected tag is then cloned, using the clone strategy of the
+        GitResolver. If the remote is unavailable we fall back to the tags in
+        the cloned repository.
+
+        :return: The path to the resolved dependency as a string.
+        """
+        repo_url = self.git_resolver.repository_url()
+
+        if not self.refresh_tags:
+            path = self.__resolve_stamped()
+
+            if path:
+                self.dependency.current_source = repo_url
+                return path
+
+        if self.source_race:
+            self.source_race.fetch(source=self.git_resolver.source)
+
+        try:
+            # The tags in the cloned repository are used if the remote is
+            # unavailable, so the command is not retried
+            tags = self.git.remote_tags(repository=repo_url, retry=False)
+        except Error as e:
+            self.ctx.to_log('Exception when listing the remote tags:')
+            self.ctx.to_log(e)
+
+            return self.__resolve_clone()
+
+        # Store the current source in the dependency object
+        self.dependency.current_source = repo_url
+
+        tag = self.__select_tag(tags=tags)
+        master_path = self.git_resolver.master_path()
+        tag_path = self.__tag_path(path=master_path, tag=tag)
+
+        self.__remove_broken(tag_path=tag_path)
+
+        if os.path.isdir(tag_path):
+
+            commit = self.resolve_stamps.verify(
+                checkout_path=tag_path, dependency=self.dependency,
+                checkout=tag)
+
+            if commit:
+                self.dependency.git_commit = commit
+                self.dependency.git_tag = tag
+                return tag_path
+
+            # The submodules of an existing checkout are only updated if a
+            # previous update did not complete
+            self.git.pull_submodules(cwd=tag_path)
+
+            return self.__finish(tag_path=tag_path, tag=tag)
+
+        if os.path.isdir(master_path) and \
+                self.git.is_pinned(checkout=tag, cwd=master_path):
+
+            self.checkout_backend.create(
+                repository_path=master_path, checkout=tag,
+                checkout_path=tag_path)
+        else:
+
+            # Only the tag is checked out, so unless a clone strategy was
+            # selected only the tagged commit is fetched
+            self.git_resolver.clone(directory=os.path.basename(tag_path),
+                                    branch=tag, default_strategy='shallow')
+
+        # If the project contains submodules, we also get those
+        self.git.pull_submodules(cwd=tag_path)
+
+        return self.__finish(tag_path=tag_path, tag=tag)
+
+    def __resolve_stamped(self):
+        """ Resolves the newest compatible tag checked out by a previous
+        resolve, if its stamp is valid.
+
+        :return: The path to the resolved dependency as a string, or None.
+        """
+        master_path = self.git_resolver.master_path()
+
+        # The checkout folders of this repository end with the same hash
+        suffix = '-' + self.__repo_hash(path=master_path)
+
+        tags = [name[:-len(suffix)] for name in
+                self.resolve_stamps.checkouts(cwd=self.cwd)
+                if name.endswith(suffix) and len(name) > len(suffix)]
+
+        if not tags:
+            return None
+
+        tag = self.semver_selector.select_tag(
+            major=self.dependency.major, tags=tags,
+            minor=self.dependency.minor)
+
+        if not tag:
+            return None
+
+        tag_path = self.__tag_path(path=master_path, tag=tag)
+
+        self.__remove_broken(tag_path=tag_path)
+
+        commit = self.resolve_stamps.verify(
+            checkout_path=tag_path, dependency=self.dependency,
+            checkout=tag)
+
+        if not commit:
+            return None
+
+        self.ctx.to_log('wurf: GitSemverResolver {} stamp of {} is valid '
+                        '-> {}'.format(self.dependency.name, tag, tag_path))
+
+        self.dependency.git_commit = commit
+        self.dependency.git_tag = tag
+
+        return tag_path
+
+    def __remove_broken(self, tag_path):
+        """ Removes a checkout which borrowed objects from a deleted git
+        object cache, such that the tag is cloned again.
+
+        :param tag_path: The path to the checkout of the tag as a string.
+        """
+        if not os.path.isdir(tag_path):
+            return
+
+        missing = self.git.missing_alternates(cwd=tag_path)
+
+        if missing:
+            self.ctx.to_log('wurf: GitSemverResolver removing {}, missing '
+                            'alternates {}'.format(tag_path, missing))
+            shutil.rmtree(tag_path)
+
+    def __resolve_clone(self):
+        """ Resolves the dependency using the tags in the cloned repository.
+
         :return: The path to the resolved dependency as a string.
         """
         path = self.git_resolver.resolve()
 
         assert os.path.isdir(path)
 
-        tags = self.git.tags(cwd=path)
+        self.__fetch_tags(path=path)
+
+        tag = self.__select_tag(tags=self.git.tags(cwd=path))
+        tag_path = self.__tag_path(path=path, tag=tag)
+
+        # If the folder for the chosen tag does not exist,
+        # then create it from the master and checkout the tag
+        if not os.path.isdir(tag_path):
+            self.checkout_backend.create(
+                repository_path=path, checkout=tag, checkout_path=tag_path)
+
+        # If the project contains submodules, we also get those
+        self.git.pull_submodules(cwd=tag_path)
+
+        return self.__finish(tag_path=tag_path, tag=tag)
+
+    def __fetch_tags(self, path):
+        """ Fetches the tags missing from a shallow or single branch clone.
+
+        :param path: The path to the repository as a string.
+        """
+        shallow = self.git.is_shallow(cwd=path)
+
+        if not shallow and \
+                self.git_resolver.clone_strategy != 'single_branch':
+            return
+
+        try:
+            # The remote was not available when the tags were listed, so
+            # the fetch is not retried. We fall back to the tags already
+            # in the repository.
+            self.git.fetch_tags(cwd=path, depth=1 if shallow else None,
+                                retry=False)
+        except Error as e:
+            self.ctx.to_log('Exception when fetching the tags:')
+            self.ctx.to_log(e)
+
+    def __select_tag(self, tags):
+
         tag = self.semver_selector.select_tag(
-            major=self.dependency.major, tags=tags)
+            major=self.dependency.major, tags=tags,
+            minor=self.dependency.minor)
 
         if not tag:
+            version = self.dependency.major
+
+            if self.dependency.minor is not None:
+                version = "{}.{}".format(version, self.dependency.minor)
+
             raise DependencyError(
-                msg="No tag found for major version {}, candidates "
-                    "were {}".format(self.dependency.major, tags),
+                msg="No tag found for version {}, candidates "
+                    "were {}".format(version, tags),
                 dependency=self.dependency)
 
-        # Use the path retuned to create a unique location for this checkout
-        repo_hash = hashlib.sha1(path.encode('utf-8')).hexdigest()[:6]
+        return tag
+
+    def __repo_hash(self, path):
+
+        # Use the path of the master repository to create a unique location
+        # for this checkout
+        return hashlib.sha1(path.encode('utf-8')).hexdigest()[:6]
+
+    def __tag_path(self, path, tag):
 
         # The folder for storing the requested tag
-        folder_name = tag + '-' + repo_hash
+        folder_name = tag + '-' + self.__repo_hash(path=path)
         tag_path = os.path.join(self.cwd, folder_name)
 
         self.ctx.to_log('wurf: GitSemverResolver name {} -> {}'.format(
             self.dependency.name, tag_path))
 
-        # If the folder for the chosen tag does not exist,
-        # then copy the master and checkout the tag
-        if not os.path.isdir(tag_path):
-            shutil.copytree(src=path, dst=tag_path, symlinks=True)
-            self.git.checkout(branch=tag, cwd=tag_path)
+        return tag_path
 
-        # If the project contains submodules, we also get those
-        self.git.pull_submodules(cwd=tag_path)
+    def __finish(self, tag_path, tag):
 
         # Record the commmit id of the current working copy
         self.dependency.git_commit = self.git.current_commit(cwd=tag_path)
         self.dependency.git_tag = tag
 
+        self.resolve_stamps.store(
+            checkout_path=tag_path, dependency=self.dependency, checkout=tag,
+            commit=self.dependency.git_commit)
+
         return tag_path
 
     def __repr__(self):
@@ -10,7 +10,8 @@ class HttpResolver(object):
     Http Resolver functionality. Downloads a file.
     """
 
-    def __init__(self, url_download, dependency, source, cwd):
+    def __init__(self, url_download, dependency, source, cwd,
+                 download_cache=None, source_race=None):
 
         """ Construct a new instance.
 
@@ -19,11 +20,18 @@ class HttpResolver(object):
         :param source: The URL of the dependency as a string
         :param cwd: Current working directory as a string. This is the place
             where we should create new folders etc.
+        :param download_cache: A DownloadCache instance or None. If the
+            dependency specifies a sha256 digest, the file is taken from the
+            cache if possible, and downloaded files are added to the cache.
+        :param source_race: The SourceRace of the dependency, which is
+            told before the file is downloaded, or None.
         """
         self.url_download = url_download
         self.dependency = dependency
         self.source = source
         self.cwd = cwd
+        self.download_cache = download_cache
+        self.source_race = source_race
 
     def resolve(self):
         """
@@ -50,9 +58,32 @@ class HttpResolver(object):
         else:
             filename = None
 
-        file_path = self.url_download.download(
-            cwd=folder_path, source=self.source, filename=filename)
+        sha256 = self.dependency.sha256
+
+        if sha256 and self.download_cache:
+
+            # The file is identified by its content, so we do not have to
+            # download it again if it is already in the cache
+            file_path = self.download_cache.link(
+                sha256=sha256, folder_path=folder_path, filename=filename)
+
+            if file_path:
+                return file_path
+
+        if self.source_race:
+            self.source_race.fetch(source=self.source)
+
+        # The download runs in the pool of concurrent downloads, which
+        # bounds the number of downloads when resolving in parallel
+        job = self.url_download.submit(
+            cwd=folder_path, source=self.source, filename=filename,
+            sha256=sha256)
+
+        file_path = job.result()
 
         assert os.path.isfile(file_path), "We should have a valid path here!"
 
+        if sha256 and self.download_cache:
+            self.download_cache.add(path=file_path, sha256=sha256)
+
         return file_path
@@ -2,28 +2,28 @@
 # encoding: utf-8
 
 import os
-import json
 
 from .error import DependencyError
 
 
 class OnPassiveLoadPathResolver(object):
 
-    def __init__(self, dependency, resolve_config_path):
+    def __init__(self, dependency, resolve_manifest):
         """ Construct an instance.
 
         :param dependency: A Dependency instance.
-        :param resolve_config_path: A string containing the path to where the
-            dependencies config json files should be / is stored.
+        :param resolve_manifest: A ResolveManifest instance where the
+            resolved path is stored.
         """
         self.dependency = dependency
-        self.resolve_config_path = resolve_config_path
+        self.resolve_manifest = resolve_manifest
 
     def resolve(self):
         """ Resolve a path to a dependency.
 
         If we are doing an "passive" resolver, meaning that waf was not invoked
-        with configure. Then we load the resolved path to the file-system.
+        with configure. Then we load the resolved path from the resolve
+        manifest.
         Otherwise we raise an exception.
 
         :return: The path as a string.
@@ -38,6 +38,9 @@ class OnPassiveLoadPathResolver(object):
             self.dependency.is_symlink = config['is_symlink']
             self.dependency.real_path = str(config['real_path'])
 
+        if config.get('commit'):
+            self.dependency.git_commit = str(config['commit'])
+
         path = str(config['path'])
 
         if not (os.path.isdir(path) or os.path.isfile(path)):
@@ -47,15 +50,13 @@ class OnPassiveLoadPathResolver(object):
         return path
 
     def __read_config(self):
-        """ Read the dependency config from file
+        """ Read the dependency config from the resolve manifest
         """
 
-        config_path = os.path.join(
-            self.resolve_config_path, self.dependency.name + '.resolve.json')
+        config = self.resolve_manifest.dependency(name=self.dependency.name)
 
-        if not os.path.isfile(config_path):
+        if config is None:
             raise DependencyError('No config - re-run configure',
                                   self.dependency)
 
-        with open(config_path, 'r') as config_file:
-            return json.load(config_file)
+        return config
@@ -14,7 +14,27 @@ class Options(object):
         self.parser = parser
 
         self.known_args = {}
-        self.unknown_args = []
+
+        # The arguments not recognized by the parser. The arguments consumed
+        # by the dependency options are removed, see unknown_args.
+        self.__unknown_args = []
+
+        # Dict mapping the options in the unknown arguments to a tuple
+        # (value, indices), where indices are the positions of the option and
+        # value in the unknown arguments. See __tokenize().
+        self.__tokens = {}
+
+        # The options in the unknown arguments whose value was given as the
+        # following argument e.g. '--foo_path /tmp/foo'
+        self.__separate_values = set()
+
+        # The resolve options parsed from the arguments, without the
+        # dependency options added later
+        self.__parsed_args = {}
+
+        # Set of the positions in the unknown arguments which are consumed
+        # by the dependency options
+        self.__consumed = set()
 
         def non_empty_string(value):
             if not value:
@@ -22,6 +42,39 @@ class Options(object):
                     "Empty string is not allowed.")
             return value
 
+        def positive_int(value):
+            try:
+                value = int(value)
+            except ValueError:
+                raise argparse.ArgumentTypeError(
+                    "Invalid int value: '{}'".format(value))
+            if value < 1:
+                raise argparse.ArgumentTypeError(
+                    "The value must be at least 1.")
+            return value
+
+        def non_negative_int(value):
+            try:
+                value = int(value)
+            except ValueError:
+                raise argparse.ArgumentTypeError(
+                    "Invalid int value: '{}'".format(value))
+            if value < 0:
+                raise argparse.ArgumentTypeError(
+                    "The value must not be negative.")
+            return value
+
+        def positive_float(value):
+            try:
+                value = float(value)
+            except ValueError:
+                raise argparse.ArgumentTypeError(
+                    "Invalid float value: '{}'".format(value))
+            if value <= 0:
+                raise argparse.ArgumentTypeError(
+                    "The value must be greater than 0.")
+            return value
+
         self.parser.add_argument(
             '--resolve_path',
             dest='--resolve_path',
@@ -53,6 +106,20 @@ class Options(object):
                  'Useful for running configure without resolving dependencies '
                  'again.')
 
+        self.parser.add_argument(
+            '--race_sources',
+            dest='--race_sources',
+            action='store_true', default=False,
+            help='Probe the two best ranked sources of a dependency at the '
+                 'same time and resolve from the first to answer.')
+
+        self.parser.add_argument(
+            '--force_resolve',
+            dest='--force_resolve',
+            action='store_true', default=False,
+            help='Resolve all dependencies again, even if the resolve inputs '
+                 'did not change since the last configure.')
+
         self.parser.add_argument(
             '--lock_paths',
             dest='--lock_paths',
@@ -67,6 +134,129 @@ class Options(object):
             help='Creates the resolve_lock_versions directory which contains '
                  'the specific versions of all resolved dependencies.')
 
+        self.parser.add_argument(
+            '--git_object_cache',
+            dest='--git_object_cache',
+            default=None,
+            type=non_empty_string,
+            help='Folder with git mirrors shared between projects, e.g. '
+                 '~/.cache/wurf/git. New clones will only download the '
+                 'objects missing from the mirror. The clones borrow the '
+                 'objects in the mirrors, if the folder is deleted they are '
+                 'cloned again.')
+
+        self.parser.add_argument(
+            '--download_cache',
+            dest='--download_cache',
+            default=None,
+            type=non_empty_string,
+            help='Folder with the files downloaded by the http resolver, '
+                 'e.g. ~/.cache/wurf/downloads. Files with a sha256 digest '
+                 'are only downloaded once. Defaults to a folder in the '
+                 'resolve path.')
+
+        self.parser.add_argument(
+            '--checkout_backend',
+            dest='--checkout_backend',
+            default='copy',
+            choices=['copy', 'worktree'],
+            help="How git checkouts are created from the cloned repository. "
+                 "'copy' copies the entire repository, 'worktree' uses "
+                 "'git worktree add' to share the object database. "
+                 "[default: 'copy']")
+
+        self.parser.add_argument(
+            '--clone_strategy',
+            dest='--clone_strategy',
+            default=None,
+            choices=['full', 'shallow', 'blobless', 'single_branch'],
+            help="How git dependencies are cloned, unless the dependency "
+                 "specifies a 'clone_strategy'. 'shallow' only clones the "
+                 "newest commit, 'blobless' downloads the files when they "
+                 "are checked out, 'single_branch' only clones the default "
+                 "branch. [default: 'full', the tag of a semver dependency "
+                 "is cloned 'shallow']")
+
+        self.parser.add_argument(
+            '--submodule_jobs',
+            dest='--submodule_jobs',
+            default=4,
+            type=positive_int,
+            help='The number of submodules fetched in parallel when the '
+                 'submodules of a git dependency are updated. [default: 4]')
+
+        self.parser.add_argument(
+            '--shallow_submodules',
+            dest='--shallow_submodules',
+            action='store_true', default=False,
+            help='Only fetch the commits recorded for the submodules of git '
+                 'dependencies, not their history.')
+
+        self.parser.add_argument(
+            '--resolve_jobs',
+            dest='--resolve_jobs',
+            default=1,
+            type=positive_int,
+            help='The number of dependencies to fetch in parallel during '
+                 'configure. [default: 1]')
+
+        self.parser.add_argument(
+            '--download_jobs',
+            dest='--download_jobs',
+            default=4,
+            type=positive_int,
+            help='The maximum number of files downloaded in parallel by the '
+                 'http resolver. [default: 4]')
+
+        self.parser.add_argument(
+            '--network_timeout',
+            dest='--network_timeout',
+            default=None,
+            type=positive_float,
+            help='The number of seconds a git command or download may take '
+                 'before it is stopped. By default there is no timeout.')
+
+        self.parser.add_argument(
+            '--network_retries',
+            dest='--network_retries',
+            default=2,
+            type=non_negative_int,
+            help='The number of times a failed git command or download is '
+                 'retried. [default: 2]')
+
+        self.parser.add_argument(
+            '--network_backoff',
+            dest='--network_backoff',
+            default=1.0,
+            type=positive_float,
+            help='The number of seconds to wait before the first retry, the '
+                 'time is doubled for every retry. [default: 1.0]')
+
+        self.parser.add_argument(
+            '--resolve_profile',
+            dest='--resolve_profile',
+            default=None,
+            type=non_empty_string,
+            help='Write the time used by the resolvers, git commands and '
+                 'downloads to the file as a Chrome trace, which can be '
+                 'opened in chrome://tracing.')
+
+        self.parser.add_argument(
+            '--resolve_profile_pstats',
+            dest='--resolve_profile_pstats',
+            action='store_true', default=False,
+            help='Also profile the phases of the resolve with cProfile and '
+                 'write the statistics next to the --resolve_profile file.')
+
+        self.parser.add_argument(
+            '--tag_database_url',
+            dest='--tag_database_url',
+            default=None,
+            type=non_empty_string,
+            help='The URL of the tags.json file used to find the newest tag '
+                 'of semver dependencies. A file:// URL or a local path can '
+                 'be used to work offline.')
+
         self.__parse()
 
     def resolve_path(self):
@@ -81,12 +271,93 @@ class Options(object):
     def fast_resolve(self):
         return self.known_args['--fast_resolve']
 
+    def force_resolve(self):
+        return self.known_args['--force_resolve']
+
+    def race_sources(self):
+        return self.known_args['--race_sources']
+
     def lock_paths(self):
         return self.known_args['--lock_paths']
 
     def lock_versions(self):
         return self.known_args['--lock_versions']
 
+    def git_object_cache(self):
+        return self.known_args['--git_object_cache']
+
+    def download_cache(self):
+        return self.known_args['--download_cache']
+
+    def checkout_backend(self):
+        return self.known_args['--checkout_backend']
+
+    def clone_strategy(self):
+        return self.known_args['--clone_strategy']
+
+    def submodule_jobs(self):
+        return self.known_args['--submodule_jobs']
+
+    def shallow_submodules(self):
+        return self.known_args['--shallow_submodules']
+
+    def resolve_jobs(self):
+        return self.known_args['--resolve_jobs']
+
+    def download_jobs(self):
+        return self.known_args['--download_jobs']
+
+    def network_timeout(self):
+        return self.known_args['--network_timeout']
+
+    def network_retries(self):
+        return self.known_args['--network_retries']
+
+    def network_backoff(self):
+        return self.known_args['--network_backoff']
+
+    def resolve_profile(self):
+        return self.known_args['--resolve_profile']
+
+    def resolve_profile_pstats(self):
+        return self.known_args['--resolve_profile_pstats']
+
+    @property
+    def unknown_args(self):
+        """ The arguments not consumed by the resolve options as a list.
+
+        These are the arguments left for the waf options parser.
+        """
+        return [arg for index, arg in enumerate(self.__unknown_args)
+                if index not in self.__consumed]
+
+    def tag_database_url(self):
+        return self.known_args['--tag_database_url']
+
+    def resolve_args(self):
+        """ The options which may change the resolve as a dict mapping the
+        options to their values.
+
+        The dict contains the parsed resolve options and the options in the
+        unknown arguments. The values of the dependency options i.e.
+        '--<name>_path' and '--<name>_checkout' are parsed like when the
+        dependency is added, even if it was not added yet. The unknown
+        options are waf options which may not take a value, so their value
+        is only used if it is written as '--foo=value', since the following
+        argument may be a waf command e.g. 'configure --foo build'.
+        """
+        args = dict(self.__parsed_args)
+
+        for option, (value, _) in self.__tokens.items():
+
+            if option.endswith(('_path', '_checkout')) or \
+                    option not in self.__separate_values:
+                args[option] = value
+            else:
+                args[option] = None
+
+        return args
+
     def path(self, dependency):
         return self.known_args['--%s_path' % dependency.name]
 
@@ -98,11 +369,72 @@ class Options(object):
         known, unknown = self.parser.parse_known_args(args=self.args)
 
         self.known_args = vars(known)
-        self.unknown_args = unknown
+        self.__parsed_args = dict(self.known_args)
+        self.__unknown_args = unknown
 
         if self.lock_versions() and self.lock_paths():
             raise Error('Incompatible options')
 
+        self.__tokenize()
+
+    def __tokenize(self):
+        """ Finds the options and their values in the unknown arguments.
+
+        The dependency options are added after the arguments have been
+        parsed. Instead of parsing all arguments again for every
+        dependency, the values of the dependency options are looked up in
+        the tokens. The dependency options are parsed like argparse parses
+        options with nargs='?' i.e. '--foo_path /tmp/foo',
+        '--foo_path=/tmp/foo' or '--foo_path' which gives the value None.
+        Options must be written in full, abbreviations are not supported.
+        """
+        args = self.__unknown_args
+        index = 0
+
+        while index < len(args):
+
+            arg = args[index]
+
+            if arg == '--':
+                # The remaining arguments are positional
+                break
+
+            if not arg.startswith('--'):
+                index += 1
+                continue
+
+            if '=' in arg:
+                option, value = arg.split('=', 1)
+                indices = (index,)
+
+            elif index + 1 < len(args) and not args[index + 1].startswith('-'):
+                option, value = arg, args[index + 1]
+                indices = (index, index + 1)
+                index += 1
+
+            else:
+                option, value = arg, None
+                indices = (index,)
+
+            if len(indices) == 2:
+                self.__separate_values.add(option)
+            else:
+                self.__separate_values.discard(option)
+
+            # If an option is repeated the last value is used, but all
+            # occurrences are consumed
+            _, previous = self.__tokens.get(option, (None, ()))
+            self.__tokens[option] = (value, previous + indices)
+
+            index += 1
+
+    def __add_value(self, option):
+        """ Sets the value of a dependency option from the tokens. """
+        value, indices = self.__tokens.get(option, (None, ()))
+
+        self.known_args[option] = value
+        self.__consumed.update(indices)
+
     def __add_path(self, dependency):
 
         option = '--%s_path' % dependency.name
@@ -113,6 +445,8 @@ class Options(object):
             dest=option,
             help='Manually specify path for {}.'.format(dependency.name))
 
+        self.__add_value(option)
+
     def __add_checkout(self, dependency):
 
         option = '--%s_checkout' % dependency.name
@@ -124,6 +458,8 @@ class Options(object):
             help='Manually specify Git checkout for {}.'.format(
                 dependency.name))
 
+        self.__add_value(option)
+
     def add_dependency(self, dependency):
 
         self.__add_path(dependency)
@@ -131,5 +467,3 @@ class Options(object):
         if dependency.resolver == 'git':
 
             self.__add_checkout(dependency)
-
-        self.__parse()
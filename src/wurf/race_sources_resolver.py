@@ -0,0 +1,57 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+from .source_race import SourceRace
+
+
+class RaceSourcesResolver(object):
+    """ Iterates through the resolvers of the ranked sources until a path is
+    resolved.
+
+    If a source loses the race started by its first fetch, the source which
+    won is tried first, followed by the source which lost.
+    """
+
+    def __init__(self, resolvers, sources):
+        """ Construct an instance.
+
+        :param resolvers: A list of resolvers, one for each source.
+        :param sources: The ranked sources as a list of strings, in the same
+            order as the resolvers.
+        """
+        assert len(resolvers) == len(sources)
+
+        self.resolvers = resolvers
+        self.sources = sources
+
+    def resolve(self):
+        """ Resolve the dependency.
+
+        :return: Path to resolved dependency as a string
+        """
+        pending = list(zip(self.sources, self.resolvers))
+
+        while pending:
+
+            source, resolver = pending.pop(0)
+
+            try:
+                path = resolver.resolve()
+            except SourceRace.Lost as e:
+                winner = [p for p in pending if p[0] == e.winner]
+
+                # Try the winner, then try this source again
+                pending = winner + [(source, resolver)] + \
+                    [p for p in pending if p[0] != e.winner]
+                continue
+
+            if path:
+                return path
+
+        return None
+
+    def __repr__(self):
+        """
+        :return: Representation of this object as a string
+        """
+        return "%s(sources=%r)" % (self.__class__.__name__, self.sources)
@@ -0,0 +1,54 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+from .error import Error
+
+
+class RankedSourceResolver(object):
+    """ Records the time used to fetch from a source, or the failure, in the
+    SourceRanking.
+
+    A resolve is only recorded if the resolver fetched from the source. A
+    dependency resolved from a valid checkout or the download cache does
+    not say anything about the speed of the source.
+    """
+
+    def __init__(self, resolver, source_ranking, source_race, source):
+        """ Construct an instance.
+
+        :param resolver: A resolver instance
+        :param source_ranking: A SourceRanking instance
+        :param source_race: The SourceRace of the dependency, which records
+            the fetches from the source.
+        :param source: The source resolved by the resolver as a string
+        """
+        self.resolver = resolver
+        self.source_ranking = source_ranking
+        self.source_race = source_race
+        self.source = source
+
+    def resolve(self):
+        """ Resolve the dependency.
+
+        :return: Path to resolved dependency as a string
+        """
+        try:
+            path = self.resolver.resolve()
+        except Error:
+            self.source_ranking.record_failure(source=self.source)
+            raise
+
+        seconds = self.source_race.fetch_seconds(source=self.source)
+
+        if path and seconds is not None:
+            self.source_ranking.record_success(
+                source=self.source, seconds=seconds)
+
+        return path
+
+    def __repr__(self):
+        """
+        :return: Representation of this object as a string
+        """
+        return "%s(resolver=%r, source=%r)" % (
+            self.__class__.__name__, self.resolver, self.source)
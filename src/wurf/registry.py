@@ -3,7 +3,7 @@
 
 import argparse
 import os
-import json
+import time
 import hashlib
 import inspect
 import collections
@@ -17,6 +17,8 @@ from .on_active_store_path_resolver import OnActiveStorePathResolver
 from .on_passive_load_path_resolver import OnPassiveLoadPathResolver
 from .try_resolver import TryResolver
 from .list_resolver import ListResolver
+from .race_sources_resolver import RaceSourcesResolver
+from .ranked_source_resolver import RankedSourceResolver
 from .git_checkout_resolver import GitCheckoutResolver
 from .git_semver_resolver import GitSemverResolver
 from .git_url_parser import GitUrlParser
@@ -37,8 +39,27 @@ from .existing_tag_resolver import ExistingTagResolver
 from .url_download import UrlDownload
 from .http_resolver import HttpResolver
 from .archive_resolver import ArchiveResolver
+from .resolve_scheduler import ResolveScheduler
+from .scheduled_resolver import ScheduledResolver
+from .dependency_graph import DependencyGraph
+from .git_object_cache import GitObjectCache
+from .download_cache import DownloadCache
+from .source_race import SourceRace
+from .source_ranking import SourceRanking
+from .retry_policy import RetryPolicy
+from .git_inspector import GitInspector
+from .resolve_stamps import ResolveStamps
+from .resolve_fingerprint import ResolveFingerprint
+from .resolve_snapshot import ResolveSnapshot
+from .resolve_manifest import ResolveManifest
+from .git_checkout_backend import CopyCheckoutBackend
+from .git_checkout_backend import WorktreeCheckoutBackend
+from .resolve_profile import ResolveProfile
+from .trace_resolver import TraceResolver
 
 from .error import Error
+from .error import DependencyError
+from .compat import IS_PY2
 
 
 class RegistryProviderError(Error):
@@ -73,6 +94,18 @@ class RegistryCacheOnceError(Error):
                                        self.provider_function.__name__))
 
 
+def provider_arguments(provider_function):
+    """ Finds the names of the arguments of a provider function.
+
+    :param provider_function: The function object
+    :return: The names of the arguments as a tuple
+    """
+    if IS_PY2:
+        return tuple(inspect.getargspec(provider_function).args)
+    else:
+        return tuple(inspect.getfullargspec(provider_function).args)
+
+
 class Registry(object):
 
     # The TemporaryValue is used to provide temporary values though the
@@ -110,10 +143,54 @@ class Registry(object):
 
     ShouldCache = collections.namedtuple('ShouldCache', 'name once')
 
+    # The default maximum number of values cached per provider. When the
+    # limit is reached the least recently used value is evicted.
+    CACHE_SIZE = 256
+
     class CacheEntry(object):
-        def __init__(self, once):
+        def __init__(self, once, max_size):
             self.once = once
-            self.data = {}
+            self.max_size = max_size
+            self.data = collections.OrderedDict()
+
+            # Statistics, the time is the total time spent in the provider
+            # function including the providers it requires
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.time = 0.0
+
+        def store(self, key, value):
+            self.data[key] = value
+
+            if self.max_size is not None and len(self.data) > self.max_size:
+                self.data.popitem(last=False)
+                self.evictions += 1
+
+        def statistics(self):
+            return {'hits': self.hits, 'misses': self.misses,
+                    'evictions': self.evictions, 'size': len(self.data),
+                    'time': self.time}
+
+    class IdentityKey(object):
+        """ Used in the cache keys for values which are not hashable e.g.
+        lists and dicts. The values are compared by identity, such that a
+        changed list is detected by providing a new list.
+        """
+        __slots__ = ('value',)
+
+        def __init__(self, value):
+            self.value = value
+
+        def __hash__(self):
+            return id(self.value)
+
+        def __eq__(self, other):
+            return isinstance(other, Registry.IdentityKey) and \
+                self.value is other.value
+
+        def __ne__(self, other):
+            return not self == other
 
     # Dictionary containing the provider functions registered
     # using the @Registry.provide decorator
@@ -135,15 +212,16 @@ class Registry(object):
 
         # Dictionary which contains cached values produced for the different
         # providers. The layout of the dictionary will be:
-        # { 'provider1': { argument_hash1: value1
-        #                  arguemnt_hash2, value2},
-        #   'provider2': { argument_hash1: value1 },
+        # { 'provider1': CacheEntry(data={ argument_key1: value1,
+        #                                  argument_key2: value2 }),
+        #   'provider2': CacheEntry(data={ argument_key1: value1 }),
         #   ....
         # }
         #
-        # Where the provider name is the key to a dictionary where cached
-        # values are stored. The nested dict uses a hash of the arguments
-        # passed to require(...) to find the right cached response.
+        # Where the provider name is the key to a CacheEntry where cached
+        # values are stored. The nested dict uses a key built from the
+        # arguments passed to the provider function to find the right cached
+        # response, see __cache_key(...).
         self.cache = {}
 
         # Set which contains the name of features that should be cached
@@ -155,67 +233,87 @@ class Registry(object):
             for k, v in Registry.providers.items():
                 self.provide_function(k, v)
 
-    def cache_provider(self, provider_name, once):
+    def cache_provider(self, provider_name, once, max_size=CACHE_SIZE):
         """ Specify that objects / values produced by the provider should be
             cached.
 
         :param provider_name: The provider's name as a string
+        :param once: True if the provider should only produce one value.
+        :param max_size: The maximum number of cached values, None for no
+            limit.
         """
         assert provider_name not in self.cache
-        self.cache[provider_name] = Registry.CacheEntry(once=once)
+        self.cache[provider_name] = Registry.CacheEntry(
+            once=once, max_size=max_size)
 
     def purge_cache(self):
         """ Empty the registry cache. """
         for provider_name in self.cache:
-            self.cache[provider_name].data = {}
+            self.cache[provider_name].data = collections.OrderedDict()
 
-    def __inject_arguments(self, provider_function):
+    def cache_statistics(self):
+        """ Returns the statistics of the cached providers.
+
+        :return: A dict mapping the provider names to dicts containing the
+            number of 'hits', 'misses' and 'evictions', the current 'size'
+            of the cache and the total 'time' in seconds spent in the
+            provider function.
+        """
+        return dict((provider_name, entry.statistics())
+                    for provider_name, entry in self.cache.items())
+
+    def __inject_arguments(self, provider_function, arguments):
         """ Based on function signature prepare arguments.
 
-        This function takes as input a function object, based on the
-        arguments it builds a dictionary object which can be used
-        to call the function. The arguments values are found in the
-        registry.
+        This function takes as input a function object and the names of its
+        arguments, it builds a dictionary object which can be used to call
+        the function. The arguments values are found in the registry.
 
         :param provider_function: The function object which we would
            like to call
+        :param arguments: The names of the arguments of the provider
+           function as a tuple, see provider_arguments(...)
         :return: Dictionary containing the arguments and corresponding values.
         """
 
         inject_arguments = {}
-        require_arguments = inspect.getargspec(provider_function)[0]
+        registry = self.registry
 
-        for argument in require_arguments:
+        for argument in arguments:
 
             if argument == 'registry':
                 inject_arguments[argument] = self
                 continue
 
-            if argument not in self:
+            try:
+                call = registry[argument]
+            except KeyError:
                 raise RegistryInjectError(provider_function=provider_function,
                                           missing_provider=argument)
 
-            inject_arguments[argument] = self.require(argument)
+            inject_arguments[argument] = call()
 
         return inject_arguments
 
-    def __hash_arguments(self, arguments):
+    def __cache_key(self, arguments, inject_arguments):
         """
-        Provides a hash of the arguments to be passed to a provider function.
+        Provides a key for the arguments to be passed to a provider function.
 
-        The hash is used to make sure the registry provides stable cached
-        results.
+        The key is used to make sure the registry provides stable cached
+        results. Hashable values such as strings are compared by value,
+        other values such as lists are compared by identity.
         """
+        key = []
 
-        hash_dict = {}
-        for k, v in arguments.items():
+        for argument in arguments:
+            value = inject_arguments[argument]
 
-            if isinstance(v, (list, tuple, dict, set)):
-                hash_dict[k] = hash(json.dumps(v, sort_keys=True))
-            else:
-                hash_dict[k] = hash(v)
+            if isinstance(value, (list, dict, set)):
+                value = Registry.IdentityKey(value)
+
+            key.append(value)
 
-        return hash(json.dumps(hash_dict, sort_keys=True))
+        return tuple(key)
 
     def provide_function(self, provider_name, provider_function,
                          override=False):
@@ -233,37 +331,52 @@ class Registry(object):
         if not override and provider_name in self.registry:
             raise RegistryProviderError(provider_name)
 
+        # The signature of the provider function is inspected once, when the
+        # provider is added. Calls to require(...) then only need to look up
+        # the arguments in the registry.
+        arguments = provider_arguments(provider_function=provider_function)
+
         def call():
 
             inject_arguments = self.__inject_arguments(
-                provider_function=provider_function)
+                provider_function=provider_function, arguments=arguments)
+
+            provider = self.cache.get(provider_name)
+
+            if provider is None:
+                return provider_function(**inject_arguments)
 
             # Did we already cache?
-            if provider_name in self.cache:
-                key = self.__hash_arguments(inject_arguments)
+            key = self.__cache_key(
+                arguments=arguments, inject_arguments=inject_arguments)
 
-                provider = self.cache[provider_name]
+            try:
+                result = provider.data.pop(key)
+            except KeyError:
 
-                try:
-                    return provider.data[key]
-                except KeyError:
+                if provider.once and len(provider.data) > 0:
+                    raise RegistryCacheOnceError(
+                        provider_name, provider_function)
 
-                    if provider.once and len(provider.data) > 0:
-                        raise RegistryCacheOnceError(
-                            provider_name, provider_function)
+                provider.misses += 1
 
-                    result = provider_function(**inject_arguments)
-                    provider.data[key] = result
-                    return result
-            else:
+                start = time.time()
                 result = provider_function(**inject_arguments)
+                provider.time += time.time() - start
+
+                provider.store(key=key, value=result)
                 return result
 
+            # Insert the value again to mark it as the most recently used
+            provider.hits += 1
+            provider.data[key] = result
+            return result
+
         self.registry[provider_name] = call
 
         if provider_name in self.cache:
             # Clean the cache
-            self.cache[provider_name].data = {}
+            self.cache[provider_name].data = collections.OrderedDict()
 
     def provide_temporary(self):
         """ :return: Temporary context which allows can be used to provide
@@ -456,27 +569,74 @@ def semver_selector(semver):
 
 @Registry.cache_once
 @Registry.provide
-def tag_database(ctx):
+def tag_database(ctx, options, resolve_config_path, resolve_profile):
     """ Return the TagDatabase provider. """
-    return TagDatabase(ctx=ctx)
+    cache_path = os.path.join(resolve_config_path, 'tag_database.json')
+
+    return TagDatabase(ctx=ctx, cache_path=cache_path,
+                       url=options.tag_database_url(),
+                       resolve_profile=resolve_profile)
 
 
 @Registry.cache_once
 @Registry.provide
-def url_download():
+def url_download(options, retry_policy, resolve_profile):
     """ Return the UrlDownload provider. """
-    return UrlDownload()
+    return UrlDownload(jobs=options.download_jobs(),
+                       retry_policy=retry_policy,
+                       resolve_profile=resolve_profile)
+
+
+@Registry.cache_once
+@Registry.provide
+def resolve_profile(options):
+    """ Return the ResolveProfile used to trace the resolve, or None if the
+    resolve is not profiled.
+    """
+    path = options.resolve_profile()
+
+    if not path:
+        return None
+
+    return ResolveProfile(path=os.path.abspath(os.path.expanduser(path)),
+                          pstats=options.resolve_profile_pstats())
+
+
+@Registry.cache_once
+@Registry.provide
+def retry_policy(ctx, options):
+    """ Return the RetryPolicy provider used for git commands and
+    downloads.
+    """
+    return RetryPolicy(ctx=ctx, timeout=options.network_timeout(),
+                       retries=options.network_retries(),
+                       backoff=options.network_backoff())
 
 
 @Registry.cache_once
 @Registry.provide
-def project_git_protocol(git, ctx, git_url_parser):
+def resolve_scheduler(options, configuration):
+    """ Return the ResolveScheduler provider.
+
+    Only the chains which fetch dependencies use more than one job. The
+    passive chains just read small files from the build folder.
+    """
+    if configuration.resolver_chain() in (Configuration.LOAD,
+                                          Configuration.HELP):
+        return ResolveScheduler(jobs=1)
+
+    return ResolveScheduler(jobs=options.resolve_jobs())
+
+
+@Registry.cache_once
+@Registry.provide
+def project_git_protocol(git_inspector, ctx, git_url_parser):
     """ Return the Git protocol used by the parent project.
 
     If parent project not under git version control return None.
     """
     try:
-        parent_url = git.remote_origin_url(cwd=os.getcwd())
+        parent_url = git_inspector.remote_origin_url(cwd=os.getcwd())
 
     except Exception as e:
         ctx.to_log(
@@ -496,9 +656,20 @@ def project_git_protocol(git, ctx, git_url_parser):
 
 @Registry.cache_once
 @Registry.provide
-def git(git_binary, ctx):
+def git(git_binary, ctx, retry_policy, options):
     """ The Git object, which is used to run git commands. """
-    return Git(git_binary=git_binary, ctx=ctx)
+    return Git(git_binary=git_binary, ctx=ctx, retry_policy=retry_policy,
+               submodule_jobs=options.submodule_jobs(),
+               shallow_submodules=options.shallow_submodules())
+
+
+@Registry.cache_once
+@Registry.provide
+def git_inspector(git):
+    """ The GitInspector object, which is used in place of the Git object to
+    answer queries about a repository without running git.
+    """
+    return GitInspector(git=git)
 
 
 @Registry.cache_once
@@ -531,21 +702,115 @@ def user_path_resolver(mandatory_options, dependency):
     return PathResolver(dependency=dependency, path=path)
 
 
+@Registry.cache_once
+@Registry.provide
+def fetched_repositories():
+    """ Return the set of git repositories updated during this resolve. """
+    return set()
+
+
+@Registry.cache_once
+@Registry.provide
+def git_object_cache(options, git, ctx, waf_utils):
+    """ Return the GitObjectCache provider.
+
+    If the user did not specify a cache folder return None.
+    """
+    cache_path = options.git_object_cache()
+
+    if not cache_path:
+        return None
+
+    cache_path = os.path.abspath(os.path.expanduser(cache_path))
+    waf_utils.check_dir(cache_path)
+
+    return GitObjectCache(git=git, ctx=ctx, cache_path=cache_path)
+
+
+@Registry.cache_once
+@Registry.provide
+def download_cache(options, resolve_path, waf_utils):
+    """ Return the DownloadCache provider.
+
+    If the user did not specify a cache folder, the cache is stored in the
+    resolve path.
+    """
+    cache_path = options.download_cache()
+
+    if cache_path:
+        cache_path = os.path.abspath(os.path.expanduser(cache_path))
+    else:
+        cache_path = os.path.join(resolve_path, 'download_cache')
+
+    waf_utils.check_dir(cache_path)
+
+    return DownloadCache(cache_path=cache_path)
+
+
+@Registry.provide
+def clone_strategy(options, dependency):
+    """ Return the clone strategy of the dependency.
+
+    The 'clone_strategy' attribute of the dependency is used if specified,
+    otherwise the --clone_strategy option. None is returned if no strategy
+    was selected, then the resolvers use their default strategy.
+    """
+    strategy = dependency.clone_strategy
+
+    if not strategy:
+        strategy = options.clone_strategy()
+
+    if not strategy:
+        return None
+
+    if strategy not in GitResolver.CLONE_STRATEGIES:
+        raise DependencyError(
+            msg='Unknown clone_strategy "{}", use one of {}'.format(
+                strategy, ', '.join(sorted(GitResolver.CLONE_STRATEGIES))),
+            dependency=dependency)
+
+    return strategy
+
+
 @Registry.provide
-def git_resolver(git, ctx, dependency, source, git_url_rewriter,
-                 dependency_path):
+def git_resolver(registry, git, ctx, dependency, source, git_url_rewriter,
+                 dependency_path, fetched_repositories, git_object_cache,
+                 clone_strategy):
     """ Builds a GitResolver instance.
 
     :param registry: A Registry instance.
     """
     return GitResolver(git=git, ctx=ctx, dependency=dependency,
                        source=source, git_url_rewriter=git_url_rewriter,
-                       cwd=dependency_path)
+                       cwd=dependency_path,
+                       fetched_repositories=fetched_repositories,
+                       git_object_cache=git_object_cache,
+                       clone_strategy=clone_strategy,
+                       source_race=optional_source_race(registry))
+
+
+@Registry.cache_once
+@Registry.provide
+def checkout_backend(options, git, resolve_profile):
+    """ Return the backend used to create git checkouts. """
+
+    if options.checkout_backend() == 'worktree':
+        return WorktreeCheckoutBackend(git=git)
+    else:
+        return CopyCheckoutBackend(git=git, resolve_profile=resolve_profile)
+
+
+@Registry.cache_once
+@Registry.provide
+def resolve_stamps(git_inspector):
+    """ Return the ResolveStamps used to verify checkouts. """
+    return ResolveStamps(git=git_inspector)
 
 
 @Registry.provide
-def git_checkout_resolver(registry, git, git_resolver, ctx, dependency,
-                          dependency_path):
+def git_checkout_resolver(registry, git_inspector, git_resolver, ctx,
+                          dependency, dependency_path, checkout_backend,
+                          resolve_stamps):
     """ Builds a GitResolver instance.
 
     :param registry: A Registry instance.
@@ -555,27 +820,36 @@ def git_checkout_resolver(registry, git, git_resolver, ctx, dependency,
     else:
         checkout = dependency.checkout
 
-    return GitCheckoutResolver(git=git, resolver=git_resolver, ctx=ctx,
-                               dependency=dependency, checkout=checkout,
-                               cwd=dependency_path)
+    return GitCheckoutResolver(git=git_inspector, resolver=git_resolver,
+                               ctx=ctx, dependency=dependency,
+                               checkout=checkout,
+                               cwd=dependency_path,
+                               checkout_backend=checkout_backend,
+                               resolve_stamps=resolve_stamps)
 
 
 @Registry.provide
-def git_semver_resolver(git, git_resolver, ctx, semver_selector,
-                        dependency, dependency_path):
+def git_semver_resolver(registry, options, git_inspector, git_resolver, ctx,
+                        semver_selector, dependency, dependency_path,
+                        checkout_backend, resolve_stamps):
     """ Builds a GitResolver instance.
 
     :param registry: A Registry instance.
     """
-    return GitSemverResolver(git=git, resolver=git_resolver, ctx=ctx,
-                             semver_selector=semver_selector,
+    # Newer tags are picked up when all dependencies are resolved again
+    return GitSemverResolver(git=git_inspector, resolver=git_resolver,
+                             ctx=ctx, semver_selector=semver_selector,
                              dependency=dependency,
-                             cwd=dependency_path)
+                             cwd=dependency_path,
+                             checkout_backend=checkout_backend,
+                             resolve_stamps=resolve_stamps,
+                             refresh_tags=options.force_resolve(),
+                             source_race=optional_source_race(registry))
 
 
 @Registry.provide
 def existing_tag_resolver(ctx, dependency, semver_selector, tag_database,
-                          git_semver_resolver, dependency_path):
+                          git_semver_resolver, resolve_manifest):
     """ Builds a GitResolver instance.
 
     :param registry: A Registry instance.
@@ -583,7 +857,7 @@ def existing_tag_resolver(ctx, dependency, semver_selector, tag_database,
     return ExistingTagResolver(
         ctx=ctx, dependency=dependency, semver_selector=semver_selector,
         tag_database=tag_database, resolver=git_semver_resolver,
-        cwd=dependency_path)
+        resolve_manifest=resolve_manifest)
 
 
 @Registry.provide
@@ -647,7 +921,7 @@ def resolve_git_semver(registry, source, dependency):
 
 
 @Registry.provide
-def resolve_git(registry, ctx, options, dependency):
+def resolve_git(registry, ctx, options, fast_resolve, dependency):
     """ Builds git resolvers
 
     :param registry: A Registry instance.
@@ -668,16 +942,15 @@ def resolve_git(registry, ctx, options, dependency):
     method_key = "resolve_git_{}".format(method)
     git_resolver = registry.require(method_key)
 
-    if options.fast_resolve():
+    if fast_resolve:
 
         # Set the resolver action on the dependency
         dependency.resolver_action = 'fast/' + dependency.resolver_action
 
-        resolve_config_path = registry.require('resolve_config_path')
+        resolve_manifest = registry.require('resolve_manifest')
 
         fast_resolver = OnPassiveLoadPathResolver(
-            dependency=dependency,
-            resolve_config_path=resolve_config_path)
+            dependency=dependency, resolve_manifest=resolve_manifest)
 
         fast_resolver = TryResolver(
             resolver=fast_resolver, ctx=ctx,
@@ -717,8 +990,8 @@ def resolve_from_lock_git(registry, lock_cache, dependency):
 
 @Registry.cache
 @Registry.provide
-def resolve_http(options, registry, archive_extractor, url_download,
-                 dependency, source, ctx, dependency_path):
+def resolve_http(fast_resolve, registry, archive_extractor, url_download,
+                 download_cache, dependency, source, ctx, dependency_path):
     """
     """
 
@@ -726,21 +999,22 @@ def resolve_http(options, registry, archive_extractor, url_download,
 
     resolver = HttpResolver(
         url_download=url_download, dependency=dependency, source=source,
-        cwd=dependency_path)
+        cwd=dependency_path, download_cache=download_cache,
+        source_race=optional_source_race(registry))
 
     if dependency.extract:
         resolver = ArchiveResolver(archive_extractor=archive_extractor,
                                    resolver=resolver,
                                    cwd=dependency_path)
 
-    if options.fast_resolve():
+    if fast_resolve:
         # Set the resolver action on the dependency
         dependency.resolver_action = 'fast/' + dependency.resolver_action
 
-        resolve_config_path = registry.require('resolve_config_path')
+        resolve_manifest = registry.require('resolve_manifest')
 
         fast_resolver = OnPassiveLoadPathResolver(
-            dependency=dependency, resolve_config_path=resolve_config_path)
+            dependency=dependency, resolve_manifest=resolve_manifest)
 
         fast_resolver = TryResolver(
             resolver=fast_resolver, ctx=ctx, dependency=dependency)
@@ -775,14 +1049,14 @@ def resolve_lock_path(lock_cache, dependency):
 
 
 @Registry.provide
-def help_chain(ctx, resolve_config_path, dependency):
+def help_chain(ctx, resolve_manifest, dependency):
 
     # Set the resolver action on the dependency
     dependency.resolver_chain = 'Load'
     dependency.resolver_action = 'help'
 
     resolver = OnPassiveLoadPathResolver(
-        dependency=dependency, resolve_config_path=resolve_config_path)
+        dependency=dependency, resolve_manifest=resolve_manifest)
 
     resolver = TryResolver(resolver=resolver, ctx=ctx, dependency=dependency)
 
@@ -790,13 +1064,13 @@ def help_chain(ctx, resolve_config_path, dependency):
 
 
 @Registry.provide
-def load_chain(ctx, resolve_config_path, dependency):
+def load_chain(ctx, resolve_manifest, dependency):
 
     # Set the resolver chain on the dependency
     dependency.resolver_chain = 'Load'
 
     resolver = OnPassiveLoadPathResolver(
-        dependency=dependency, resolve_config_path=resolve_config_path)
+        dependency=dependency, resolve_manifest=resolve_manifest)
 
     resolver = TryResolver(resolver=resolver, ctx=ctx, dependency=dependency)
 
@@ -806,15 +1080,90 @@ def load_chain(ctx, resolve_config_path, dependency):
     return resolver
 
 
+@Registry.cache_once
+@Registry.provide
+def source_ranking(resolve_path):
+    """ Return the SourceRanking provider. """
+    return SourceRanking(resolve_path=resolve_path)
+
+
+@Registry.provide
+def source_probe(registry, dependency):
+    """ Return a function checking whether a source of the dependency can
+    be reached, or None if the resolver does not support it.
+    """
+    if dependency.resolver == 'git':
+        git = registry.require('git')
+        git_url_rewriter = registry.require('git_url_rewriter')
+
+        # The probes race each other, a failed probe is not retried
+        def probe(source):
+            git.remote_head(repository=git_url_rewriter.rewrite_url(source),
+                            retry=False)
+
+        return probe
+
+    if dependency.resolver == 'http':
+        url_download = registry.require('url_download')
+        return url_download.probe
+
+    return None
+
+
+@Registry.provide
+def ranked_sources(source_ranking, dependency):
+    """ Return the sources of the dependency in the order they should be
+    tried.
+    """
+    return source_ranking.rank(sources=dependency.sources)
+
+
+def optional_source_race(registry):
+    """ Return the SourceRace of the dependency if its sources are ranked,
+    otherwise None.
+
+    The SourceRace is provided by the sources_resolver while the resolvers
+    of the sources are built.
+    """
+    if 'source_race' in registry:
+        return registry.require('source_race')
+
+    return None
+
+
 @Registry.provide
-def sources_resolver(ctx, registry, dependency):
+def sources_resolver(ctx, options, registry, dependency):
 
     resolvers = []
 
-    for source in dependency.sources:
+    # The lock chains resolve from the paths stored in the lock file, so
+    # only the real sources are ranked
+    ranked = 'resolver' not in registry
+
+    if ranked:
+        sources = registry.require('ranked_sources')
+        source_ranking = registry.require('source_ranking')
+
+        # The sources are raced when the dependency is resolved, the first
+        # time a fetch is needed
+        if options.race_sources():
+            probe = registry.require('source_probe')
+        else:
+            probe = None
+
+        race = SourceRace(ctx=ctx, source_ranking=source_ranking,
+                          sources=sources, probe=probe,
+                          dependency=dependency)
+    else:
+        sources = dependency.sources
+
+    for source in sources:
         with registry.provide_temporary() as temporary:
             temporary.provide_value('source', source)
 
+            if ranked:
+                temporary.provide_value('source_race', race)
+
             if 'resolver' in registry:
                 resolver = registry.require('resolver')
             else:
@@ -823,12 +1172,21 @@ def sources_resolver(ctx, registry, dependency):
             resolver_key = "resolve_{}".format(resolver)
             resolver = registry.require(resolver_key)
 
+            if ranked:
+                resolver = RankedSourceResolver(
+                    resolver=resolver, source_ranking=source_ranking,
+                    source_race=race, source=source)
+
             resolver = TryResolver(
                 resolver=resolver, ctx=ctx, dependency=dependency)
 
             resolvers.append(resolver)
 
-    resolver = ListResolver(resolvers=resolvers)
+    if ranked:
+        resolver = RaceSourcesResolver(resolvers=resolvers, sources=sources)
+    else:
+        resolver = ListResolver(resolvers=resolvers)
+
     resolver = CheckOptionalResolver(
         resolver=resolver, dependency=dependency)
 
@@ -836,7 +1194,7 @@ def sources_resolver(ctx, registry, dependency):
 
 
 @Registry.provide
-def resolve_chain(ctx, options, registry, dependency, resolve_config_path,
+def resolve_chain(ctx, options, registry, dependency, resolve_manifest,
                   symlinks_path):
 
     # Set the resolver chain on the dependency
@@ -853,7 +1211,7 @@ def resolve_chain(ctx, options, registry, dependency, resolve_config_path,
 
     resolver = OnActiveStorePathResolver(
         resolver=resolver, dependency=dependency,
-        resolve_config_path=resolve_config_path)
+        resolve_manifest=resolve_manifest)
 
     return resolver
 
@@ -897,8 +1255,59 @@ def resolve_from_lock_chain(registry, dependency, lock_cache):
     return resolver
 
 
+@Registry.cache_once
+@Registry.provide
+def resolve_fingerprint(options, project_path, resolve_config_path):
+    """ Return the ResolveFingerprint of the current resolve inputs. """
+    return ResolveFingerprint(
+        options=options, environment=dict(os.environ),
+        project_path=project_path, resolve_config_path=resolve_config_path,
+        lock_file=Configuration.LOCK_FILE)
+
+
+@Registry.cache_once
+@Registry.provide
+def resolve_manifest(resolve_config_path):
+    """ Return the ResolveManifest storing the resolved dependencies. """
+    return ResolveManifest(resolve_config_path=resolve_config_path)
+
+
+@Registry.cache_once
+@Registry.provide
+def resolve_snapshot(resolve_config_path, dependency_cache):
+    """ Return the ResolveSnapshot of the resolved dependencies. """
+    return ResolveSnapshot(resolve_config_path=resolve_config_path,
+                           dependency_cache=dependency_cache)
+
+
+@Registry.cache_once
+@Registry.provide
+def incremental_resolve(options, configuration, resolve_fingerprint):
+    """ Return True if the dependencies resolved by the previous configure
+    should be reused, i.e. if the resolve inputs did not change.
+    """
+    if configuration.resolver_chain() not in (
+            Configuration.RESOLVE, Configuration.RESOLVE_FROM_LOCK):
+        return False
+
+    if options.force_resolve():
+        return False
+
+    return resolve_fingerprint.is_unchanged()
+
+
+@Registry.cache_once
+@Registry.provide
+def fast_resolve(options, incremental_resolve):
+    """ Return True if the dependencies should be loaded from the file
+    system if possible, rather than resolved again.
+    """
+    return options.fast_resolve() or incremental_resolve
+
+
 @Registry.provide
-def dependency_resolver(registry, ctx, configuration, dependency):
+def dependency_resolver(registry, ctx, configuration, resolve_scheduler,
+                        resolve_profile, dependency):
     """ Builds a WurfSourceResolver instance."""
 
     # This is where we "wire" together the resolvers. Which actually do the
@@ -909,9 +1318,30 @@ def dependency_resolver(registry, ctx, configuration, dependency):
 
     resolver = registry.require(resolver_key)
 
-    return ContextMsgResolver(
+    # The chain must be traced before it is scheduled, since the scheduled
+    # resolve starts right away
+    if resolve_profile:
+        resolver = TraceResolver.trace_chain(
+            resolver=resolver, resolve_profile=resolve_profile,
+            dependency=dependency)
+
+    if resolve_scheduler.jobs > 1:
+        # Start resolving in the background. The ContextMsgResolver will
+        # wait for the result, so the messages are still printed in the
+        # order the dependencies were defined.
+        resolver = ScheduledResolver(
+            resolver=resolver, resolve_scheduler=resolve_scheduler)
+
+    resolver = ContextMsgResolver(
         resolver=resolver, ctx=ctx, dependency=dependency)
 
+    if resolve_profile:
+        resolver = TraceResolver(
+            resolver=resolver, resolve_profile=resolve_profile,
+            dependency=dependency)
+
+    return resolver
+
 
 @Registry.cache_once
 @Registry.provide
@@ -929,10 +1359,61 @@ def dependency_manager(registry):
     ctx = registry.require('ctx')
     dependency_cache = registry.require('dependency_cache')
     options = registry.require('options')
+    resolve_scheduler = registry.require('resolve_scheduler')
 
     return DependencyManager(
         registry=registry, dependency_cache=dependency_cache, ctx=ctx,
-        options=options)
+        options=options, resolve_scheduler=resolve_scheduler)
+
+
+@Registry.provide
+def dependency_graph(registry, ctx, git_inspector, semver_selector,
+                     resolve_scheduler, args):
+    """ Return the DependencyGraph provider. """
+    return DependencyGraph(
+        registry=registry, ctx=ctx, git=git_inspector,
+        semver_selector=semver_selector,
+        resolve_scheduler=resolve_scheduler, args=args)
+
+
+@Registry.provide
+def discover_action(dependency_graph, project_path):
+
+    def action():
+        dependency_graph.discover(path=project_path)
+
+    return action
+
+
+@Registry.provide
+def pre_resolver_actions(registry, configuration, fast_resolve,
+                         incremental_resolve, resolve_fingerprint,
+                         resolve_snapshot, resolve_scheduler):
+
+    actions = []
+
+    # A failed resolve must not leave the snapshot of the previous resolve
+    if configuration.resolver_chain() in (Configuration.RESOLVE,
+                                          Configuration.RESOLVE_AND_LOCK,
+                                          Configuration.RESOLVE_FROM_LOCK):
+        actions.append(resolve_snapshot.remove)
+
+    # The stored paths are overwritten by a full resolve, so the stored
+    # fingerprint is only valid again once the resolve completes
+    if configuration.resolver_chain() in (Configuration.RESOLVE,
+                                          Configuration.RESOLVE_AND_LOCK,
+                                          Configuration.RESOLVE_FROM_LOCK) \
+            and not incremental_resolve:
+        actions.append(resolve_fingerprint.remove)
+
+    # Discovering the graph first only pays off if the repositories can be
+    # fetched in parallel afterwards
+    if configuration.resolver_chain() in (Configuration.RESOLVE,
+                                          Configuration.RESOLVE_AND_LOCK) \
+            and resolve_scheduler.jobs > 1 and not fast_resolve:
+        actions.append(registry.require('discover_action'))
+
+    return actions
 
 
 @Registry.provide
@@ -947,13 +1428,30 @@ def resolve_lock_action(lock_cache, project_path):
 
 
 @Registry.provide
-def post_resolver_actions(registry, configuration):
+def post_resolver_actions(registry, configuration, resolve_manifest,
+                          resolve_fingerprint, resolve_snapshot):
 
     actions = []
 
+    # The manifest must be written before the fingerprint and snapshot,
+    # which refer to the stored paths
+    if configuration.resolver_chain() in (Configuration.RESOLVE,
+                                          Configuration.RESOLVE_AND_LOCK,
+                                          Configuration.RESOLVE_FROM_LOCK):
+        actions.append(resolve_manifest.write)
+
     if configuration.resolver_chain() == Configuration.RESOLVE_AND_LOCK:
         actions.append(registry.require('resolve_lock_action'))
 
+    if configuration.resolver_chain() in (Configuration.RESOLVE,
+                                          Configuration.RESOLVE_FROM_LOCK):
+        actions.append(resolve_fingerprint.store)
+
+    if configuration.resolver_chain() in (Configuration.RESOLVE,
+                                          Configuration.RESOLVE_AND_LOCK,
+                                          Configuration.RESOLVE_FROM_LOCK):
+        actions.append(resolve_snapshot.store)
+
     return actions
 
 
@@ -0,0 +1,129 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+import os
+import json
+import hashlib
+
+
+class ResolveFingerprint(object):
+    """ Fingerprint of the inputs to a resolve, which are not part of the
+    dependency definitions.
+
+    The fingerprint covers the command-line options, the environment
+    variables used by git and the lock file. It is stored in the build
+    directory after a successful resolve. If the fingerprint is unchanged on
+    the next configure, the dependencies resolved by the previous configure
+    can be reused.
+
+    The dependency definitions in the wscript and resolve.json files are not
+    part of the fingerprint, since the SHA1 of every dependency is checked
+    when its stored path is loaded. In this way only the dependencies whose
+    definition changed are resolved again.
+    """
+
+    # The name of the file storing the fingerprint in the build directory
+    FINGERPRINT_FILE = 'resolve_fingerprint.json'
+
+    # Options that do not change the result of the resolve, only how it is
+    # done
+    IGNORED_ARGS = ('--force_resolve', '--resolve_jobs', '--download_jobs',
+                    '--submodule_jobs', '--network_timeout',
+                    '--network_retries', '--network_backoff',
+                    '--resolve_profile', '--resolve_profile_pstats')
+
+    def __init__(self, options, environment, project_path,
+                 resolve_config_path, lock_file):
+        """ Construct an instance.
+
+        :param options: An Options instance.
+        :param environment: A dict containing the environment variables.
+        :param project_path: The path to the project as a string.
+        :param resolve_config_path: The path to the folder where the
+            fingerprint is stored as a string.
+        :param lock_file: The file name of the lock file as a string.
+        """
+        self.options = options
+        self.environment = environment
+        self.project_path = project_path
+        self.resolve_config_path = resolve_config_path
+        self.lock_file = lock_file
+
+    def value(self):
+        """
+        :return: The fingerprint of the resolve inputs as a string.
+        """
+        args = self.__options()
+
+        environment = dict(
+            (key, value) for key, value in self.environment.items()
+            if key.startswith('GIT_') or key.upper().endswith('_PROXY') or
+            key == 'HOME')
+
+        lock = None
+        lock_path = os.path.join(self.project_path, self.lock_file)
+
+        if os.path.isfile(lock_path):
+            with open(lock_path, 'rb') as lock_file:
+                lock = hashlib.sha1(lock_file.read()).hexdigest()
+
+        inputs = {'args': args, 'environment': environment, 'lock': lock}
+
+        data = json.dumps(inputs, sort_keys=True)
+        return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+    def is_unchanged(self):
+        """
+        :return: True if the fingerprint matches the one stored by the
+            previous resolve, otherwise False.
+        """
+        path = self.__fingerprint_path()
+
+        if not os.path.isfile(path):
+            return False
+
+        try:
+            with open(path, 'r') as fingerprint_file:
+                stored = json.load(fingerprint_file)
+        except ValueError:
+            return False
+
+        return stored.get('fingerprint') == self.value()
+
+    def store(self):
+        """ Stores the fingerprint, this should be done after a successful
+        resolve.
+        """
+        with open(self.__fingerprint_path(), 'w') as fingerprint_file:
+            json.dump({'fingerprint': self.value()}, fingerprint_file,
+                      indent=4, sort_keys=True)
+
+    def remove(self):
+        """ Removes the stored fingerprint. This should be done before a
+        full resolve, since the stored paths are overwritten while
+        resolving.
+        """
+        path = self.__fingerprint_path()
+
+        if os.path.isfile(path):
+            os.remove(path)
+
+    def __options(self):
+        """ Returns the options and their values, as parsed by the Options.
+
+        The commands e.g. 'configure' and 'build' do not change the resolve,
+        so we only consider the options.
+        """
+        args = self.options.resolve_args()
+
+        return dict((option, value) for option, value in args.items()
+                    if option not in self.IGNORED_ARGS)
+
+    def __fingerprint_path(self):
+        return os.path.join(self.resolve_config_path, self.FINGERPRINT_FILE)
+
+    def __repr__(self):
+        """
+        :return: Representation of this object as a string
+        """
+        return "%s(value=%r)" % (self.__class__.__name__, self.value())
@@ -0,0 +1,159 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+import os
+import json
+import tempfile
+import threading
+
+from .compat import replace
+
+
+class ResolveManifest(object):
+    """ Stores the resolved dependencies in a single file.
+
+    The manifest contains the path, SHA1, symlink information and resolved
+    commit of every dependency, together with the paths of the semver tags
+    checked out for each dependency. The layout of the file is:
+
+        { "dependencies": { "foo": { "sha1": "...", "path": "...",
+                                     "is_symlink": false,
+                                     "real_path": null,
+                                     "commit": "..." } },
+          "tags": { "foo": { "1.0.0": "..." } } }
+
+    The file is read once, the first time it is needed, and is written after
+    a successful resolve. The file is written to a temporary file which is
+    then renamed, so an interrupted configure never leaves a partially
+    written manifest behind.
+
+    The dependencies may be resolved from several threads, so the access to
+    the manifest is protected by a lock.
+    """
+
+    # The name of the file storing the manifest in the build directory
+    MANIFEST_FILE = 'resolve_manifest.json'
+
+    def __init__(self, resolve_config_path):
+        """ Construct an instance.
+
+        :param resolve_config_path: The path to the folder where the
+            manifest is stored as a string.
+        """
+        self.resolve_config_path = resolve_config_path
+        self.lock = threading.Lock()
+
+        # The content of the manifest, None until it is read
+        self.manifest = None
+
+        # True if the manifest was changed since it was read
+        self.changed = False
+
+    def dependency(self, name):
+        """
+        :param name: The name of the dependency as a string.
+        :return: A dict with the stored 'sha1', 'path', 'is_symlink',
+            'real_path' and 'commit' of the dependency, or None if the
+            dependency is not in the manifest.
+        """
+        with self.lock:
+            config = self.__read()['dependencies'].get(name)
+
+        return dict(config) if config is not None else None
+
+    def store_dependency(self, name, config):
+        """ Stores a resolved dependency in the manifest.
+
+        :param name: The name of the dependency as a string.
+        :param config: A dict with the 'sha1', 'path', 'is_symlink',
+            'real_path' and 'commit' of the dependency.
+        """
+        with self.lock:
+            self.__read()['dependencies'][name] = dict(config)
+            self.changed = True
+
+    def tags(self, name):
+        """
+        :param name: The name of the dependency as a string.
+        :return: A dict mapping the semver tags of the dependency to the
+            paths where they are checked out.
+        """
+        with self.lock:
+            return dict(self.__read()['tags'].get(name, {}))
+
+    def store_tags(self, name, tags):
+        """ Stores the semver tags of a dependency in the manifest.
+
+        :param name: The name of the dependency as a string.
+        :param tags: A dict mapping the tags to paths.
+        """
+        with self.lock:
+            self.__read()['tags'][name] = dict(tags)
+            self.changed = True
+
+    def write(self):
+        """ Writes the manifest, if it was changed.
+
+        The manifest is written to a temporary file in the same folder,
+        which is then renamed to replace the manifest.
+        """
+        with self.lock:
+
+            if not self.changed:
+                return
+
+            manifest_path = self.__manifest_path()
+
+            fd, temp_path = tempfile.mkstemp(
+                prefix=self.MANIFEST_FILE + '.', suffix='.tmp',
+                dir=self.resolve_config_path)
+
+            try:
+                with os.fdopen(fd, 'w') as temp_file:
+                    json.dump(self.manifest, temp_file, indent=4,
+                              sort_keys=True)
+
+                replace(source=temp_path, destination=manifest_path)
+            except Exception:
+                if os.path.isfile(temp_path):
+                    os.remove(temp_path)
+                raise
+
+            self.changed = False
+
+    def __read(self):
+        """ Reads the manifest the first time it is needed.
+
+        The lock must be held by the caller.
+        """
+        if self.manifest is not None:
+            return self.manifest
+
+        manifest = None
+        manifest_path = self.__manifest_path()
+
+        if os.path.isfile(manifest_path):
+            try:
+                with open(manifest_path, 'r') as manifest_file:
+                    manifest = json.load(manifest_file)
+            except ValueError:
+                manifest = None
+
+        if not isinstance(manifest, dict):
+            manifest = {}
+
+        manifest.setdefault('dependencies', {})
+        manifest.setdefault('tags', {})
+
+        self.manifest = manifest
+        return self.manifest
+
+    def __manifest_path(self):
+        return os.path.join(self.resolve_config_path, self.MANIFEST_FILE)
+
+    def __repr__(self):
+        """
+        :return: Representation of this object as a string
+        """
+        return "%s(resolve_config_path=%r)" % (
+            self.__class__.__name__, self.resolve_config_path)
@@ -0,0 +1,203 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+import os
+import json
+import time
+import cProfile
+import threading
+
+
+class ResolveProfile(object):
+    """ Records timed spans while the dependencies are resolved.
+
+    A span is recorded for every resolver in the resolve chain of a
+    dependency, for the git commands and downloads, and for the phases of
+    the resolve. The spans are written as a Chrome trace event file, which
+    can be opened in chrome://tracing or https://ui.perfetto.dev to find the
+    critical path of the resolve. The spans of dependencies resolved in
+    parallel are shown on the timeline of the thread which resolved them.
+
+    Optionally every phase is also profiled with cProfile, the statistics
+    are written next to the trace file as '<trace file>.<phase>.pstats'
+    files, which can be read with the pstats module.
+    """
+
+    class Span(object):
+        """ Records a span when the "with" block is finished. """
+
+        def __init__(self, profile, name, category, args):
+            self.profile = profile
+            self.name = name
+            self.category = category
+            self.args = args
+            self.start = None
+
+        def __enter__(self):
+            self.start = time.time()
+            return self
+
+        def __exit__(self, type, value, traceback):
+            args = dict(self.args) if self.args else {}
+
+            if type is not None:
+                args['error'] = str(value)
+
+            self.profile.add_span(
+                name=self.name, category=self.category, start=self.start,
+                end=time.time(), args=args)
+
+    class Phase(Span):
+        """ A span which also profiles the phase with cProfile. """
+
+        def __init__(self, profile, name, category, args):
+            super(ResolveProfile.Phase, self).__init__(
+                profile=profile, name=name, category=category, args=args)
+            self.profiler = None
+
+        def __enter__(self):
+            if self.profile.pstats:
+                self.profiler = cProfile.Profile()
+                self.profiler.enable()
+
+            return super(ResolveProfile.Phase, self).__enter__()
+
+        def __exit__(self, type, value, traceback):
+            super(ResolveProfile.Phase, self).__exit__(type, value, traceback)
+
+            if self.profiler is not None:
+                self.profiler.disable()
+                self.profiler.dump_stats(
+                    self.profile.pstats_path(phase=self.name))
+
+    def __init__(self, path, pstats=False):
+        """ Construct an instance.
+
+        :param path: The path to the trace file as a string.
+        :param pstats: True if the phases should be profiled with cProfile.
+        """
+        self.path = path
+        self.pstats = pstats
+        self.start = time.time()
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+
+        # The trace events recorded so far
+        self.events = []
+
+        # The identifiers of the threads which recorded an event
+        self.threads = set()
+
+    def span(self, name, category, args=None):
+        """ Returns a span recorded by a "with" block.
+
+        Example:
+
+            with resolve_profile.span(name='git clone',
+                                      category='subprocess'):
+                ...
+
+        :param name: The name of the span as a string.
+        :param category: The category of the span as a string e.g.
+            'resolver', which can be used to filter the spans in the viewer.
+        :param args: A dict with additional information shown for the span,
+            or None.
+        """
+        return ResolveProfile.Span(
+            profile=self, name=name, category=category, args=args)
+
+    def phase(self, name):
+        """ Returns a span for a phase of the resolve e.g. 'resolve',
+        which is also profiled with cProfile if enabled.
+
+        The phases must not be nested, since only one profiler can be active
+        at a time.
+
+        :param name: The name of the phase as a string.
+        """
+        return ResolveProfile.Phase(
+            profile=self, name=name, category='phase', args=None)
+
+    def add_span(self, name, category, start, end, args=None):
+        """ Adds a span to the trace.
+
+        :param name: The name of the span as a string.
+        :param category: The category of the span as a string.
+        :param start: The start time as returned by time.time().
+        :param end: The end time as returned by time.time().
+        :param args: A dict with additional information, or None.
+        """
+        thread = threading.current_thread()
+
+        event = {
+            'name': name, 'cat': category, 'ph': 'X', 'pid': self.pid,
+            'tid': thread.ident,
+            'ts': int((start - self.start) * 1e6),
+            'dur': int((end - start) * 1e6),
+            'args': args if args else {}}
+
+        with self.lock:
+            self.events.append(event)
+
+            if thread.ident not in self.threads:
+                self.threads.add(thread.ident)
+
+                # Name the timeline of the thread in the viewer
+                self.events.append({
+                    'name': 'thread_name', 'ph': 'M', 'pid': self.pid,
+                    'tid': thread.ident, 'args': {'name': thread.name}})
+
+    def pstats_path(self, phase):
+        """ :return: The path to the pstats file of a phase as a string. """
+        return '{}.{}.pstats'.format(self.path, phase)
+
+    def write(self):
+        """ Writes the trace file. """
+
+        with self.lock:
+            events = list(self.events)
+
+        with open(self.path, 'w') as trace_file:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'},
+                      trace_file, indent=1)
+
+    def __repr__(self):
+        """
+        :return: Representation of this object as a string
+        """
+        return "%s(path=%r, pstats=%r)" % (
+            self.__class__.__name__, self.path, self.pstats)
+
+
+class NullSpan(object):
+    """ Used in place of a span when the resolve is not profiled. """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        pass
+
+
+def profile_span(resolve_profile, name, category, args=None):
+    """ Returns a span of the profile, or a span which does nothing if the
+    resolve is not profiled.
+
+    :param resolve_profile: A ResolveProfile instance or None.
+    """
+    if resolve_profile is None:
+        return NullSpan()
+
+    return resolve_profile.span(name=name, category=category, args=args)
+
+
+def profile_phase(resolve_profile, name):
+    """ Returns a phase of the profile, or a span which does nothing if the
+    resolve is not profiled.
+
+    :param resolve_profile: A ResolveProfile instance or None.
+    """
+    if resolve_profile is None:
+        return NullSpan()
+
+    return resolve_profile.phase(name=name)
@@ -0,0 +1,125 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+import sys
+import threading
+
+from .compat import IS_PY2
+from .compat import reraise
+
+if IS_PY2:
+
+    # Python 2
+    from Queue import Queue
+else:
+
+    # Python 3
+    from queue import Queue
+
+
+class ResolveJob(object):
+    """ A function submitted to the ResolveScheduler.
+
+    The job stores the value returned by the function, or the exception
+    raised by it, until the result is requested.
+    """
+
+    def __init__(self, function):
+        """ Construct an instance.
+
+        :param function: The function to run, it is called without arguments.
+        """
+        self.function = function
+        self.finished = threading.Event()
+        self.value = None
+        self.exc_info = None
+
+    def run(self):
+        """ Run the function and store the outcome. """
+        try:
+            self.value = self.function()
+        except BaseException:
+            self.exc_info = sys.exc_info()
+        finally:
+            self.finished.set()
+
+    def result(self):
+        """ Wait for the job to finish.
+
+        If the function raised an exception it will be re-raised here, with
+        the traceback of the worker thread, such that errors surface in the
+        thread requesting the result.
+
+        :return: The value returned by the function.
+        """
+        self.finished.wait()
+
+        if self.exc_info:
+            reraise(self.exc_info)
+
+        return self.value
+
+
+class ResolveScheduler(object):
+    """ Runs resolve jobs on a bounded pool of worker threads.
+
+    Resolving a dependency is mostly waiting for the network (git clone,
+    git pull, downloads etc.), so running independent resolves in threads
+    allows us to fetch several dependencies at the same time.
+
+    The worker threads are started on demand, the first time a job is
+    submitted. If the scheduler is created with a single job, all jobs are
+    executed directly in the submitting thread.
+    """
+
+    def __init__(self, jobs):
+        """ Construct an instance.
+
+        :param jobs: The maximum number of jobs to run concurrently as an int.
+        """
+        assert jobs > 0
+
+        self.jobs = jobs
+        self.queue = Queue()
+        self.workers = []
+
+    def submit(self, function):
+        """ Submit a function for execution.
+
+        :param function: The function to run, it is called without arguments.
+        :return: A ResolveJob instance which can be used to get the result.
+        """
+        job = ResolveJob(function=function)
+
+        if self.jobs == 1:
+            job.run()
+            return job
+
+        self.__start_workers()
+        self.queue.put(job)
+
+        return job
+
+    def __start_workers(self):
+
+        while len(self.workers) < self.jobs:
+
+            # The workers are daemon threads, this ensures that an idle
+            # worker will not prevent waf from exiting
+            worker = threading.Thread(target=self.__work)
+            worker.daemon = True
+            worker.start()
+
+            self.workers.append(worker)
+
+    def __work(self):
+
+        while True:
+            job = self.queue.get()
+            job.run()
+
+    def __repr__(self):
+        """
+        :return: Representation of this object as a string
+        """
+        return "%s(jobs=%r)" % (self.__class__.__name__, self.jobs)
@@ -0,0 +1,133 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+import os
+import json
+import collections
+
+
+class ResolveSnapshot(object):
+    """ Snapshot of the dependencies resolved by the last configure.
+
+    When waf is invoked without configure, e.g. 'waf build', the paths of
+    the dependencies are loaded from the files stored by the last configure.
+    To find the dependencies, the resolve() functions of all the wscripts
+    must run again. The snapshot stores the dependency_cache after a
+    successful configure, together with the modification time and size of
+    the wscript and resolve.json files which defined the dependencies.
+
+    As long as none of the files changed, the dependency_cache can be
+    loaded directly from the snapshot without recursing into the wscripts.
+    """
+
+    # The name of the file storing the snapshot in the build directory
+    SNAPSHOT_FILE = 'resolve_snapshot.json'
+
+    def __init__(self, resolve_config_path, dependency_cache):
+        """ Construct an instance.
+
+        :param resolve_config_path: The path to the folder where the
+            snapshot is stored as a string.
+        :param dependency_cache: The OrderedDict which is filled with the
+            resolved dependencies.
+        """
+        self.resolve_config_path = resolve_config_path
+        self.dependency_cache = dependency_cache
+
+        # The files read while resolving
+        self.files = []
+
+    def add_file(self, path):
+        """ Adds a file which defines dependencies, e.g. a wscript.
+
+        The file does not have to exist. If it is created later, the
+        snapshot is no longer valid.
+
+        :param path: The path to the file as a string.
+        """
+        if path not in self.files:
+            self.files.append(path)
+
+    def store(self):
+        """ Stores the snapshot, this should be done after a successful
+        resolve.
+        """
+        snapshot = {
+            'dependencies': list(self.dependency_cache.items()),
+            'files': dict((path, self.__stat(path)) for path in self.files)}
+
+        with open(self.__snapshot_path(), 'w') as snapshot_file:
+            json.dump(snapshot, snapshot_file, indent=4, sort_keys=True)
+
+    def load(self, args):
+        """ Loads the snapshot.
+
+        :param args: The command-line arguments passed as a list. The
+            snapshot is not used if the options of a dependency are passed.
+        :return: An OrderedDict with the same content as the dependency_cache
+            had when the snapshot was stored, or None if there is no valid
+            snapshot.
+        """
+        path = self.__snapshot_path()
+
+        if not os.path.isfile(path):
+            return None
+
+        try:
+            with open(path, 'r') as snapshot_file:
+                snapshot = json.load(snapshot_file)
+        except ValueError:
+            return None
+
+        for file_path, stat in snapshot['files'].items():
+            if self.__stat(file_path) != stat:
+                return None
+
+        dependencies = collections.OrderedDict()
+
+        for name, dependency in snapshot['dependencies']:
+
+            options = ('--{}_path'.format(name), '--{}_checkout'.format(name))
+
+            for arg in args:
+                if arg.split('=')[0] in options:
+                    return None
+
+            if not os.path.exists(dependency['path']):
+                return None
+
+            dependencies[str(name)] = {
+                'path': str(dependency['path']),
+                'recurse': dependency['recurse']}
+
+        return dependencies
+
+    def remove(self):
+        """ Removes the stored snapshot. This should be done before
+        resolving, such that a failed resolve does not leave an old snapshot.
+        """
+        path = self.__snapshot_path()
+
+        if os.path.isfile(path):
+            os.remove(path)
+
+    def __stat(self, path):
+        """ :return: The modification time and size of the file as a list,
+            or None if the file does not exist.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        return [stat.st_mtime, stat.st_size]
+
+    def __snapshot_path(self):
+        return os.path.join(self.resolve_config_path, self.SNAPSHOT_FILE)
+
+    def __repr__(self):
+        """
+        :return: Representation of this object as a string
+        """
+        return "%s(resolve_config_path=%r)" % (
+            self.__class__.__name__, self.resolve_config_path)
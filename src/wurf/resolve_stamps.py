@@ -0,0 +1,164 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+import os
+import re
+import json
+
+
+class ResolveStamps(object):
+    """ Records the state of checkouts, such that a later resolve can verify
+    them without running git.
+
+    A stamp is stored next to the checkout folder after a successful resolve
+    and contains the SHA1 of the dependency, the checkout, the commit of the
+    working copy and the commits of the submodules. The stamp is valid as
+    long as the dependency definition and the checkout did not change and
+    the working copy and submodules are still at the recorded commits. The
+    commits are read by a GitInspector, so verifying a stamp does not start
+    any processes.
+
+    Stamps are only written for immutable checkouts i.e. tags and commits.
+    Branches must be pulled to find out whether they changed.
+    """
+
+    # The stamp of a checkout is stored in '<checkout folder><STAMP_SUFFIX>'
+    STAMP_SUFFIX = '.stamp.json'
+
+    def __init__(self, git):
+        """ Construct an instance.
+
+        :param git: A GitInspector instance
+        """
+        self.git = git
+
+    def verify(self, checkout_path, dependency, checkout):
+        """ Checks the stamp of a checkout.
+
+        :param checkout_path: The path to the checkout folder as a string.
+        :param dependency: A Dependency instance.
+        :param checkout: The tag or commit as a string.
+        :return: The commit id of the checkout as a string if the stamp is
+            valid, otherwise None.
+        """
+        stamp_path = self.__stamp_path(checkout_path=checkout_path)
+
+        if not os.path.isfile(stamp_path) or \
+                not os.path.isdir(checkout_path):
+            return None
+
+        try:
+            with open(stamp_path, 'r') as stamp_file:
+                stamp = json.load(stamp_file)
+        except ValueError:
+            return None
+
+        if stamp.get('sha1') != dependency.sha1 or \
+                stamp.get('checkout') != checkout:
+            return None
+
+        if self.__read_commit(path=checkout_path) != stamp.get('commit'):
+            return None
+
+        if self.__submodules(checkout_path=checkout_path) != \
+                stamp.get('submodules'):
+            return None
+
+        return stamp['commit']
+
+    def store(self, checkout_path, dependency, checkout, commit):
+        """ Writes the stamp of a checkout.
+
+        The submodules must be updated before the stamp is stored.
+
+        :param checkout_path: The path to the checkout folder as a string.
+        :param dependency: A Dependency instance.
+        :param checkout: The tag or commit as a string.
+        :param commit: The commit id of the checkout as a string.
+        """
+        submodules = self.__submodules(checkout_path=checkout_path)
+
+        if submodules is None:
+            # Some of the submodules are not checked out
+            self.remove(checkout_path=checkout_path)
+            return
+
+        stamp = {'sha1': dependency.sha1, 'checkout': checkout,
+                 'commit': commit, 'submodules': submodules}
+
+        with open(self.__stamp_path(checkout_path), 'w') as stamp_file:
+            json.dump(stamp, stamp_file, indent=4, sort_keys=True)
+
+    def checkouts(self, cwd):
+        """ Finds the checkout folders which have a stamp.
+
+        The stamps are not verified.
+
+        :param cwd: The folder containing the checkout folders as a string.
+        :return: The names of the checkout folders as a list of strings.
+        """
+        if not os.path.isdir(cwd):
+            return []
+
+        suffix = ResolveStamps.STAMP_SUFFIX
+
+        return sorted(name[:-len(suffix)] for name in os.listdir(cwd)
+                      if name.endswith(suffix) and len(name) > len(suffix))
+
+    def remove(self, checkout_path):
+        """ Removes the stamp of a checkout, if it exists.
+
+        :param checkout_path: The path to the checkout folder as a string.
+        """
+        stamp_path = self.__stamp_path(checkout_path=checkout_path)
+
+        if os.path.isfile(stamp_path):
+            os.remove(stamp_path)
+
+    def __submodules(self, checkout_path):
+        """ Reads the commits of the submodules in the checkout.
+
+        :return: A dict mapping the path of each submodule to its commit
+            id, or None if a submodule is not checked out.
+        """
+        gitmodules_path = os.path.join(checkout_path, '.gitmodules')
+
+        if not os.path.isfile(gitmodules_path):
+            return {}
+
+        with open(gitmodules_path, 'r') as gitmodules_file:
+            paths = re.findall(r'^\s*path\s*=\s*(.+?)\s*$',
+                               gitmodules_file.read(), re.MULTILINE)
+
+        submodules = {}
+
+        for path in paths:
+
+            commit = self.__read_commit(
+                path=os.path.join(checkout_path, path))
+
+            if commit is None:
+                return None
+
+            submodules[path] = commit
+
+        return submodules
+
+    def __read_commit(self, path):
+        """ :return: The commit checked out in path or None. """
+
+        # Without a .git folder or file, git would find the repository in
+        # one of the parent folders
+        if not os.path.exists(os.path.join(path, '.git')):
+            return None
+
+        return self.git.current_commit(cwd=path)
+
+    def __stamp_path(self, checkout_path):
+        return checkout_path + ResolveStamps.STAMP_SUFFIX
+
+    def __repr__(self):
+        """
+        :return: Representation of this object as a string
+        """
+        return "%s()" % self.__class__.__name__
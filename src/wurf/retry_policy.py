@@ -0,0 +1,107 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+import time
+
+from .compat import IS_PY2
+from .error import Error
+
+if IS_PY2:
+
+    # Python 2
+    import httplib as http_client
+else:
+
+    # Python 3
+    import http.client as http_client
+
+
+class RetryPolicy(object):
+    """ Runs network operations, e.g. a git clone or a download, with a
+    bounded number of attempts.
+
+    A failed operation is retried after waiting for the backoff time, which
+    is doubled for every attempt. The timeout is the number of seconds an
+    operation may run before it is stopped. The attempts, failures and
+    waiting times are written to the resolve log.
+    """
+
+    # The default number of retries after the first attempt
+    RETRIES = 2
+
+    # The default seconds to wait before the first retry
+    BACKOFF = 1.0
+
+    def __init__(self, ctx, timeout=None, retries=RETRIES, backoff=BACKOFF,
+                 sleep=time.sleep):
+        """ Construct an instance.
+
+        :param ctx: A Waf Context instance.
+        :param timeout: The number of seconds an operation may run as a
+            float, or None for no timeout.
+        :param retries: The number of times a failed operation is retried as
+            an int.
+        :param backoff: The number of seconds to wait before the first retry
+            as a float.
+        :param sleep: The function used to wait, used in the tests.
+        """
+        self.ctx = ctx
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.sleep = sleep
+
+    def run(self, description, function, is_transient=None):
+        """ Runs an operation, retrying it if it fails.
+
+        :param description: A description of the operation used in the log
+            e.g. "git clone https://github.com/steinwurf/waf.git".
+        :param function: The function running the operation, it is called
+            without arguments.
+        :param is_transient: A function taking the exception raised by the
+            operation, returning False if retrying will not help. If None
+            all failures are retried.
+        :return: The value returned by the function.
+        """
+        attempt = 0
+
+        while True:
+
+            start = time.time()
+
+            try:
+                return function()
+            except (Error, EnvironmentError, http_client.HTTPException) as e:
+                elapsed = time.time() - start
+
+                transient = is_transient(e) if is_transient else True
+
+                if attempt == self.retries or not transient:
+                    self.ctx.to_log(
+                        "{} failed after {} attempt(s), the last attempt "
+                        "took {:.1f} s\n".format(
+                            description, attempt + 1, elapsed))
+
+                    if isinstance(e, Error):
+                        raise
+
+                    raise Error("{} failed: {}".format(description, e))
+
+                delay = self.backoff * 2 ** attempt
+                attempt += 1
+
+                self.ctx.to_log(
+                    "{} failed after {:.1f} s (attempt {} of {}), retrying "
+                    "in {:.1f} s: {}\n".format(
+                        description, elapsed, attempt, self.retries + 1,
+                        delay, e))
+
+                self.sleep(delay)
+
+    def __repr__(self):
+        """
+        :return: Representation of this object as a string
+        """
+        return "%s(timeout=%r, retries=%r, backoff=%r)" % (
+            self.__class__.__name__, self.timeout, self.retries,
+            self.backoff)
@@ -0,0 +1,35 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+
+class ScheduledResolver(object):
+    """ Runs a resolver in the background using a ResolveScheduler.
+
+    The wrapped resolver is submitted to the scheduler as soon as the
+    ScheduledResolver is constructed. Calling resolve(...) will wait for the
+    background resolve to finish and return its result.
+    """
+
+    def __init__(self, resolver, resolve_scheduler):
+        """ Construct an instance.
+
+        :param resolver: The resolver which will do the actual job
+        :param resolve_scheduler: A ResolveScheduler instance.
+        """
+        self.resolver = resolver
+        self.job = resolve_scheduler.submit(function=resolver.resolve)
+
+    def resolve(self):
+        """ Wait for the background resolve to finish.
+
+        Errors raised by the wrapped resolver are re-raised here.
+
+        :return: The path as a string.
+        """
+        return self.job.result()
+
+    def __repr__(self):
+        """
+        :return: Representation of this object as a string
+        """
+        return "%s(%r)" % (self.__class__.__name__, self.__dict__)
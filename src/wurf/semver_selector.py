@@ -1,12 +1,20 @@
 #! /usr/bin/env python
 # encoding: utf-8
 
+import re
+import bisect
+
 
 class SemverSelector(object):
     """
     Selects the most recent tag for a semver major version.
 
     Read more about Semantic Versioning here: semver.org
+
+    Each tag is parsed once into a key which can be compared using the
+    normal tuple comparison. The keys of a list of tags are kept in a sorted
+    index, which is cached for the list of tags. The newest tag in a range of
+    versions is then found using a binary search.
     """
 
     def __init__(self, semver):
@@ -16,46 +24,181 @@ class SemverSelector(object):
         """
         self.semver = semver
 
-    def select_tag(self, major, tags):
+        # Dict mapping a tag to its key, or to None if the tag is not a
+        # valid semver version
+        self.keys = {}
+
+        # Dict mapping a tuple of tags to a sorted index, see __index(...)
+        self.indices = {}
+
+    def select_tag(self, major, tags, minor=None):
         """
         Enumerate the available tags and return the newest tag for the
         specified major version.
 
         :param major: The major version number to use as an int.
         :param tags: list of available tags
+        :param minor: The minor version number to use as an int, or None
+            to use the newest minor version.
         :return: the tag to use or None if no tag is compatible
         """
         assert isinstance(major, int), "Major version is not an int"
 
-        valid_tags = []
+        # We only use tags that have the specified major version to ensure
+        # compatibility, see rules at semver.org
+        if minor is None:
+            return self.__newest(tags=tags, low=(major,), high=(major + 1,))
+
+        assert isinstance(minor, int), "Minor version is not an int"
+
+        return self.__newest(
+            tags=tags, low=(major, minor), high=(major, minor + 1))
+
+    def select_range(self, constraint, tags):
+        """
+        Return the newest tag satisfying a version constraint.
+
+        The supported constraints are:
+
+        - "1" or "1.2" selects the newest 1.x.x or 1.2.x version.
+        - "1.2.3" selects exactly version 1.2.3.
+        - "^1.2.3" selects the newest version >=1.2.3 and <2.0.0. If the
+          major version is 0, the minor version is kept i.e. "^0.2.3" means
+          >=0.2.3 and <0.3.0.
+        - "~1.2.3" selects the newest version >=1.2.3 and <1.3.0.
+
+        :param constraint: The constraint as a string.
+        :param tags: list of available tags
+        :return: the tag to use or None if no tag satisfies the constraint
+        """
+        match = re.match(r'^\s*([\^~]?)(\d+)(?:\.(\d+))?(?:\.(\d+))?\s*$',
+                         constraint)
+
+        if not match:
+            raise ValueError(
+                'Invalid version constraint "{}"'.format(constraint))
+
+        operator = match.group(1)
+        numbers = [int(n) for n in match.groups()[1:] if n is not None]
+
+        # The number of version parts given e.g. 2 for "~1.2"
+        parts = len(numbers)
+        major, minor, patch = numbers + [0] * (3 - parts)
+
+        if operator == '^':
+            low = self.__release_key(major, minor, patch)
+
+            if major > 0 or parts == 1:
+                high = (major + 1,)
+            elif minor > 0 or parts == 2:
+                high = (0, minor + 1)
+            else:
+                high = (0, 0, patch + 1)
+
+        elif operator == '~':
+            low = self.__release_key(major, minor, patch)
+
+            if parts == 1:
+                high = (major + 1,)
+            else:
+                high = (major, minor + 1)
+
+        elif parts == 1:
+            low, high = (major,), (major + 1,)
+
+        elif parts == 2:
+            low, high = (major, minor), (major, minor + 1)
+
+        else:
+            low = self.__release_key(major, minor, patch)
+            high = (major, minor, patch, (2,))
+
+        return self.__newest(tags=tags, low=low, high=high)
+
+    def __newest(self, tags, low, high):
+        """ Finds the newest tag with a key in the range [low, high). """
+
+        keys, sorted_tags = self.__index(tags=tags)
+
+        position = bisect.bisect_left(keys, high) - 1
+
+        if position < 0 or keys[position] < low:
+            return None
+
+        return sorted_tags[position]
+
+    def __index(self, tags):
+        """ Returns the sorted index of the tags.
+
+        :return: A tuple (keys, tags) where keys is a sorted list of the keys
+            of the valid tags and tags contains the tags in the same order.
+        """
+        tags = tuple(tags)
+
+        index = self.indices.get(tags)
+
+        if index is not None:
+            return index
+
+        entries = []
 
-        # Get tags with a matching major version
         for tag in tags:
-            try:
-                t = self.semver.parse(tag)
-                if t['major'] != major:
-                    continue
+            key = self.__key(tag=tag)
+
+            # Ignore tags we cannot parse
+            if key is not None:
+                entries.append((key, tag))
+
+        entries.sort()
+
+        index = ([key for key, _ in entries], [tag for _, tag in entries])
+        self.indices[tags] = index
+
+        return index
 
-                valid_tags.append(tag)
-            except ValueError:  # ignore tags we cannot parse
-                pass
+    def __key(self, tag):
+        """ Parses a tag into a key.
 
-        if len(valid_tags) == 0:
+        The keys are ordered by the semver precedence rules: The major,
+        minor and patch numbers are compared first. A pre-release version
+        has a lower precedence than the release. The identifiers of two
+        pre-releases are compared one by one, numeric identifiers are
+        compared numerically and have lower precedence than the alphanumeric
+        identifiers. The build metadata is ignored.
+
+        :return: The key as a tuple or None if the tag is not a valid
+            semver version.
+        """
+        try:
+            return self.keys[tag]
+        except KeyError:
+            pass
+
+        try:
+            version = self.semver.parse(tag)
+        except ValueError:
+            self.keys[tag] = None
             return None
 
-        # Now figure out which version is the newest.
-        # We only use tags that have the specified major version to ensure
-        # compatibility, see rules at semver.org
-        best_match = valid_tags[0]
+        if version['prerelease']:
+            identifiers = tuple(
+                (0, int(i), '') if i.isdigit() else (1, 0, i)
+                for i in version['prerelease'].split('.'))
+            prerelease = (0,) + identifiers
+        else:
+            prerelease = (1,)
+
+        key = (version['major'], version['minor'], version['patch'],
+               prerelease)
 
-        for t in valid_tags:
-            if self.semver.match(best_match, "<" + t):
-                best_match = t
+        self.keys[tag] = key
+        return key
 
-        return best_match
+    def __release_key(self, major, minor, patch):
+        return (major, minor, patch, (1,))
 
     def __repr__(self):
         """
         :return: Representation of this object as a string
         """
-        return "%s(%r)" % (self.__class__.__name__, self.__dict__)
+        return "%s(semver=%r)" % (self.__class__.__name__, self.semver)
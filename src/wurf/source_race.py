@@ -0,0 +1,109 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+import time
+
+
+class SourceRace(object):
+    """ Keeps track of the fetches from the sources of a dependency, and
+    races the sources when the first fetch is needed.
+
+    The resolvers call fetch(...) right before they access the network, so
+    a dependency which is resolved from a valid checkout, a pinned commit or
+    the download cache is not raced.
+    """
+
+    class Lost(Exception):
+        """ Raised by fetch(...) when another source answered first.
+
+        This is not an Error, such that the source is not recorded as failed
+        in the SourceRanking. The RaceSourcesResolver tries the winner
+        first, then the source which lost the race.
+        """
+
+        def __init__(self, source, winner):
+            self.source = source
+            self.winner = winner
+            super(SourceRace.Lost, self).__init__(
+                "Source {} answered before {}".format(winner, source))
+
+    def __init__(self, ctx, source_ranking, sources, probe, dependency):
+        """ Construct an instance.
+
+        :param ctx: A Waf Context instance.
+        :param source_ranking: A SourceRanking instance.
+        :param sources: The ranked sources of the dependency as a list of
+            strings.
+        :param probe: A function taking a source, which raises an exception
+            if the source cannot be reached, or None if the sources should
+            not be raced.
+        :param dependency: A Dependency instance.
+        """
+        self.ctx = ctx
+        self.source_ranking = source_ranking
+        self.sources = sources
+        self.probe = probe
+        self.dependency = dependency
+
+        # True when the race has run
+        self.raced = False
+
+        # The source which won the race and was not tried yet, or None
+        self.winner = None
+
+        # Dict mapping the sources fetched from to the time of the first
+        # fetch as returned by time.time()
+        self.fetches = {}
+
+    def fetch(self, source):
+        """ Called by a resolver before it fetches from a source.
+
+        The first fetch of the dependency races the two first sources, if
+        the sources should be raced.
+
+        :param source: The source as a string.
+        :raises SourceRace.Lost: If another source answered first and was
+            not tried yet.
+        """
+        if not self.raced:
+            self.raced = True
+            self.__race()
+
+        if self.winner is not None and self.winner != source:
+            winner = self.winner
+            self.winner = None
+
+            raise SourceRace.Lost(source=source, winner=winner)
+
+        self.winner = None
+        self.fetches.setdefault(source, time.time())
+
+    def fetch_seconds(self, source):
+        """ :return: The number of seconds since the first fetch from the
+            source as a float, or None if nothing was fetched from it.
+        """
+        if source not in self.fetches:
+            return None
+
+        return time.time() - self.fetches[source]
+
+    def __race(self):
+
+        if self.probe is None or len(self.sources) < 2:
+            return
+
+        winner = self.source_ranking.race(
+            sources=self.sources[:2], probe=self.probe)
+
+        if winner:
+            self.ctx.to_log("Source {} answered first for {}\n".format(
+                winner, self.dependency.name))
+
+        self.winner = winner
+
+    def __repr__(self):
+        """
+        :return: Representation of this object as a string
+        """
+        return "%s(sources=%r, race=%r)" % (
+            self.__class__.__name__, self.sources, self.probe is not None)
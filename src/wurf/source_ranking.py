@@ -0,0 +1,214 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+import os
+import json
+import time
+import tempfile
+import threading
+
+from .compat import IS_PY2
+from .compat import replace
+
+if IS_PY2:
+
+    # Python 2
+    from Queue import Queue, Empty
+else:
+
+    # Python 3
+    from queue import Queue, Empty
+
+
+class SourceRanking(object):
+    """ Records how the sources of the dependencies performed, such that the
+    fastest healthy source is tried first.
+
+    For every source the average time of a successful resolve and the
+    number of failures since the last success are stored in a file in the
+    resolve path. The average is an exponential moving average, so it
+    follows changes in the network.
+
+    A source which failed recently is tried last, until the retry interval
+    has passed. The other sources are ordered by their average time, sources
+    without history keep the order in which they are listed.
+    """
+
+    # The name of the file storing the ranking in the resolve path
+    RANKING_FILE = 'source_ranking.json'
+
+    # Weight of a new measurement in the moving average
+    WEIGHT = 0.3
+
+    # Seconds a failed source is tried last
+    RETRY_INTERVAL = 3600
+
+    # Seconds to wait for the first source in a race
+    RACE_TIMEOUT = 10
+
+    def __init__(self, resolve_path):
+        """ Construct an instance.
+
+        :param resolve_path: The path to the folder where the ranking is
+            stored as a string.
+        """
+        self.resolve_path = resolve_path
+        self.lock = threading.Lock()
+
+        # Dict mapping a source to its history, None until it is read
+        self.history = None
+
+    def rank(self, sources):
+        """ Orders the sources, the source to try first comes first.
+
+        :param sources: The sources as a list of strings.
+        :return: The ordered sources as a list of strings.
+        """
+        now = time.time()
+
+        with self.lock:
+            history = self.__read()
+
+            def key(item):
+                index, source = item
+                entry = history.get(source, {})
+
+                failed = entry.get('failures', 0) > 0 and \
+                    now - entry.get('failed', 0) < self.RETRY_INTERVAL
+
+                latency = entry.get('latency')
+
+                return (failed, latency is None, latency or 0, index)
+
+            ranked = sorted(enumerate(sources), key=key)
+
+        return [source for _, source in ranked]
+
+    def record_success(self, source, seconds):
+        """ Records a successful resolve from a source.
+
+        :param source: The source as a string.
+        :param seconds: The time used to resolve as a float.
+        """
+        with self.lock:
+            entry = self.__read().setdefault(source, {})
+
+            latency = entry.get('latency')
+
+            if latency is None:
+                entry['latency'] = seconds
+            else:
+                entry['latency'] = \
+                    self.WEIGHT * seconds + (1 - self.WEIGHT) * latency
+
+            entry['failures'] = 0
+            entry.pop('failed', None)
+
+            self.__write()
+
+    def record_failure(self, source):
+        """ Records a failed resolve from a source.
+
+        :param source: The source as a string.
+        """
+        with self.lock:
+            entry = self.__read().setdefault(source, {})
+
+            entry['failures'] = entry.get('failures', 0) + 1
+            entry['failed'] = time.time()
+
+            self.__write()
+
+    def race(self, sources, probe, timeout=RACE_TIMEOUT):
+        """ Probes the sources at the same time and returns the first source
+        to answer.
+
+        The probes run in daemon threads. When a source has answered, the
+        other probes are abandoned and their results ignored.
+
+        :param sources: The sources as a list of strings.
+        :param probe: A function taking a source, which raises an exception
+            if the source cannot be reached.
+        :param timeout: The number of seconds to wait for an answer.
+        :return: The first source to answer as a string, or None if no
+            source answered before the timeout.
+        """
+        answers = Queue()
+
+        def run(source):
+            try:
+                probe(source)
+            except Exception:
+                answers.put(None)
+            else:
+                answers.put(source)
+
+        for source in sources:
+            thread = threading.Thread(target=run, args=(source,))
+            thread.daemon = True
+            thread.start()
+
+        deadline = time.time() + timeout
+
+        for _ in sources:
+            try:
+                source = answers.get(
+                    timeout=max(0, deadline - time.time()))
+            except Empty:
+                return None
+
+            if source is not None:
+                return source
+
+        return None
+
+    def __read(self):
+        """ Reads the ranking the first time it is needed.
+
+        The lock must be held by the caller.
+        """
+        if self.history is not None:
+            return self.history
+
+        history = None
+        path = self.__ranking_path()
+
+        if os.path.isfile(path):
+            try:
+                with open(path, 'r') as ranking_file:
+                    history = json.load(ranking_file)
+            except ValueError:
+                history = None
+
+        if not isinstance(history, dict):
+            history = {}
+
+        self.history = history
+        return self.history
+
+    def __write(self):
+        """ Writes the ranking. The lock must be held by the caller. """
+
+        fd, temp_path = tempfile.mkstemp(
+            prefix=self.RANKING_FILE + '.', suffix='.tmp',
+            dir=self.resolve_path)
+
+        try:
+            with os.fdopen(fd, 'w') as temp_file:
+                json.dump(self.history, temp_file, indent=4, sort_keys=True)
+
+            replace(source=temp_path, destination=self.__ranking_path())
+        except Exception:
+            if os.path.isfile(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def __ranking_path(self):
+        return os.path.join(self.resolve_path, self.RANKING_FILE)
+
+    def __repr__(self):
+        """
+        :return: Representation of this object as a string
+        """
+        return "%s(resolve_path=%r)" % (
+            self.__class__.__name__, self.resolve_path)
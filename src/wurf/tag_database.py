@@ -1,47 +1,107 @@
 #! /usr/bin/env python
 # encoding: utf-8
 
+import os
 import json
+import time
+import threading
+
+from .resolve_profile import profile_span
 
 
 class TagDatabase(object):
+    """ Provides the tags registered for the Steinwurf projects.
+
+    The tags are downloaded from the tags.json file at the given URL. A copy
+    is cached on disk and used without contacting the server until it is
+    older than the time-to-live. After that the copy is revalidated using
+    the ETag and Last-Modified headers, so the file is only downloaded again
+    if it changed.
+
+    If the server cannot be reached, the cached copy is used. To avoid
+    waiting for the timeout in every configure, the server is not contacted
+    again until the retry interval has passed.
+    """
+
+    # The URL of the public tag database
+    URL = "http://files.steinwurf.com/registry/tags.json"
+
+    # Seconds the cached tags are used without contacting the server
+    TTL = 3600
+
+    # Seconds to wait for the server before falling back to the cache
+    TIMEOUT = 2
+
+    # Seconds to wait before contacting the server again after a failure
+    RETRY_INTERVAL = 300
 
-    def __init__(self, ctx):
+    def __init__(self, ctx, cache_path, url=None, ttl=TTL, timeout=TIMEOUT,
+                 resolve_profile=None):
         """ Construct an instance.
 
         :param ctx: A Waf Context instance.
+        :param cache_path: The path to the file where the downloaded tags
+            are cached as a string.
+        :param url: The URL of the tags.json file as a string. This may also
+            be a file:// URL or a path to a local file. If None the public
+            URL is used.
+        :param ttl: The number of seconds the cached tags are used without
+            contacting the server.
+        :param timeout: The number of seconds to wait for the server.
+        :param resolve_profile: A ResolveProfile instance used to record the
+            download of the tags, or None.
         """
         self.ctx = ctx
+        self.cache_path = cache_path
+        self.url = url if url else TagDatabase.URL
+        self.ttl = ttl
+        self.timeout = timeout
+        self.resolve_profile = resolve_profile
         self.tags = None
 
+        # The tags may be requested from several resolves running in
+        # parallel, but we only want to download them once
+        self.lock = threading.Lock()
+
     def download_tags(self):
         """
         Download the tag information.
         """
-        # Retrieve tags.json from the public URL
-        url = "http://files.steinwurf.com/registry/tags.json"
+        cache = self.__read_cache()
+        now = time.time()
 
-        # Import tools to be compatible with Python 2 and 3
-        try:
-            from urllib.request import urlopen, Request
-        except ImportError:
-            from urllib2 import urlopen, Request
+        if cache and now - cache['time'] < self.ttl:
+            self.ctx.to_log("Using cached tags from {}\n".format(
+                self.cache_path))
+            self.tags = cache['tags']
+            return
+
+        if cache and now - cache.get('failed', 0) < self.RETRY_INTERVAL:
+            self.ctx.to_log("Tag database unreachable, using cached tags\n")
+            self.tags = cache['tags']
+            return
 
         try:
-            # Fetch the json file from the given url
-            req = Request(url)
-            response = urlopen(req)
-            tags_json = response.read()
-            self.ctx.to_log(
-                "Tags downloaded. File size: {}\n".format(len(tags_json)))
-            self.tags = json.loads(tags_json)
+            with profile_span(resolve_profile=self.resolve_profile,
+                              name='tag database', category='http',
+                              args={'url': self.url}):
+
+                self.tags = self.__fetch(cache=cache, now=now)
         except Exception:
-            self.tags = {}
             # Log the exception, including the traceback information
             self.ctx.logger.debug(
-                "Could not fetch tags.json from: {}".format(url),
+                "Could not fetch tags.json from: {}".format(self.url),
                 exc_info=True)
 
+            if cache is None:
+                cache = {'url': self.url, 'tags': {}, 'time': 0,
+                         'etag': None, 'last_modified': None}
+
+            cache['failed'] = now
+            self.__write_cache(cache=cache)
+
+            self.tags = cache['tags']
+
     def project_tags(self, project_name):
         """
         Return the tag information for the given project name.
@@ -49,8 +109,9 @@ class TagDatabase(object):
         :param project_name: The project name to query.
         """
         # Download the tag info - this should be done only once!
-        if self.tags is None:
-            self.download_tags()
+        with self.lock:
+            if self.tags is None:
+                self.download_tags()
 
         if project_name in self.tags:
             self.ctx.to_log("Registered tags for {}:\n{}".format(
@@ -59,3 +120,92 @@ class TagDatabase(object):
         else:
             self.ctx.to_log("No registered tags for {}.".format(project_name))
             return None
+
+    def __fetch(self, cache, now):
+        """ Fetches the tags from the URL, revalidating the cached tags.
+
+        :return: The tags as a dict
+        """
+        if os.path.isfile(self.url):
+            # A local stand-in for the tag database
+            with open(self.url, 'rb') as tags_file:
+                tags_json = tags_file.read()
+
+            self.ctx.to_log("Tags read from {}\n".format(self.url))
+            return json.loads(tags_json.decode('utf-8'))
+
+        # Import tools to be compatible with Python 2 and 3
+        try:
+            from urllib.request import urlopen, Request
+            from urllib.error import HTTPError
+        except ImportError:
+            from urllib2 import urlopen, Request, HTTPError
+
+        request = Request(self.url)
+
+        if cache:
+            if cache.get('etag'):
+                request.add_header('If-None-Match', cache['etag'])
+            if cache.get('last_modified'):
+                request.add_header('If-Modified-Since', cache['last_modified'])
+
+        try:
+            response = urlopen(request, timeout=self.timeout)
+        except HTTPError as e:
+            if e.code != 304 or not cache:
+                raise
+
+            # The cached tags are still valid
+            self.ctx.to_log("Tags not modified since {}\n".format(
+                cache.get('last_modified')))
+
+            cache['time'] = now
+            cache.pop('failed', None)
+            self.__write_cache(cache=cache)
+
+            return cache['tags']
+
+        try:
+            tags_json = response.read()
+            headers = response.info()
+        finally:
+            response.close()
+
+        self.ctx.to_log(
+            "Tags downloaded. File size: {}\n".format(len(tags_json)))
+
+        tags = json.loads(tags_json.decode('utf-8'))
+
+        self.__write_cache(cache={
+            'url': self.url, 'tags': tags, 'time': now,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified')})
+
+        return tags
+
+    def __read_cache(self):
+        """ :return: The cached tags for the URL as a dict or None. """
+
+        if not os.path.isfile(self.cache_path):
+            return None
+
+        try:
+            with open(self.cache_path, 'r') as cache_file:
+                cache = json.load(cache_file)
+        except ValueError:
+            return None
+
+        if cache.get('url') != self.url:
+            return None
+
+        return cache
+
+    def __write_cache(self, cache):
+
+        cache_dir = os.path.dirname(self.cache_path)
+
+        if cache_dir and not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+
+        with open(self.cache_path, 'w') as cache_file:
+            json.dump(cache, cache_file, indent=4, sort_keys=True)
@@ -0,0 +1,81 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+
+class TraceResolver(object):
+    """ Records the time used by a resolver in the ResolveProfile. """
+
+    # The attributes of a resolver which refer to the resolvers it uses
+    CHAIN_ATTRIBUTES = ('resolver', 'git_resolver', 'resolvers')
+
+    def __init__(self, resolver, resolve_profile, dependency):
+        """ Construct an instance.
+
+        :param resolver: A resolver instance
+        :param resolve_profile: A ResolveProfile instance
+        :param dependency: A Dependency instance
+        """
+        self.resolver = resolver
+        self.resolve_profile = resolve_profile
+        self.dependency = dependency
+
+    def resolve(self):
+        """ Resolve the dependency.
+
+        :return: Path to resolved dependency as a string
+        """
+        with self.resolve_profile.span(
+                name=self.resolver.__class__.__name__, category='resolver',
+                args={'dependency': self.dependency.name}):
+
+            return self.resolver.resolve()
+
+    def __getattr__(self, name):
+        """ Forward all other attributes to the resolver, e.g. the
+        master_path() of a GitResolver.
+        """
+        return getattr(self.resolver, name)
+
+    @staticmethod
+    def trace_chain(resolver, resolve_profile, dependency):
+        """ Wraps every resolver in a resolve chain in a TraceResolver.
+
+        The resolvers used by a resolver are found in its CHAIN_ATTRIBUTES
+        and replaced by TraceResolvers. Resolvers may be shared between
+        chains, but a resolver which is already traced is not traced again.
+
+        :param resolver: The first resolver of the chain.
+        :param resolve_profile: A ResolveProfile instance
+        :param dependency: A Dependency instance
+        :return: The TraceResolver wrapping the first resolver.
+        """
+        if isinstance(resolver, TraceResolver):
+            return resolver
+
+        for attribute in TraceResolver.CHAIN_ATTRIBUTES:
+
+            value = getattr(resolver, attribute, None)
+
+            if value is None:
+                continue
+
+            if isinstance(value, list):
+                value = [TraceResolver.trace_chain(
+                    resolver=r, resolve_profile=resolve_profile,
+                    dependency=dependency) for r in value]
+            else:
+                value = TraceResolver.trace_chain(
+                    resolver=value, resolve_profile=resolve_profile,
+                    dependency=dependency)
+
+            setattr(resolver, attribute, value)
+
+        return TraceResolver(resolver=resolver,
+                             resolve_profile=resolve_profile,
+                             dependency=dependency)
+
+    def __repr__(self):
+        """
+        :return: Representation of this object as a string
+        """
+        return "%s(%r)" % (self.__class__.__name__, self.resolver)
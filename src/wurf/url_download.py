@@ -3,22 +3,88 @@
 
 import cgi
 import os
+import json
+import hashlib
 
 from .compat import IS_PY2
+from .compat import replace
+from .connection_pool import ConnectionPool
+from .resolve_scheduler import ResolveScheduler
+from .resolve_profile import profile_span
+from .error import Error
+from .error import HttpError
 
 if IS_PY2:
 
     # Python 2
+    from urllib import getproxies
+    from urllib import proxy_bypass
     from urllib2 import urlopen
+    from urllib2 import Request
+    from urllib2 import HTTPError
     from urlparse import urlparse
+    from urlparse import urljoin
 else:
 
     # Python 3
+    from urllib.request import getproxies
+    from urllib.request import proxy_bypass
     from urllib.request import urlopen
+    from urllib.request import Request
+    from urllib.error import HTTPError
     from urllib.parse import urlparse
+    from urllib.parse import urljoin
 
 
 class UrlDownload(object):
+    """ Downloads files over HTTP.
+
+    The HTTP and HTTPS connections are kept alive in a ConnectionPool, such
+    that several files downloaded from the same host reuse the connection.
+    Downloads can be submitted to a bounded pool of threads, which allows
+    several files to be downloaded at the same time.
+
+    Other URLs e.g. file:// URLs, or URLs which should be fetched through a
+    proxy, are opened with urlopen(...).
+
+    The ETag and Last-Modified headers of a downloaded file are stored in a
+    stamp next to it. When the file is downloaded again, the server is asked
+    whether it changed, so an unchanged file is not downloaded again.
+    """
+
+    # The number of bytes read from the response at a time
+    BUFFER_SIZE = 64 * 1024
+
+    # The maximum number of redirects followed for a download
+    MAX_REDIRECTS = 10
+
+    # The name of the stamp stored in the folder of the downloaded file
+    STAMP_FILE = '.download.stamp.json'
+
+    def __init__(self, connection_pool=None, buffer_size=BUFFER_SIZE,
+                 jobs=1, retry_policy=None, resolve_profile=None):
+        """ Construct an instance.
+
+        :param connection_pool: A ConnectionPool instance, if None a new
+            pool is created.
+        :param buffer_size: The number of bytes read from the response at a
+            time as an int.
+        :param jobs: The maximum number of concurrent downloads started with
+            submit(...) as an int.
+        :param retry_policy: A RetryPolicy instance, or None to download
+            the files once without a timeout.
+        :param resolve_profile: A ResolveProfile instance used to record the
+            downloads, or None.
+        """
+        if connection_pool is None:
+            timeout = retry_policy.timeout if retry_policy else None
+            connection_pool = ConnectionPool(timeout=timeout)
+
+        self.connection_pool = connection_pool
+        self.buffer_size = buffer_size
+        self.scheduler = ResolveScheduler(jobs=jobs)
+        self.retry_policy = retry_policy
+        self.resolve_profile = resolve_profile
 
     def _url_filename(self, url):
         """ Based on the url return the filename it contains or None if no
@@ -52,7 +118,10 @@ class UrlDownload(object):
         header.
         """
         # Try to get the file name from the headers
-        header = response.info().get('Content-Disposition', '')
+        if hasattr(response, 'getheader'):
+            header = response.getheader('Content-Disposition', '')
+        else:
+            header = response.info().get('Content-Disposition', '')
 
         if not header:
             return None
@@ -60,15 +129,201 @@ class UrlDownload(object):
         _, params = cgi.parse_header(header)
         return params.get('filename', None)
 
-    def download(self, cwd, source, filename=None):
+    def submit(self, cwd, source, filename=None, sha256=None):
+        """ Submit a download to the pool of concurrent downloads.
+
+        The arguments are the same as for download(...).
+
+        :return: A ResolveJob instance, the result of the job is the path to
+            the downloaded file.
+        """
+        return self.scheduler.submit(
+            lambda: self.download(cwd=cwd, source=source, filename=filename,
+                                  sha256=sha256))
+
+    def download(self, cwd, source, filename=None, sha256=None):
         """ Download the file specified by the source.
 
+        The file is downloaded to a temporary file, which is renamed when the
+        download is complete. The SHA256 digest is computed while the file is
+        written.
+
+        If the file was downloaded to the folder before and was not modified
+        since, the download is skipped if the server answers that the file
+        did not change.
+
         :param cwd: The directory where to download the file.
         :param source: The URL of the file to download.
         :param filename: The filename to store the file under.
+        :param sha256: The expected SHA256 digest of the file as a hex
+            string, or None if the file should not be verified.
+        """
+
+        stamp = self.__read_stamp(cwd=cwd, source=source, filename=filename,
+                                  sha256=sha256)
+
+        headers = {}
+
+        if stamp and stamp.get('etag'):
+            headers['If-None-Match'] = stamp['etag']
+
+        if stamp and stamp.get('last_modified'):
+            headers['If-Modified-Since'] = stamp['last_modified']
+
+        def fetch():
+            response, release = self.__open(source=source, headers=headers)
+
+            if response is None:
+                # The file was not modified
+                return None
+
+            try:
+                return self.__write(cwd=cwd, source=source,
+                                    filename=filename, response=response)
+            finally:
+                release()
+
+        with profile_span(resolve_profile=self.resolve_profile,
+                          name='download', category='http',
+                          args={'url': source}):
+
+            if self.retry_policy:
+                result = self.retry_policy.run(
+                    description='Download of {}'.format(source),
+                    function=fetch, is_transient=_is_transient)
+            else:
+                result = fetch()
+
+        if result is None:
+            return os.path.join(cwd, stamp['filename'])
+
+        filepath, temppath, digest, validators = result
+
+        if sha256 and digest != sha256.lower():
+            os.remove(temppath)
+            raise Error('Checksum mismatch for {}: expected sha256 {} but '
+                        'got {}'.format(source, sha256, digest))
+
+        replace(source=temppath, destination=filepath)
+
+        self.__write_stamp(cwd=cwd, source=source, filepath=filepath,
+                           digest=digest, validators=validators)
+
+        return filepath
+
+    def probe(self, source):
+        """ Reads the first byte of the file specified by the source.
+
+        This is used to check how fast a source answers, without
+        downloading the file.
+
+        :param source: The URL of the file.
+        """
+        response, release = self.__open(source=source, headers={})
+
+        try:
+            response.read(1)
+        finally:
+            release()
+
+    def __open(self, source, headers):
+        """ Opens the URL, following redirects.
+
+        :param headers: A dict with additional headers e.g. If-None-Match.
+        :return: A tuple (response, release) where release is a function
+            which must be called when the response has been read. If the
+            server answered 304 Not Modified the tuple is (None, None).
+        """
+        url = source
+
+        for _ in range(self.MAX_REDIRECTS + 1):
+
+            parsed = urlparse(url)
+
+            if not self.__use_pool(parsed=parsed):
+                request = Request(url, headers=headers)
+
+                try:
+                    if self.connection_pool.timeout:
+                        response = urlopen(
+                            request, timeout=self.connection_pool.timeout)
+                    else:
+                        response = urlopen(request)
+                except HTTPError as e:
+                    if e.code != 304:
+                        raise
+
+                    e.close()
+                    return None, None
+
+                return response, response.close
+
+            path = parsed.path if parsed.path else '/'
+
+            if parsed.query:
+                path += '?' + parsed.query
+
+            connection, response = self.connection_pool.request(
+                method='GET', scheme=parsed.scheme, netloc=parsed.netloc,
+                path=path, headers=headers)
+
+            if response.status == 304:
+                response.read()
+                self.connection_pool.release(connection, response)
+                return None, None
+
+            if response.status in (301, 302, 303, 307, 308):
+
+                location = response.getheader('Location')
+
+                # Read the body, such that the connection can be reused
+                response.read()
+                self.connection_pool.release(connection, response)
+
+                if not location:
+                    raise Error('Download of {} failed: redirect without '
+                                'a location'.format(source))
+
+                url = urljoin(url, location)
+                continue
+
+            if response.status != 200:
+                self.connection_pool.release(connection, response)
+
+                raise HttpError('Download of {} failed: HTTP {} {}'.format(
+                    source, response.status, response.reason),
+                    status=response.status)
+
+            def release():
+                self.connection_pool.release(connection, response)
+
+            return response, release
+
+        raise Error('Download of {} failed: too many redirects'.format(
+            source))
+
+    def __use_pool(self, parsed):
+        """ :return: True if the URL should be opened with a pooled
+            connection.
         """
+        if parsed.scheme not in ('http', 'https'):
+            return False
+
+        # The pooled connections do not support proxies
+        if getproxies().get(parsed.scheme) and \
+                not proxy_bypass(parsed.hostname):
+            return False
 
-        response = urlopen(url=source)
+        return True
+
+    def __write(self, cwd, source, filename, response):
+        """ Writes the response to a temporary file.
+
+        :return: A tuple (filepath, temppath, digest, validators) with the
+            path of the file, the path of the temporary file, the SHA256
+            digest of the content and a dict with the ETag and Last-Modified
+            headers of the response.
+        """
 
         if not filename:
             filename = self._url_filename(source)
@@ -80,14 +335,113 @@ class UrlDownload(object):
         assert os.path.isdir(cwd)
 
         filepath = os.path.join(cwd, filename)
+        temppath = filepath + '.part'
 
-        # From http://stackoverflow.com/a/1517728
-        CHUNK = 16 * 1024
-        with open(filepath, 'wb') as f:
-            while True:
-                chunk = response.read(CHUNK)
-                if not chunk:
-                    break
-                f.write(chunk)
+        digest = hashlib.sha256()
 
-        return filepath
+        try:
+            with open(temppath, 'wb') as f:
+                while True:
+                    chunk = response.read(self.buffer_size)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    f.write(chunk)
+        except Exception:
+            if os.path.isfile(temppath):
+                os.remove(temppath)
+            raise
+
+        if hasattr(response, 'getheader'):
+            etag = response.getheader('ETag')
+            last_modified = response.getheader('Last-Modified')
+        else:
+            etag = response.info().get('ETag')
+            last_modified = response.info().get('Last-Modified')
+
+        validators = {'etag': etag, 'last_modified': last_modified}
+
+        return filepath, temppath, digest.hexdigest(), validators
+
+    def __read_stamp(self, cwd, source, filename, sha256):
+        """ Reads the stamp of a file downloaded to the folder before.
+
+        :return: The stamp as a dict, or None if the file must be downloaded
+            e.g. because it was modified or has a different digest.
+        """
+        stamp_path = os.path.join(cwd, UrlDownload.STAMP_FILE)
+
+        if not os.path.isfile(stamp_path):
+            return None
+
+        try:
+            with open(stamp_path, 'r') as stamp_file:
+                stamp = json.load(stamp_file)
+        except ValueError:
+            return None
+
+        if stamp.get('source') != source:
+            return None
+
+        if filename and stamp.get('filename') != filename:
+            return None
+
+        if sha256 and stamp.get('sha256') != sha256.lower():
+            return None
+
+        filepath = os.path.join(cwd, stamp.get('filename', ''))
+
+        if not os.path.isfile(filepath):
+            return None
+
+        # The file must not have been modified since it was downloaded
+        stat = os.stat(filepath)
+
+        if stamp.get('size') != stat.st_size or \
+                stamp.get('mtime') != stat.st_mtime:
+            return None
+
+        return stamp
+
+    def __write_stamp(self, cwd, source, filepath, digest, validators):
+        """ Writes the stamp of a downloaded file. """
+
+        stamp_path = os.path.join(cwd, UrlDownload.STAMP_FILE)
+
+        # Only HTTP servers can tell whether the file changed
+        http = urlparse(source).scheme in ('http', 'https')
+
+        if not http or \
+                (not validators['etag'] and not validators['last_modified']):
+
+            if os.path.isfile(stamp_path):
+                os.remove(stamp_path)
+            return
+
+        stat = os.stat(filepath)
+
+        stamp = {'source': source, 'filename': os.path.basename(filepath),
+                 'sha256': digest, 'size': stat.st_size,
+                 'mtime': stat.st_mtime}
+        stamp.update(validators)
+
+        with open(stamp_path, 'w') as stamp_file:
+            json.dump(stamp, stamp_file, indent=4, sort_keys=True)
+
+    def __repr__(self):
+        """
+        :return: Representation of this object as a string
+        """
+        return "%s(buffer_size=%r, jobs=%r, retry_policy=%r)" % (
+            self.__class__.__name__, self.buffer_size, self.scheduler.jobs,
+            self.retry_policy)
+
+
+def _is_transient(error):
+    """ :return: False if retrying a download will not help, i.e. if the
+        server answered with a client error such as 404 Not Found.
+    """
+    if isinstance(error, HttpError):
+        return error.status >= 500
+
+    return True
@@ -3,6 +3,7 @@
 
 import os
 import sys
+import threading
 
 from waflib import Utils
 from waflib import Context
@@ -12,8 +13,11 @@ from waflib import Logs
 from waflib.Errors import WafError
 
 from . import registry
+from .configuration import Configuration
 from .error import CmdAndLogError
 from .error import Error
+from .resolve_profile import profile_phase
+from .resolve_profile import profile_span
 
 from waflib.extras import semver
 from waflib.extras import archive
@@ -41,6 +45,13 @@ class WafResolveContext(Context.Context):
         """ Create a WafResolveContext"""
         super(WafResolveContext, self).__init__(**kw)
 
+        # Dependencies may be resolved from several threads, this lock
+        # protects the node tree which is not thread-safe
+        self.node_lock = threading.Lock()
+
+        # The ResolveProfile if the resolve is profiled
+        self.resolve_profile = None
+
     def execute(self):
 
         # Check whether the main wscript has a resolve function defined,
@@ -89,13 +100,51 @@ class WafResolveContext(Context.Context):
         self.logger.debug('wurf: Resolve execute {}'.format(
             configuration.resolver_chain()))
 
+        # Without configure, the dependencies can be loaded from the snapshot
+        # stored by the last configure, if the wscripts did not change
+        if configuration.resolver_chain() == Configuration.LOAD and \
+                self.__load_snapshot():
+            return
+
         self.dependency_manager = self.registry.require('dependency_manager')
 
+        # The wscript and resolve.json files are recorded in post_recurse
+        self.resolve_snapshot = self.registry.require('resolve_snapshot')
+
+        # The profile is written even if the resolve fails
+        self.resolve_profile = self.registry.require('resolve_profile')
+
+        try:
+            self.__resolve()
+        finally:
+            if self.resolve_profile:
+                self.resolve_profile.write()
+                self.logger.debug('wurf: Resolve profile written to {}'.format(
+                    self.resolve_profile.path))
+
+    def __resolve(self):
+        """ Resolves the dependencies, by recursing into the wscripts. """
+
         try:
-            # Calling the context execute will call the resolve(...) functions
-            # in the wscripts. These will in turn call add_dependency(...)
-            # which will trigger loading the dependency.
-            super(WafResolveContext, self).execute()
+            # If needed execute any actions which must run before the
+            # wscripts are recursed, e.g. discovering the dependency graph
+            with profile_phase(self.resolve_profile, 'pre_resolve'):
+                pre_resolver_actions = self.registry.require(
+                    'pre_resolver_actions')
+
+                for action in pre_resolver_actions:
+                    action()
+
+            with profile_phase(self.resolve_profile, 'resolve'):
+                # Calling the context execute will call the resolve(...)
+                # functions in the wscripts. These will in turn call
+                # add_dependency(...) which will trigger loading the
+                # dependency.
+                super(WafResolveContext, self).execute()
+
+                # Finish the dependencies of the top-level wscript which may
+                # still be resolving in the background
+                self.dependency_manager.resolve_pending()
 
         except Error as e:
             self.logger.debug("Error in resolve:\n", exc_info=True)
@@ -111,10 +160,50 @@ class WafResolveContext(Context.Context):
 
         # If needed execute any actions which cannot run until after the
         # dependency resolution has completed
-        post_resolver_actions = self.registry.require('post_resolver_actions')
+        with profile_phase(self.resolve_profile, 'post_resolve'):
+            post_resolver_actions = self.registry.require(
+                'post_resolver_actions')
+
+            for action in post_resolver_actions:
+                action()
 
-        for action in post_resolver_actions:
-            action()
+        # Log the statistics of the registry caches, this shows which of the
+        # providers are built over and over again
+        statistics = self.registry.cache_statistics()
+
+        for name in sorted(statistics, key=lambda n: -statistics[n]['time']):
+            self.logger.debug(
+                'wurf: Registry cache {}: hits={hits} misses={misses} '
+                'evictions={evictions} size={size} time={time:.3f}s'.format(
+                    name, **statistics[name]))
+
+    def __load_snapshot(self):
+        """ Loads the dependency_cache from the resolve snapshot.
+
+        :return: True if the snapshot was valid, otherwise False.
+        """
+        snapshot = self.registry.require('resolve_snapshot')
+        dependencies = snapshot.load(args=self.registry.require('args'))
+
+        if dependencies is None:
+            return False
+
+        global dependency_cache
+        dependency_cache = dependencies
+
+        self.logger.debug('wurf: dependency_cache loaded from snapshot '
+                          '{}'.format(dependency_cache))
+
+        return True
+
+    def recurse(self, dirs, **kwargs):
+        """ Recurses into the wscripts in the directories, recording the
+        time used if the resolve is profiled.
+        """
+        with profile_span(self.resolve_profile, name='recurse',
+                          category='wscript', args={'dirs': str(dirs)}):
+
+            super(WafResolveContext, self).recurse(dirs, **kwargs)
 
     def post_recurse(self, node):
         # As the last step in recurse, try to load the dependencies from the
@@ -125,6 +214,10 @@ class WafResolveContext(Context.Context):
         self.dependency_manager.load_dependencies(self.path.abspath(),
                                                   mandatory=False)
 
+        self.resolve_snapshot.add_file(node.abspath())
+        self.resolve_snapshot.add_file(
+            os.path.join(self.path.abspath(), 'resolve.json'))
+
         super(WafResolveContext, self).post_recurse(node)
 
     def is_toplevel(self):
@@ -151,12 +244,18 @@ class WafResolveContext(Context.Context):
         # other parts of the code.
         if 'cwd' in kwargs:
             cwd = kwargs['cwd']
-            kwargs['cwd'] = self.root.find_dir(str(cwd))
+            with self.node_lock:
+                kwargs['cwd'] = self.root.find_dir(str(cwd))
             assert kwargs['cwd']
 
         try:
-            return super(WafResolveContext, self).cmd_and_log(
-                cmd=cmd, **kwargs)
+            with profile_span(self.resolve_profile, name=' '.join(cmd[:2]),
+                              category='subprocess',
+                              args={'cmd': ' '.join(cmd),
+                                    'cwd': str(kwargs.get('cwd'))}):
+
+                return super(WafResolveContext, self).cmd_and_log(
+                    cmd=cmd, **kwargs)
         except WafError as e:
             # @todo Do we need to include the traceback to the original
             # exception here? See: http://bit.ly/2njVD5V
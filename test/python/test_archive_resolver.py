@@ -1,9 +1,16 @@
 import mock
 import os
+import pytest
 
 from wurf.archive_resolver import ArchiveResolver
 
 
+def extract(path, to_path):
+    with open(os.path.join(to_path, 'content.txt'), 'wb') as f:
+        with open(path, 'rb') as archive:
+            f.write(archive.read())
+
+
 def test_archive_resolver(testdirectory):
 
     resolve_path = testdirectory.mkdir('resolved')
@@ -13,7 +20,7 @@ def test_archive_resolver(testdirectory):
     parent_resolver = mock.Mock()
     parent_resolver.resolve = mock.Mock(return_value=resolve_file)
 
-    archive_extractor = mock.Mock()
+    archive_extractor = mock.Mock(side_effect=extract)
 
     resolver = ArchiveResolver(archive_extractor=archive_extractor,
                                resolver=parent_resolver,
@@ -21,4 +28,64 @@ def test_archive_resolver(testdirectory):
 
     path = resolver.resolve()
 
-    archive_extractor.assert_called_once_with(path=resolve_file, to_path=path)
+    assert archive_extractor.call_count == 1
+    _, kwargs = archive_extractor.call_args
+    assert kwargs['path'] == resolve_file
+
+    # The archive is extracted to a temporary folder which is renamed
+    assert kwargs['to_path'] != path
+    assert not os.path.exists(kwargs['to_path'])
+
+    assert os.path.isfile(os.path.join(path, 'content.txt'))
+    assert os.path.isfile(path + '.stamp.json')
+
+    # The archive did not change, so it is not extracted again
+    assert resolver.resolve() == path
+    assert archive_extractor.call_count == 1
+
+    # A new extractor version extracts the archive again
+    resolver.EXTRACTOR_VERSION = ArchiveResolver.EXTRACTOR_VERSION + 1
+
+    assert resolver.resolve() == path
+    assert archive_extractor.call_count == 2
+
+    # A changed archive is extracted to a new folder
+    resolve_path.write_binary('ok.zip', b'foobarbaz2')
+
+    new_path = resolver.resolve()
+    assert new_path != path
+    assert archive_extractor.call_count == 3
+
+    with open(os.path.join(new_path, 'content.txt'), 'rb') as f:
+        assert f.read() == b'foobarbaz2'
+
+
+def test_archive_resolver_interrupted(testdirectory):
+
+    resolve_path = testdirectory.mkdir('resolved')
+    resolve_path.write_binary('ok.zip', b'foobarbaz')
+    resolve_file = os.path.join(resolve_path.path(), 'ok.zip')
+
+    parent_resolver = mock.Mock()
+    parent_resolver.resolve = mock.Mock(return_value=resolve_file)
+
+    def fail(path, to_path):
+        extract(path=path, to_path=to_path)
+        raise RuntimeError('interrupted')
+
+    archive_extractor = mock.Mock(side_effect=fail)
+
+    resolver = ArchiveResolver(archive_extractor=archive_extractor,
+                               resolver=parent_resolver,
+                               cwd=testdirectory.path())
+
+    with pytest.raises(RuntimeError):
+        resolver.resolve()
+
+    # Nothing is left behind
+    assert os.listdir(testdirectory.path()) == ['resolved']
+
+    archive_extractor.side_effect = extract
+
+    path = resolver.resolve()
+    assert os.path.isfile(os.path.join(path, 'content.txt'))
@@ -0,0 +1,82 @@
+import mock
+import socket
+
+from wurf.connection_pool import ConnectionPool
+
+
+def test_connection_pool():
+
+    with mock.patch('wurf.connection_pool.http_client') as http_client:
+
+        http_client.HTTPException = Exception
+
+        connection = mock.Mock()
+        response = connection.getresponse.return_value
+        response.will_close = False
+        response.isclosed.return_value = True
+
+        http_client.HTTPSConnection.return_value = connection
+
+        pool = ConnectionPool()
+
+        c, r = pool.request(method='GET', scheme='https',
+                            netloc='example.com', path='/file.zip')
+
+        assert c is connection
+        assert r is response
+
+        http_client.HTTPSConnection.assert_called_once_with('example.com')
+        connection.request.assert_called_once_with(
+            'GET', '/file.zip', headers={})
+
+        pool.release(connection, response)
+        assert not connection.close.called
+
+        # The idle connection is reused for the next request
+        c, r = pool.request(method='GET', scheme='https',
+                            netloc='example.com', path='/other.zip')
+
+        assert c is connection
+        assert http_client.HTTPSConnection.call_count == 1
+
+        # A response which was not read completely closes the connection
+        response.isclosed.return_value = False
+        pool.release(connection, response)
+
+        assert connection.close.called
+        assert pool.idle == {('https', 'example.com'): []}
+
+
+def test_connection_pool_closed_by_server():
+
+    with mock.patch('wurf.connection_pool.http_client') as http_client:
+
+        http_client.HTTPException = Exception
+
+        stale = mock.Mock()
+        stale.wurf_scheme = 'http'
+        stale.wurf_netloc = 'example.com'
+        stale.request.side_effect = socket.error('Connection reset')
+
+        connection = mock.Mock()
+        http_client.HTTPConnection.return_value = connection
+
+        pool = ConnectionPool()
+        pool.idle[('http', 'example.com')] = [stale]
+
+        c, r = pool.request(method='GET', scheme='http',
+                            netloc='example.com', path='/file.zip')
+
+        # The request is sent again on a new connection
+        assert c is connection
+        assert stale.close.called
+
+        response = mock.Mock()
+        response.will_close = True
+        pool.release(connection, response)
+
+        assert connection.close.called
+        assert pool.idle == {('http', 'example.com'): []}
+
+        pool.close()
+        assert pool.idle == {}
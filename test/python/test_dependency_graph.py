@@ -0,0 +1,144 @@
+import os
+import json
+
+import mock
+import pytest
+
+from wurf.dependency_graph import DependencyGraph
+from wurf.resolve_scheduler import ResolveScheduler
+from wurf.error import Error
+
+
+def git_dependency(name, checkout='1.0.0', **kwargs):
+    info = {'name': name, 'resolver': 'git', 'method': 'checkout',
+            'checkout': checkout,
+            'sources': ['github.com/acme/{}.git'.format(name)]}
+    info.update(kwargs)
+    return info
+
+
+def build_graph(testdirectory, repositories, pinned=()):
+    """ Builds a DependencyGraph using fake git repositories.
+
+    :param repositories: Dict mapping a dependency name to the content of
+        the resolve.json in its repository. A repository is only "cloned"
+        once it has been fetched.
+    :param pinned: List of the dependency names where the checkout is
+        available in the repository.
+    """
+
+    class FakeGitResolver(object):
+
+        def __init__(self, dependency):
+            self.dependency = dependency
+
+        def master_path(self):
+            return os.path.join(testdirectory.path(), self.dependency.name)
+
+        def resolve(self):
+            path = self.master_path()
+            if not os.path.isdir(path):
+                os.makedirs(path)
+            return path
+
+    class FakeRegistry(object):
+
+        def __init__(self):
+            self.values = {}
+
+        def provide_temporary(self):
+            temporary = mock.MagicMock()
+            temporary.__enter__.return_value.provide_value = \
+                self.values.__setitem__
+            return temporary
+
+        def require(self, provider_name):
+            assert provider_name == 'git_resolver'
+            return FakeGitResolver(dependency=self.values['dependency'])
+
+    def show(ref, path, cwd):
+        assert path == 'resolve.json'
+        name = os.path.basename(cwd)
+        return json.dumps(repositories.get(name, []))
+
+    def is_pinned(checkout, cwd):
+        return os.path.basename(cwd) in pinned
+
+    git = mock.Mock()
+    git.show.side_effect = show
+    git.is_pinned.side_effect = is_pinned
+
+    return DependencyGraph(
+        registry=FakeRegistry(), ctx=mock.Mock(), git=git,
+        semver_selector=mock.Mock(),
+        resolve_scheduler=ResolveScheduler(jobs=2), args=[])
+
+
+def test_dependency_graph(testdirectory):
+
+    app = testdirectory.mkdir('app')
+    app.write_text('resolve.json', json.dumps(
+        [git_dependency('foo'), git_dependency('baz')]), encoding='utf-8')
+
+    repositories = {
+        'foo': [git_dependency('bar'),
+                git_dependency('gtest', internal=True)],
+        'bar': [git_dependency('baz')]
+    }
+
+    graph = build_graph(testdirectory=testdirectory.mkdir('resolve'),
+                        repositories=repositories)
+
+    nodes = graph.discover(path=app.path())
+
+    assert list(nodes.keys()) == ['foo', 'baz', 'bar']
+    assert graph.edges == {'foo': ['bar'], 'bar': ['baz']}
+    assert graph.fetched == set(['foo', 'bar', 'baz'])
+
+
+def test_dependency_graph_pinned(testdirectory):
+
+    app = testdirectory.mkdir('app')
+    app.write_text('resolve.json', json.dumps(
+        [git_dependency('foo'), git_dependency('baz')]), encoding='utf-8')
+
+    repositories = {
+        'foo': [git_dependency('bar')]
+    }
+
+    resolve = testdirectory.mkdir('resolve')
+
+    # The foo repository was cloned by a previous resolve
+    resolve.mkdir('foo')
+
+    graph = build_graph(testdirectory=resolve, repositories=repositories,
+                        pinned=['foo'])
+
+    nodes = graph.discover(path=app.path())
+
+    assert list(nodes.keys()) == ['foo', 'baz', 'bar']
+    assert graph.fetched == set(['bar', 'baz'])
+
+
+def test_dependency_graph_conflict(testdirectory):
+
+    app = testdirectory.mkdir('app')
+    app.write_text('resolve.json', json.dumps(
+        [git_dependency('foo'), git_dependency('baz')]), encoding='utf-8')
+
+    repositories = {
+        'foo': [git_dependency('baz', checkout='2.0.0')]
+    }
+
+    graph = build_graph(testdirectory=testdirectory.mkdir('resolve'),
+                        repositories=repositories)
+
+    with pytest.raises(Error):
+        graph.discover(path=app.path())
+
+
+def test_dependency_graph_no_resolve_json(testdirectory):
+
+    graph = build_graph(testdirectory=testdirectory, repositories={})
+
+    assert len(graph.discover(path=testdirectory.path())) == 0
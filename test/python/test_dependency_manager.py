@@ -1,8 +1,11 @@
+import os
 from collections import OrderedDict
 
 import mock
 
 from wurf.dependency_manager import DependencyManager
+from wurf.resolve_scheduler import ResolveScheduler
+from wurf.scheduled_resolver import ScheduledResolver
 
 
 def test_dependency_manager():
@@ -11,8 +14,95 @@ def test_dependency_manager():
     dependency_cache = OrderedDict()
     ctx = mock.Mock()
     options = mock.Mock()
+    resolve_scheduler = ResolveScheduler(jobs=1)
 
     DependencyManager(registry=registry, dependency_cache=dependency_cache,
-                      ctx=ctx, options=options)
+                      ctx=ctx, options=options,
+                      resolve_scheduler=resolve_scheduler)
 
     # @todo add tests
+
+
+def run_manager(testdirectory, jobs):
+    """ Resolves a small dependency graph and returns the dependency_cache.
+
+    The graph has the following layout, where 'baz' is defined both by the
+    top-level and by 'foo':
+
+        top-level -> foo, baz
+        foo -> bar, baz
+    """
+
+    children = {'foo': ['bar', 'baz'], 'bar': [], 'baz': []}
+
+    for name in children:
+        testdirectory.mkdir(name)
+
+    resolve_scheduler = ResolveScheduler(jobs=jobs)
+
+    class FakeResolver(object):
+
+        def __init__(self, dependency):
+            self.dependency = dependency
+
+        def resolve(self):
+            return os.path.join(testdirectory.path(), self.dependency.name)
+
+    class FakeRegistry(object):
+
+        def __init__(self):
+            self.values = {}
+
+        def provide_temporary(self):
+            temporary = mock.MagicMock()
+            temporary.__enter__.return_value.provide_value = \
+                self.values.__setitem__
+            return temporary
+
+        def require(self, provider_name):
+            assert provider_name == 'dependency_resolver'
+            resolver = FakeResolver(dependency=self.values['dependency'])
+
+            if resolve_scheduler.jobs > 1:
+                resolver = ScheduledResolver(
+                    resolver=resolver, resolve_scheduler=resolve_scheduler)
+
+            return resolver
+
+    registry = FakeRegistry()
+
+    dependency_cache = OrderedDict()
+    ctx = mock.Mock()
+    options = mock.Mock()
+
+    manager = DependencyManager(
+        registry=registry, dependency_cache=dependency_cache,
+        ctx=ctx, options=options, resolve_scheduler=resolve_scheduler)
+
+    def add(name):
+        manager.add_dependency(name=name, resolver='git', method='checkout',
+                               checkout='1.0.0',
+                               sources=['github.com/acme/' + name])
+
+    def recurse(paths, mandatory):
+        name = os.path.basename(paths[0])
+        for child in children[name]:
+            add(child)
+
+    ctx.recurse.side_effect = recurse
+
+    add('foo')
+    add('baz')
+    manager.resolve_pending()
+
+    return dependency_cache
+
+
+def test_dependency_manager_parallel_order(testdirectory):
+
+    sequential = run_manager(testdirectory=testdirectory, jobs=1)
+    parallel = run_manager(testdirectory=testdirectory, jobs=4)
+
+    assert list(sequential.keys()) == ['foo', 'bar', 'baz']
+    assert list(parallel.keys()) == list(sequential.keys())
+    assert parallel == sequential
@@ -0,0 +1,56 @@
+import os
+import hashlib
+
+from wurf.download_cache import DownloadCache
+
+
+def test_download_cache(testdirectory):
+
+    cachedir = testdirectory.mkdir('cache')
+    download_cache = DownloadCache(cache_path=cachedir.path())
+
+    content = b'hello_world'
+    sha256 = hashlib.sha256(content).hexdigest()
+
+    assert download_cache.get(sha256=sha256) is None
+    assert download_cache.link(
+        sha256=sha256, folder_path=testdirectory.path()) is None
+
+    downloaddir = testdirectory.mkdir('download')
+    downloaddir.write_binary('file.zip', content)
+
+    cached = download_cache.add(
+        path=os.path.join(downloaddir.path(), 'file.zip'), sha256=sha256)
+
+    assert cached == os.path.join(
+        cachedir.path(), sha256[:2], sha256, 'file.zip')
+    assert download_cache.get(sha256=sha256) == cached
+
+    # Adding the file again returns the cached file
+    assert download_cache.add(
+        path=os.path.join(downloaddir.path(), 'file.zip'),
+        sha256=sha256) == cached
+
+    # The digest is not case sensitive
+    assert download_cache.get(sha256=sha256.upper()) == cached
+
+    # No temporary folders are left in the cache
+    assert os.listdir(os.path.dirname(cached)) == ['file.zip']
+    assert os.listdir(os.path.join(cachedir.path(), sha256[:2])) == [sha256]
+
+    projectdir = testdirectory.mkdir('project')
+
+    path = download_cache.link(sha256=sha256, folder_path=projectdir.path())
+    assert path == os.path.join(projectdir.path(), 'file.zip')
+
+    with open(path, 'rb') as f:
+        assert f.read() == content
+
+    # Linking again reuses the file
+    assert download_cache.link(
+        sha256=sha256, folder_path=projectdir.path()) == path
+
+    path = download_cache.link(sha256=sha256, folder_path=projectdir.path(),
+                               filename='foo.zip')
+    assert path == os.path.join(projectdir.path(), 'foo.zip')
+    assert os.path.isfile(path)
@@ -1,6 +1,7 @@
 import mock
 
 from wurf.existing_tag_resolver import ExistingTagResolver
+from wurf.resolve_manifest import ResolveManifest
 
 
 def test_existing_tag_resolver(testdirectory):
@@ -14,7 +15,8 @@ def test_existing_tag_resolver(testdirectory):
     dependency.__contains__.return_value = True
     latest_tag = '5.1.0'
 
-    cwd = testdirectory.mkdir('cwd')
+    resolve_manifest = ResolveManifest(
+        resolve_config_path=testdirectory.path())
     resolve_path = testdirectory.mkdir('resolve_path')
 
     semver_selector = mock.Mock()
@@ -26,23 +28,25 @@ def test_existing_tag_resolver(testdirectory):
     semver_resolver = mock.Mock()
     semver_resolver.resolve.return_value = resolve_path.path()
 
-    # Run without any tags file
+    # Run without any stored tags
     resolver = ExistingTagResolver(
         ctx=ctx, dependency=dependency, semver_selector=semver_selector,
-        tag_database=tag_database, resolver=semver_resolver, cwd=cwd.path())
+        tag_database=tag_database, resolver=semver_resolver,
+        resolve_manifest=resolve_manifest)
 
     path = resolver.resolve()
-    # The path is returned by the semver_resolver and a tag file is created
+    # The path is returned by the semver_resolver and the tag is stored
     semver_resolver.resolve.assert_called_once()
     assert path == resolve_path.path()
-    assert cwd.contains_file('foo.tags.json')
+    assert resolve_manifest.tags(name='foo') == {'5.1.0': resolve_path.path()}
 
     semver_resolver.reset_mock()
 
-    # Run with a tags file, we will not use the semver_resolver
+    # Run with the stored tags, we will not use the semver_resolver
     resolver = ExistingTagResolver(
         ctx=ctx, dependency=dependency, semver_selector=semver_selector,
-        tag_database=tag_database, resolver=None, cwd=cwd.path())
+        tag_database=tag_database, resolver=None,
+        resolve_manifest=resolve_manifest)
 
     path = resolver.resolve()
     assert semver_resolver.resolve.called is False
@@ -55,7 +59,8 @@ def test_existing_tag_resolver(testdirectory):
 
     resolver = ExistingTagResolver(
         ctx=ctx, dependency=dependency, semver_selector=semver_selector,
-        tag_database=tag_database, resolver=semver_resolver, cwd=cwd.path())
+        tag_database=tag_database, resolver=semver_resolver,
+        resolve_manifest=resolve_manifest)
 
     path = resolver.resolve()
     semver_resolver.resolve.assert_called_once()
@@ -1,6 +1,11 @@
+import os
 import mock
+import pytest
 
 from wurf.git import Git
+from wurf.retry_policy import RetryPolicy
+from wurf.error import CmdAndLogError
+from wurf.error import Error
 
 
 def test_git_version():
@@ -49,6 +54,236 @@ def test_git_clone():
         cwd='/tmp')
 
 
+def test_git_clone_shallow():
+
+    ctx = mock.Mock()
+    git = Git('/bin/git_binary', ctx)
+
+    git.clone(repository='https://github.com/repo.git',
+              directory='1.0.0-abcdef', cwd='/tmp', depth=1, branch='1.0.0')
+
+    ctx.cmd_and_log.assert_called_once_with(
+        ['/bin/git_binary', 'clone', '--depth', '1', '--branch', '1.0.0',
+         'https://github.com/repo.git', '1.0.0-abcdef'],
+        cwd='/tmp')
+
+
+def test_git_clone_reference():
+
+    ctx = mock.Mock()
+    git = Git('/bin/git_binary', ctx)
+
+    git.clone(repository='https://github.com/repo.git', directory='repo',
+              cwd='/tmp', reference='/cache/repo.git')
+
+    ctx.cmd_and_log.assert_called_once_with(
+        ['/bin/git_binary', 'clone', '--reference', '/cache/repo.git',
+         'https://github.com/repo.git', 'repo'],
+        cwd='/tmp')
+
+
+def test_git_missing_alternates(testdirectory):
+
+    ctx = mock.Mock()
+    git = Git('/bin/git_binary', ctx)
+    cwd = testdirectory.path()
+
+    assert git.missing_alternates(cwd=cwd) == []
+
+    cache = testdirectory.mkdir('cache')
+    info = testdirectory.mkdir('.git').mkdir('objects').mkdir('info')
+    info.write_text('alternates', u'{}\n../../missing\n'.format(
+        cache.path()), encoding='utf-8')
+
+    assert git.missing_alternates(cwd=cwd) == [
+        os.path.join(cwd, '.git', 'objects', '../../missing')]
+
+
+def test_git_clone_retry(testdirectory):
+
+    ctx = mock.Mock()
+    retry_policy = RetryPolicy(ctx=ctx, timeout=60, retries=1,
+                               sleep=mock.Mock())
+
+    git = Git('/bin/git_binary', ctx, retry_policy=retry_policy)
+    cwd = testdirectory.path()
+
+    def clone_timeout(args, **kwargs):
+        # A clone which times out leaves a partial repository
+        testdirectory.mkdir('repo')
+        ctx.cmd_and_log.side_effect = None
+        raise CmdAndLogError(error=Exception('Timeout'))
+
+    ctx.cmd_and_log.side_effect = clone_timeout
+
+    git.clone(repository='https://github.com/repo.git', directory='repo',
+              cwd=cwd)
+
+    # The partial repository was removed before the retry
+    assert ctx.cmd_and_log.call_count == 2
+    assert not testdirectory.contains_dir('repo')
+
+    ctx.cmd_and_log.assert_called_with(
+        ['/bin/git_binary', 'clone', 'https://github.com/repo.git', 'repo'],
+        cwd=cwd, timeout=60)
+
+
+def test_git_pull_not_transient():
+
+    ctx = mock.Mock()
+    retry_policy = RetryPolicy(ctx=ctx, timeout=60, retries=2,
+                               sleep=mock.Mock())
+
+    git = Git('/bin/git_binary', ctx, retry_policy=retry_policy)
+
+    error = Exception('Command failed')
+    error.stdout = ''
+    error.stderr = "remote: Repository not found.\n" \
+        "fatal: repository 'https://github.com/repo.git/' not found"
+
+    ctx.cmd_and_log.side_effect = CmdAndLogError(error=error)
+
+    # An unknown repository is not retried
+    with pytest.raises(CmdAndLogError):
+        git.pull(cwd='/tmp')
+
+    assert ctx.cmd_and_log.call_count == 1
+    assert retry_policy.sleep.call_count == 0
+
+
+def test_git_pull_transient():
+
+    ctx = mock.Mock()
+    retry_policy = RetryPolicy(ctx=ctx, timeout=60, retries=2,
+                               sleep=mock.Mock())
+
+    git = Git('/bin/git_binary', ctx, retry_policy=retry_policy)
+
+    error = Exception('Command failed')
+    error.stdout = ''
+    error.stderr = "fatal: unable to access 'https://github.com/repo.git/'" \
+        ": Could not resolve host: github.com"
+
+    ctx.cmd_and_log.side_effect = [CmdAndLogError(error=error), 'output']
+
+    # A failed name lookup is retried
+    git.pull(cwd='/tmp')
+    assert ctx.cmd_and_log.call_count == 2
+
+
+def test_git_pull_no_retry():
+
+    ctx = mock.Mock()
+    retry_policy = RetryPolicy(ctx=ctx, timeout=60, retries=2,
+                               sleep=mock.Mock())
+
+    git = Git('/bin/git_binary', ctx, retry_policy=retry_policy)
+
+    ctx.cmd_and_log.side_effect = CmdAndLogError(
+        error=Exception('Execution failure: timed out'))
+
+    # Probes which are expected to fail are run once, with the timeout
+    with pytest.raises(CmdAndLogError):
+        git.pull(cwd='/tmp', retry=False)
+
+    ctx.cmd_and_log.assert_called_once_with(
+        ['/bin/git_binary', 'pull'], cwd='/tmp', timeout=60)
+
+
+def test_git_clone_partial():
+
+    ctx = mock.Mock()
+    git = Git('/bin/git_binary', ctx)
+
+    git.clone(repository='https://github.com/repo.git',
+              directory='master-abcdef', cwd='/tmp',
+              filter_spec='blob:none', single_branch=True)
+
+    ctx.cmd_and_log.assert_called_once_with(
+        ['/bin/git_binary', 'clone', '--filter=blob:none', '--single-branch',
+         'https://github.com/repo.git', 'master-abcdef'],
+        cwd='/tmp')
+
+
+def test_git_fetch_ref():
+
+    ctx = mock.Mock()
+    git = Git('/bin/git_binary', ctx)
+
+    git.fetch_ref(refspec='+refs/tags/1.0.0:refs/tags/1.0.0', cwd='/tmp',
+                  depth=1)
+
+    ctx.cmd_and_log.assert_called_once_with(
+        ['/bin/git_binary', 'fetch', '--depth', '1', 'origin',
+         '+refs/tags/1.0.0:refs/tags/1.0.0'], cwd='/tmp')
+
+    ctx.reset_mock()
+
+    git.fetch_all(cwd='/tmp', unshallow=True)
+
+    ctx.cmd_and_log.assert_called_once_with(
+        ['/bin/git_binary', 'fetch', '--tags', '--unshallow', 'origin',
+         '+refs/heads/*:refs/remotes/origin/*'], cwd='/tmp')
+
+
+def test_git_fetch_tags():
+
+    ctx = mock.Mock()
+    git = Git('/bin/git_binary', ctx)
+
+    git.fetch_tags(cwd='/tmp', depth=1)
+
+    ctx.cmd_and_log.assert_called_once_with(
+        ['/bin/git_binary', 'fetch', '--tags', '--depth', '1', 'origin'],
+        cwd='/tmp')
+
+
+def test_git_add_remote_branch():
+
+    ctx = mock.Mock()
+    git = Git('/bin/git_binary', ctx)
+
+    git.add_remote_branch(branch='feature', cwd='/tmp')
+
+    ctx.cmd_and_log.assert_called_once_with(
+        ['/bin/git_binary', 'remote', 'set-branches', '--add', 'origin',
+         'feature'], cwd='/tmp')
+
+
+def test_git_is_shallow(testdirectory):
+
+    ctx = mock.Mock()
+    ctx.cmd_and_log.return_value = '.git\n'
+
+    git = Git('/bin/git_binary', ctx)
+    cwd = testdirectory.path()
+
+    assert not git.is_shallow(cwd=cwd)
+
+    testdirectory.mkdir('.git').write_text(
+        'shallow', 'abcd', encoding='utf-8')
+
+    assert git.is_shallow(cwd=cwd)
+
+
+def test_git_remote_refs():
+
+    ctx = mock.Mock()
+    ctx.cmd_and_log.return_value = (
+        '4b3a6e4b8f2c2d4e6e8c3c9d8b2b7a6f5e4d3c2b\trefs/heads/1.0.0\n')
+
+    git = Git('/bin/git_binary', ctx)
+
+    refs = git.remote_refs(repository='origin', cwd='/tmp',
+                           patterns=['refs/tags/1.0.0', 'refs/heads/1.0.0'])
+
+    assert refs == ['refs/heads/1.0.0']
+
+    ctx.cmd_and_log.assert_called_once_with(
+        ['/bin/git_binary', 'ls-remote', 'origin', 'refs/tags/1.0.0',
+         'refs/heads/1.0.0'], cwd='/tmp')
+
+
 def test_git_pull():
 
     ctx = mock.Mock()
@@ -60,6 +295,107 @@ def test_git_pull():
         ['/bin/git_binary', 'pull'], cwd='/tmp')
 
 
+def test_git_show():
+
+    ctx = mock.Mock()
+    ctx.cmd_and_log.return_value = '[]'
+    git = Git('/bin/git_binary', ctx)
+
+    assert git.show(ref='1.0.0', path='resolve.json', cwd='/tmp') == '[]'
+
+    ctx.cmd_and_log.assert_called_once_with(
+        ['/bin/git_binary', 'show', '1.0.0:resolve.json'], cwd='/tmp')
+
+
+def test_git_has_commit():
+
+    ctx = mock.Mock()
+    git = Git('/bin/git_binary', ctx)
+
+    assert git.has_commit(ref='1.0.0', cwd='/tmp')
+
+    ctx.cmd_and_log.assert_called_once_with(
+        ['/bin/git_binary', 'cat-file', '-e', '1.0.0^{commit}'], cwd='/tmp')
+
+    ctx.cmd_and_log.side_effect = Error('fatal: Not a valid object name')
+
+    assert not git.has_commit(ref='1.0.0', cwd='/tmp')
+
+
+def test_git_is_pinned():
+
+    ctx = mock.Mock()
+    git = Git('/bin/git_binary', ctx)
+
+    sha1 = '4b3a6e4b8f2c2d4e6e8c3c9d8b2b7a6f5e4d3c2b'
+
+    assert git.is_pinned(checkout=sha1, cwd='/tmp')
+    ctx.cmd_and_log.assert_called_once_with(
+        ['/bin/git_binary', 'cat-file', '-e', sha1 + '^{commit}'],
+        cwd='/tmp')
+
+    ctx.cmd_and_log.reset_mock()
+
+    assert git.is_pinned(checkout='1.0.0', cwd='/tmp')
+    ctx.cmd_and_log.assert_called_once_with(
+        ['/bin/git_binary', 'cat-file', '-e', 'refs/tags/1.0.0^{commit}'],
+        cwd='/tmp')
+
+    # Branches are not tags
+    ctx.cmd_and_log.side_effect = Error('fatal: Not a valid object name')
+    assert not git.is_pinned(checkout='master', cwd='/tmp')
+
+
+def test_git_submodules_up_to_date(testdirectory):
+
+    ctx = mock.Mock()
+    git = Git('/bin/git_binary', ctx)
+
+    cwd = testdirectory.path()
+
+    assert git.submodules_up_to_date(cwd=cwd)
+    ctx.cmd_and_log.assert_not_called()
+
+    testdirectory.write_text('.gitmodules', u'not important', encoding='utf-8')
+
+    ctx.cmd_and_log.return_value = (
+        ' 4b3a6e4b8f2c2d4e6e8c3c9d8b2b7a6f5e4d3c2b foo (1.0.0)\n'
+        ' 5c4b7f5c9a3d3e5f7f9d4d0e9c3c8b7a6f5e4d3c bar (2.0.0)\n')
+
+    assert git.submodules_up_to_date(cwd=cwd)
+    ctx.cmd_and_log.assert_called_once_with(
+        ['/bin/git_binary', 'submodule', 'status'], cwd=cwd)
+
+    ctx.cmd_and_log.return_value = (
+        ' 4b3a6e4b8f2c2d4e6e8c3c9d8b2b7a6f5e4d3c2b foo (1.0.0)\n'
+        '-5c4b7f5c9a3d3e5f7f9d4d0e9c3c8b7a6f5e4d3c bar\n')
+
+    assert not git.submodules_up_to_date(cwd=cwd)
+
+
+def test_git_worktree_add():
+
+    ctx = mock.Mock()
+    git = Git('/bin/git_binary', ctx)
+
+    git.worktree_add(path='/tmp/foo-1.0.0', branch='1.0.0', cwd='/tmp/foo')
+
+    ctx.cmd_and_log.assert_called_once_with(
+        ['/bin/git_binary', 'worktree', 'add', '/tmp/foo-1.0.0', '1.0.0'],
+        cwd='/tmp/foo')
+
+
+def test_git_worktree_prune():
+
+    ctx = mock.Mock()
+    git = Git('/bin/git_binary', ctx)
+
+    git.worktree_prune(cwd='/tmp/foo')
+
+    ctx.cmd_and_log.assert_called_once_with(
+        ['/bin/git_binary', 'worktree', 'prune'], cwd='/tmp/foo')
+
+
 def test_git_has_submodules(testdirectory):
 
     ctx = mock.Mock()
@@ -99,11 +435,12 @@ def test_git_init_submodules():
 def test_git_update_submodules():
 
     ctx = mock.Mock()
+    ctx.cmd_and_log.return_value = 'git version 2.20.1'
     git = Git('/bin/git_binary', ctx)
 
     git.update_submodules(cwd='/tmp')
 
-    ctx.cmd_and_log.assert_called_once_with(
+    ctx.cmd_and_log.assert_called_with(
         ['/bin/git_binary', 'submodule', 'update'], cwd='/tmp')
 
 
@@ -120,12 +457,123 @@ def test_git_pull_submodules(testdirectory):
 
     testdirectory.write_text('.gitmodules', u'not important', encoding='utf-8')
 
-    def check_command(cmd, cwd):
+    # The submodules are checked out at the recorded commits
+    ctx.cmd_and_log.return_value = (
+        ' 4b3a6e4b8f2c2d4e6e8c3c9d8b2b7a6f5e4d3c2b foo (1.0.0)\n')
+
+    git.pull_submodules(cwd=cwd)
+
+    ctx.cmd_and_log.assert_called_once_with(
+        ['/bin/git_binary', 'submodule', 'status'], cwd=cwd)
+
+    def check_command(cmd, cwd=None):
         expected_cmd = check_command.commands.pop(0)
-        assert(expected_cmd == cmd[2])
+        assert(expected_cmd == cmd[1:3])
 
-    check_command.commands = ['sync', 'init', 'update']
+        if cmd[1:3] == ['submodule', 'status']:
+            return '+4b3a6e4b8f2c2d4e6e8c3c9d8b2b7a6f5e4d3c2b foo (1.0.0)\n'
+        if cmd[1] == 'version':
+            return 'git version 1.8.1.msysgit.1'
+        return ''
+
+    check_command.commands = [
+        ['submodule', 'status'], ['submodule', 'sync'],
+        ['submodule', 'init'], ['version'], ['submodule', 'update']]
 
     ctx.cmd_and_log.side_effect = check_command
 
     git.pull_submodules(cwd=cwd)
+
+    assert check_command.commands == []
+
+
+def test_git_update_submodules_parallel():
+
+    ctx = mock.Mock()
+    ctx.cmd_and_log.return_value = 'git version 2.20.1'
+
+    git = Git('/bin/git_binary', ctx, submodule_jobs=4)
+
+    git.update_submodules(cwd='/tmp/foo')
+
+    ctx.cmd_and_log.assert_called_with(
+        ['/bin/git_binary', 'submodule', 'update', '--jobs', '4'],
+        cwd='/tmp/foo')
+
+    # The version is only read once
+    ctx.cmd_and_log.reset_mock()
+    git.shallow_submodules = True
+
+    git.update_submodules(cwd='/tmp/foo')
+
+    ctx.cmd_and_log.assert_called_once_with(
+        ['/bin/git_binary', 'submodule', 'update', '--jobs', '4',
+         '--depth', '1'], cwd='/tmp/foo')
+
+    # If the shallow update fails, the full history is fetched
+    ctx.cmd_and_log.reset_mock()
+
+    def cmd_and_log(args, cwd):
+        if '--depth' in args:
+            raise Error('server does not allow request for unadvertised '
+                        'object')
+
+    ctx.cmd_and_log.side_effect = cmd_and_log
+
+    git.update_submodules(cwd='/tmp/foo')
+
+    ctx.cmd_and_log.assert_called_with(
+        ['/bin/git_binary', 'submodule', 'update', '--jobs', '4'],
+        cwd='/tmp/foo')
+    assert ctx.cmd_and_log.call_count == 2
+
+    # Older versions of git do not support --jobs or --depth
+    ctx = mock.Mock()
+    ctx.cmd_and_log.return_value = 'git version 1.8.1.msysgit.1'
+
+    git = Git('/bin/git_binary', ctx, submodule_jobs=4,
+              shallow_submodules=True)
+
+    git.update_submodules(cwd='/tmp/foo')
+
+    ctx.cmd_and_log.assert_called_with(
+        ['/bin/git_binary', 'submodule', 'update'], cwd='/tmp/foo')
+
+
+def test_git_remote_head():
+
+    ctx = mock.Mock()
+    ctx.cmd_and_log.return_value = (
+        '4b3a6e4b8f2c2d4e6e8c3c9d8b2b7a6f5e4d3c2b\tHEAD\n')
+
+    git = Git('/bin/git_binary', ctx)
+
+    commit = git.remote_head(repository='https://github.com/repo.git')
+
+    assert commit == '4b3a6e4b8f2c2d4e6e8c3c9d8b2b7a6f5e4d3c2b'
+
+    ctx.cmd_and_log.assert_called_once_with(
+        ['/bin/git_binary', 'ls-remote', 'https://github.com/repo.git',
+         'HEAD'])
+
+    ctx.cmd_and_log.return_value = ''
+    assert git.remote_head(repository='https://github.com/repo.git') is None
+
+
+def test_git_remote_tags():
+
+    ctx = mock.Mock()
+    ctx.cmd_and_log.return_value = (
+        '4b3a6e4b8f2c2d4e6e8c3c9d8b2b7a6f5e4d3c2b\trefs/tags/1.0.0\n'
+        '5c4b7f5c9a3d3e5f7f9d4d0e9c3c8b7a6f5e4d3c\trefs/tags/2.0.0\n'
+        '6d5c8a6d0b4e4f6a8a0e5e1f0d4d9c8b7a6f5e4d\trefs/tags/2.0.0^{}\n')
+
+    git = Git('/bin/git_binary', ctx)
+
+    tags = git.remote_tags(repository='https://github.com/repo.git')
+
+    assert tags == ['1.0.0', '2.0.0']
+
+    ctx.cmd_and_log.assert_called_once_with(
+        ['/bin/git_binary', 'ls-remote', '--tags',
+         'https://github.com/repo.git'])
@@ -0,0 +1,100 @@
+import os
+import subprocess
+
+import mock
+import pytest
+
+from wurf.git import Git
+from wurf.git_checkout_backend import CopyCheckoutBackend
+from wurf.git_checkout_backend import WorktreeCheckoutBackend
+
+
+def run(args, cwd=None):
+    return subprocess.check_output(
+        args, cwd=cwd, stderr=subprocess.STDOUT).decode('utf-8')
+
+
+def commit_file(directory, filename, content):
+    directory.write_text(filename, content, encoding='utf-8')
+    run(['git', 'add', '.'], cwd=directory.path())
+    run(['git', '-c', 'user.name=John', '-c', 'user.email=doe@email.org',
+         'commit', '-m', 'oki'], cwd=directory.path())
+
+
+def create_repository(testdirectory):
+
+    upstream = testdirectory.mkdir('upstream')
+    run(['git', 'init'], cwd=upstream.path())
+    commit_file(directory=upstream, filename='a.txt', content=u'1.0.0')
+    run(['git', 'tag', '1.0.0'], cwd=upstream.path())
+    commit_file(directory=upstream, filename='a.txt', content=u'2.0.0')
+    run(['git', 'checkout', '-b', 'feature'], cwd=upstream.path())
+    commit_file(directory=upstream, filename='a.txt', content=u'feature')
+    run(['git', 'checkout', '-'], cwd=upstream.path())
+
+    run(['git', 'clone', upstream.path(), 'master'],
+        cwd=testdirectory.path())
+
+    return os.path.join(testdirectory.path(), 'master')
+
+
+def read_file(path):
+    with open(path, 'r') as text_file:
+        return text_file.read()
+
+
+@pytest.mark.parametrize('backend_class',
+                         [CopyCheckoutBackend, WorktreeCheckoutBackend])
+def test_git_checkout_backend(testdirectory, backend_class):
+
+    ctx = mock.Mock()
+    ctx.cmd_and_log.side_effect = run
+
+    git = Git(git_binary='git', ctx=ctx)
+    backend = backend_class(git=git)
+
+    repository_path = create_repository(testdirectory=testdirectory)
+
+    tag_path = os.path.join(testdirectory.path(), '1.0.0-abcdef')
+    backend.create(repository_path=repository_path, checkout='1.0.0',
+                   checkout_path=tag_path)
+
+    assert read_file(os.path.join(tag_path, 'a.txt')) == '1.0.0'
+    assert git.is_detached_head(cwd=tag_path)
+
+    # A branch only available as a remote branch
+    branch_path = os.path.join(testdirectory.path(), 'feature-abcdef')
+    backend.create(repository_path=repository_path, checkout='feature',
+                   checkout_path=branch_path)
+
+    assert read_file(os.path.join(branch_path, 'a.txt')) == 'feature'
+    assert git.current_branch(cwd=branch_path) == 'feature'
+    git.pull(cwd=branch_path)
+
+    # A failed checkout must not leave a folder behind
+    invalid_path = os.path.join(testdirectory.path(), 'invalid-abcdef')
+
+    with pytest.raises(subprocess.CalledProcessError):
+        backend.create(repository_path=repository_path, checkout='invalid',
+                       checkout_path=invalid_path)
+
+    assert not os.path.exists(invalid_path)
+
+
+def test_git_checkout_backend_worktree(testdirectory):
+
+    ctx = mock.Mock()
+    ctx.cmd_and_log.side_effect = run
+
+    git = Git(git_binary='git', ctx=ctx)
+    backend = WorktreeCheckoutBackend(git=git)
+
+    repository_path = create_repository(testdirectory=testdirectory)
+
+    tag_path = os.path.join(testdirectory.path(), '1.0.0-abcdef')
+    backend.create(repository_path=repository_path, checkout='1.0.0',
+                   checkout_path=tag_path)
+
+    # The worktree shares the object database of the repository
+    assert os.path.isfile(os.path.join(tag_path, '.git'))
+    assert not os.path.isdir(os.path.join(tag_path, '.git', 'objects'))
@@ -1,7 +1,17 @@
 import os
+import shutil
+import subprocess
+
 import mock
 
+from wurf.git import Git
+from wurf.git_inspector import GitInspector
+from wurf.git_resolver import GitResolver
 from wurf.git_checkout_resolver import GitCheckoutResolver
+from wurf.git_checkout_backend import CopyCheckoutBackend
+from wurf.git_checkout_backend import WorktreeCheckoutBackend
+from wurf.resolve_stamps import ResolveStamps
+from wurf.error import Error
 
 
 def test_git_checkout_resolver(testdirectory):
@@ -17,14 +27,20 @@ def test_git_checkout_resolver(testdirectory):
     master_folder = repo_folder.mkdir('master')
 
     git_resolver = mock.Mock()
+    git_resolver.master_path.return_value = master_folder.path()
     git_resolver.resolve.return_value = master_folder.path()
 
     dependency.name = 'links'
     checkout = 'my-branch'
 
+    # A branch is never pinned
+    git.is_pinned.return_value = False
+
     resolver = GitCheckoutResolver(
         git=git, resolver=git_resolver, ctx=ctx, dependency=dependency,
-        cwd=cwd, checkout=checkout)
+        cwd=cwd, checkout=checkout,
+        checkout_backend=CopyCheckoutBackend(git=git),
+        resolve_stamps=ResolveStamps(git=git))
 
     path = resolver.resolve()
 
@@ -63,3 +79,214 @@ def test_git_checkout_resolver(testdirectory):
     assert git.checkout.called is False
     assert git.pull.called is False
     git.pull_submodules.assert_called_once_with(cwd=path)
+
+
+def test_git_checkout_resolver_pinned(testdirectory):
+
+    ctx = mock.Mock()
+    git = mock.Mock()
+    dependency = mock.Mock()
+    cwd = testdirectory.path()
+
+    master_folder = testdirectory.mkdir('master')
+
+    git_resolver = mock.Mock()
+    git_resolver.master_path.return_value = master_folder.path()
+    git_resolver.repository_url.return_value = 'https://gitlab.com/links.git'
+
+    dependency.name = 'links'
+    dependency.sha1 = '2c3f8ea7c7a8f7c1e2a9d8f1b9a7d5e3c1b2a4f6'
+    checkout = '1.0.0'
+    commit = '4b3a6e4b8f2c2d4e6e8c3c9d8b2b7a6f5e4d3c2b'
+
+    git.current_commit.return_value = commit
+
+    # The tag is available in the master repository
+    git.is_pinned.return_value = True
+
+    resolver = GitCheckoutResolver(
+        git=git, resolver=git_resolver, ctx=ctx, dependency=dependency,
+        cwd=cwd, checkout=checkout,
+        checkout_backend=CopyCheckoutBackend(git=git),
+        resolve_stamps=ResolveStamps(git=git))
+
+    path = resolver.resolve()
+
+    # The master repository is not fetched
+    assert git_resolver.resolve.called is False
+    assert dependency.current_source == 'https://gitlab.com/links.git'
+
+    git.is_pinned.assert_called_once_with(
+        checkout=checkout, cwd=master_folder.path())
+    git.checkout.assert_called_once_with(branch=checkout, cwd=path)
+    git.pull_submodules.assert_called_once_with(cwd=path)
+
+    git.reset_mock()
+
+    # The checkout exists, so nothing should be updated. The submodules
+    # are only checked, they are updated by Git if a previous update did not
+    # complete
+    assert resolver.resolve() == path
+
+    assert git_resolver.resolve.called is False
+    assert git.checkout.called is False
+    assert git.pull.called is False
+    git.pull_submodules.assert_called_once_with(cwd=path)
+
+    git.reset_mock()
+
+    # The stamp is valid once the checkout contains a git repository
+    os.mkdir(os.path.join(path, '.git'))
+
+    assert resolver.resolve() == path
+    assert dependency.git_commit == commit
+
+    # Only the commit of the checkout is read
+    git.current_commit.assert_called_once_with(cwd=path)
+    assert git.is_pinned.called is False
+    assert git.pull_submodules.called is False
+
+
+def test_git_checkout_resolver_fetch(testdirectory):
+
+    ctx = mock.Mock()
+    git = mock.Mock()
+    dependency = mock.Mock()
+    cwd = testdirectory.path()
+
+    repo_folder = testdirectory.mkdir('links-01234')
+    master_folder = repo_folder.mkdir('master')
+
+    git_resolver = mock.Mock()
+    git_resolver.master_path.return_value = master_folder.path()
+    git_resolver.resolve.return_value = master_folder.path()
+
+    dependency.name = 'links'
+    checkout = '1.0.0'
+
+    # The tag is not in the shallow clone, until it is fetched
+    fetched = []
+
+    def has_commit(ref, cwd):
+        return ref == checkout and fetched != []
+
+    git.is_pinned.return_value = False
+    git.is_shallow.return_value = True
+    git.has_commit.side_effect = has_commit
+    git.remote_refs.return_value = ['refs/tags/1.0.0']
+    git.fetch_ref.side_effect = lambda **kwargs: fetched.append(kwargs)
+
+    resolver = GitCheckoutResolver(
+        git=git, resolver=git_resolver, ctx=ctx, dependency=dependency,
+        cwd=cwd, checkout=checkout,
+        checkout_backend=CopyCheckoutBackend(git=git),
+        resolve_stamps=ResolveStamps(git=git))
+
+    path = resolver.resolve()
+    assert os.path.isdir(path)
+
+    git.remote_refs.assert_called_once_with(
+        repository='origin', cwd=master_folder.path(),
+        patterns=['refs/tags/1.0.0', 'refs/heads/1.0.0'])
+
+    # Only the tag is fetched
+    assert fetched == [{'refspec': '+refs/tags/1.0.0:refs/tags/1.0.0',
+                        'cwd': master_folder.path(), 'depth': 1,
+                        'retry': False}]
+    assert git.fetch_all.called is False
+
+    git.checkout.assert_called_once_with(branch=checkout, cwd=path)
+
+
+def test_git_checkout_resolver_deepen(testdirectory):
+
+    ctx = mock.Mock()
+    git = mock.Mock()
+    dependency = mock.Mock()
+    cwd = testdirectory.path()
+
+    repo_folder = testdirectory.mkdir('links-01234')
+    master_folder = repo_folder.mkdir('master')
+
+    git_resolver = mock.Mock()
+    git_resolver.master_path.return_value = master_folder.path()
+    git_resolver.resolve.return_value = master_folder.path()
+
+    dependency.name = 'links'
+    checkout = 'a' * 40
+
+    # The server does not allow fetching the commit, so the complete
+    # history is fetched
+    git.is_pinned.return_value = False
+    git.is_shallow.return_value = True
+    git.has_commit.return_value = False
+    git.fetch_ref.side_effect = Error('not our ref')
+
+    resolver = GitCheckoutResolver(
+        git=git, resolver=git_resolver, ctx=ctx, dependency=dependency,
+        cwd=cwd, checkout=checkout,
+        checkout_backend=CopyCheckoutBackend(git=git),
+        resolve_stamps=ResolveStamps(git=git))
+
+    resolver.resolve()
+
+    assert git.remote_refs.called is False
+    git.fetch_ref.assert_called_once_with(
+        refspec=checkout, cwd=master_folder.path(), depth=1, retry=False)
+    git.fetch_all.assert_called_once_with(
+        cwd=master_folder.path(), unshallow=True)
+
+
+def run(args, cwd=None):
+    return subprocess.check_output(
+        args, cwd=cwd, stderr=subprocess.STDOUT).decode('utf-8')
+
+
+def test_git_checkout_resolver_worktree_deleted(testdirectory):
+
+    upstream = testdirectory.mkdir('upstream')
+    run(['git', 'init'], cwd=upstream.path())
+    upstream.write_text('a.txt', u'1.0.0', encoding='utf-8')
+    run(['git', 'add', '.'], cwd=upstream.path())
+    run(['git', '-c', 'user.name=John', '-c', 'user.email=doe@email.org',
+         'commit', '-m', 'oki'], cwd=upstream.path())
+    run(['git', 'tag', '1.0.0'], cwd=upstream.path())
+
+    ctx = mock.Mock()
+    ctx.cmd_and_log.side_effect = run
+
+    git = Git(git_binary='git', ctx=ctx)
+    git_inspector = GitInspector(git=git)
+
+    git_url_rewriter = mock.Mock()
+    git_url_rewriter.rewrite_url.return_value = upstream.path()
+
+    dependency = mock.Mock()
+    dependency.name = 'links'
+    dependency.sha1 = '2c3f8ea7c7a8f7c1e2a9d8f1b9a7d5e3c1b2a4f6'
+
+    cwd = testdirectory.mkdir('resolve').path()
+
+    def resolve():
+        git_resolver = GitResolver(
+            git=git, ctx=ctx, dependency=dependency,
+            git_url_rewriter=git_url_rewriter, source='upstream', cwd=cwd,
+            fetched_repositories=set())
+
+        resolver = GitCheckoutResolver(
+            git=git_inspector, resolver=git_resolver, ctx=ctx,
+            dependency=dependency, checkout='1.0.0', cwd=cwd,
+            checkout_backend=WorktreeCheckoutBackend(git=git),
+            resolve_stamps=ResolveStamps(git=git_inspector))
+
+        return resolver.resolve()
+
+    path = resolve()
+    assert os.path.isfile(os.path.join(path, 'a.txt'))
+
+    # The checkout folder is deleted by hand, but it is still registered
+    # as a worktree in the repository
+    shutil.rmtree(path)
+
+    assert resolve() == path
+    assert os.path.isfile(os.path.join(path, 'a.txt'))
@@ -0,0 +1,107 @@
+import os
+import subprocess
+
+import mock
+
+from wurf.git import Git
+from wurf.git_inspector import GitInspector
+
+
+def run(args, cwd=None):
+    return subprocess.check_output(
+        args, cwd=cwd, stderr=subprocess.STDOUT).decode('utf-8')
+
+
+def commit_file(directory, filename, content):
+    directory.write_text(filename, content, encoding='utf-8')
+    run(['git', 'add', '.'], cwd=directory.path())
+    run(['git', '-c', 'user.name=John', '-c', 'user.email=doe@email.org',
+         'commit', '-m', 'oki'], cwd=directory.path())
+
+
+def create_repository(testdirectory):
+
+    upstream = testdirectory.mkdir('upstream')
+    run(['git', 'init'], cwd=upstream.path())
+    commit_file(directory=upstream, filename='a.txt', content=u'1.0.0')
+    run(['git', 'tag', '1.0.0'], cwd=upstream.path())
+    commit_file(directory=upstream, filename='a.txt', content=u'2.0.0')
+    run(['git', '-c', 'user.name=John', '-c', 'user.email=doe@email.org',
+         'tag', '-a', '-m', 'Release', '2.0.0'], cwd=upstream.path())
+
+    run(['git', 'clone', upstream.path(), 'master'],
+        cwd=testdirectory.path())
+
+    return testdirectory.from_path(
+        os.path.join(testdirectory.path(), 'master'))
+
+
+def test_git_inspector(testdirectory):
+
+    ctx = mock.Mock()
+    ctx.cmd_and_log.side_effect = run
+
+    git = Git(git_binary='git', ctx=ctx)
+    inspector = GitInspector(git=git)
+
+    master = create_repository(testdirectory=testdirectory)
+    path = master.path()
+
+    def check():
+        ctx.cmd_and_log.reset_mock()
+
+        assert inspector.current_commit(cwd=path) == \
+            git.current_commit(cwd=path)
+        assert inspector.is_detached_head(cwd=path) == \
+            git.is_detached_head(cwd=path)
+        assert inspector.tags(cwd=path) == git.tags(cwd=path)
+        assert inspector.remote_origin_url(cwd=path) == \
+            git.remote_origin_url(cwd=path)
+        assert inspector.is_pinned(checkout='2.0.0', cwd=path)
+        assert not inspector.is_pinned(checkout='master', cwd=path)
+
+        # Only the Git instance should run commands
+        assert ctx.cmd_and_log.call_count == 4
+
+    assert inspector.current_branch(cwd=path) == \
+        git.current_branch(cwd=path)
+    check()
+
+    # Pack the refs, such that they are only available in packed-refs
+    run(['git', 'pack-refs', '--all'], cwd=path)
+    assert not os.path.isfile(
+        os.path.join(path, '.git', 'refs', 'tags', '1.0.0'))
+    check()
+
+    # Detached HEAD
+    git.checkout(branch='1.0.0', cwd=path)
+    assert inspector.current_branch(cwd=path).startswith('(')
+    assert git.current_branch(cwd=path).startswith('(')
+    check()
+
+    # Working trees store the HEAD separately from the refs
+    worktree_path = os.path.join(testdirectory.path(), 'worktree')
+    git.worktree_add(path=worktree_path, branch='2.0.0', cwd=path)
+    path = worktree_path
+    check()
+
+    # Commits are pinned if the object is available
+    commit = git.current_commit(cwd=path)
+    assert inspector.is_pinned(checkout=commit, cwd=path)
+
+
+def test_git_inspector_fallback(testdirectory):
+
+    git = mock.Mock()
+    git.current_commit.return_value = 'abc'
+    git.tags.return_value = ['1.0.0']
+
+    inspector = GitInspector(git=git)
+
+    # Not a git repository, so we have to ask git
+    assert inspector.current_commit(cwd=testdirectory.path()) == 'abc'
+    assert inspector.tags(cwd=testdirectory.path()) == ['1.0.0']
+
+    # Other attributes are forwarded to git
+    inspector.pull(cwd=testdirectory.path())
+    git.pull.assert_called_once_with(cwd=testdirectory.path())
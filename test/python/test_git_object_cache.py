@@ -0,0 +1,75 @@
+import os
+import subprocess
+
+import mock
+
+from wurf.git import Git
+from wurf.git_object_cache import GitObjectCache
+
+
+def run(args, cwd=None):
+    return subprocess.check_output(args, cwd=cwd).decode('utf-8')
+
+
+def commit_file(directory, filename, content):
+    directory.write_text(filename, content, encoding='utf-8')
+    run(['git', 'add', '.'], cwd=directory.path())
+    run(['git', '-c', 'user.name=John', '-c', 'user.email=doe@email.org',
+         'commit', '-m', 'oki'], cwd=directory.path())
+
+
+def test_git_object_cache(testdirectory):
+
+    ctx = mock.Mock()
+    ctx.cmd_and_log.side_effect = run
+
+    git = Git(git_binary='git', ctx=ctx)
+
+    repository = testdirectory.mkdir('repository')
+    run(['git', 'init'], cwd=repository.path())
+    commit_file(directory=repository, filename='a.txt', content=u'hello')
+
+    cache = testdirectory.mkdir('cache')
+    git_object_cache = GitObjectCache(
+        git=git, ctx=ctx, cache_path=cache.path())
+
+    mirror_path = git_object_cache.mirror(repository=repository.path())
+
+    assert os.path.isdir(mirror_path)
+    assert os.path.dirname(mirror_path) == cache.path()
+
+    # The mirror is only updated once per process
+    ctx.cmd_and_log.reset_mock()
+    assert git_object_cache.mirror(
+        repository=repository.path()) == mirror_path
+    assert ctx.cmd_and_log.called is False
+
+    # Clone using the mirror as reference
+    clones = testdirectory.mkdir('clones')
+    git.clone(repository=repository.path(), directory='clone',
+              cwd=clones.path(), reference=mirror_path)
+
+    clone_path = os.path.join(clones.path(), 'clone')
+    assert os.path.isfile(os.path.join(clone_path, 'a.txt'))
+    assert git_object_cache.is_referenced(path=clone_path)
+    assert not git_object_cache.is_referenced(path=repository.path())
+    assert git.missing_alternates(cwd=clone_path) == []
+
+    # A new process fetches the mirror
+    commit_file(directory=repository, filename='b.txt', content=u'world')
+
+    git_object_cache = GitObjectCache(
+        git=git, ctx=ctx, cache_path=cache.path())
+
+    assert git_object_cache.mirror(
+        repository=repository.path()) == mirror_path
+
+    head = run(['git', 'rev-parse', 'HEAD'], cwd=repository.path())
+    mirror_head = run(['git', 'rev-parse', 'HEAD'], cwd=mirror_path)
+    assert head == mirror_head
+
+    # The clone is broken when the cache is deleted
+    cache.rmdir()
+
+    assert git.missing_alternates(cwd=clone_path) == [
+        os.path.join(mirror_path, 'objects')]
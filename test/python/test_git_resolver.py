@@ -18,38 +18,224 @@ def test_git_resolver(testdirectory):
 
     # GitResolver checks that the directory is created during git.clone,
     # so we create it within the testdirectory as a side effect
-    def fake_git_clone(repository, directory, cwd):
+    def fake_git_clone(repository, directory, cwd, reference):
         os.makedirs(os.path.join(cwd, directory))
 
     git.clone = mock.Mock(side_effect=fake_git_clone)
+    git.missing_alternates.return_value = []
 
     dependency = mock.Mock()
     dependency.name = 'links'
 
+    fetched_repositories = set()
+
     resolver = GitResolver(
         git=git, ctx=ctx, dependency=dependency,
-        git_url_rewriter=git_url_rewriter, source=source, cwd=cwd)
+        git_url_rewriter=git_url_rewriter, source=source, cwd=cwd,
+        fetched_repositories=fetched_repositories)
+
+    assert not os.path.isdir(resolver.master_path())
 
     path = resolver.resolve()
 
+    assert path == resolver.master_path()
+    assert fetched_repositories == set([path])
+
     repo_name = os.path.basename(os.path.normpath(path))
     assert repo_name.startswith('master-')
     repo_folder = os.path.dirname(os.path.normpath(path))
 
     git.clone.assert_called_once_with(
-        repository=url, directory=repo_name, cwd=repo_folder)
+        repository=url, directory=repo_name, cwd=repo_folder, reference=None)
 
     git.pull_submodules.assert_called_once_with(cwd=path)
 
     # Reset the git mock
     git.reset_mock()
 
-    # The destination folder is already created, so the next resolve
-    # should just run git pull
+    # The repository was already fetched during this resolve, so resolving
+    # it again should not run any git commands
     path2 = resolver.resolve()
 
     assert path2 == path
+    assert git.method_calls == []
+
+    # In a new resolve the destination folder is already created, so the
+    # next resolve should just run git pull
+    resolver = GitResolver(
+        git=git, ctx=ctx, dependency=dependency,
+        git_url_rewriter=git_url_rewriter, source=source, cwd=cwd,
+        fetched_repositories=set())
+
+    path3 = resolver.resolve()
+
+    assert path3 == path
 
     assert git.clone.called is False
-    git.pull.assert_called_once_with(cwd=path)
+    git.pull.assert_called_once_with(cwd=path, retry=False)
     git.pull_submodules.assert_called_once_with(cwd=path)
+
+    # A clone which borrowed objects from a deleted git object cache is
+    # cloned again
+    git.reset_mock()
+    git.missing_alternates.return_value = ['/cache/links.git/objects']
+
+    resolver = GitResolver(
+        git=git, ctx=ctx, dependency=dependency,
+        git_url_rewriter=git_url_rewriter, source=source, cwd=cwd,
+        fetched_repositories=set())
+
+    path4 = resolver.resolve()
+
+    assert path4 == path
+
+    git.missing_alternates.assert_called_once_with(cwd=path)
+    git.clone.assert_called_once_with(
+        repository=url, directory=repo_name, cwd=repo_folder, reference=None)
+    assert git.pull.called is False
+
+
+def test_git_resolver_source_race(testdirectory):
+
+    git = mock.Mock()
+    source = 'gitlab.com/steinwurf/links.git'
+
+    git_url_rewriter = mock.Mock()
+    git_url_rewriter.rewrite_url.return_value = \
+        'https://gitlab.com/steinwurf/links.git'
+
+    def fake_git_clone(repository, directory, cwd, reference):
+        os.makedirs(os.path.join(cwd, directory))
+
+    git.clone = mock.Mock(side_effect=fake_git_clone)
+    source_race = mock.Mock()
+
+    resolver = GitResolver(
+        git=git, ctx=mock.Mock(), dependency=mock.Mock(),
+        git_url_rewriter=git_url_rewriter, source=source,
+        cwd=testdirectory.path(), fetched_repositories=set(),
+        source_race=source_race)
+
+    resolver.resolve()
+
+    # The race is told before the repository is cloned
+    source_race.fetch.assert_called_once_with(source=source)
+
+
+def test_git_resolver_object_cache(testdirectory):
+
+    ctx = mock.Mock()
+    git = mock.Mock()
+    source = 'gitlab.com/steinwurf/links.git'
+    url = 'https://gitlab.com/steinwurf/links.git'
+
+    git_url_rewriter = mock.Mock()
+    git_url_rewriter.rewrite_url.return_value = url
+
+    git_object_cache = mock.Mock()
+    git_object_cache.mirror.return_value = '/cache/links.git'
+
+    dependency = mock.Mock()
+    dependency.name = 'links'
+
+    resolver = GitResolver(
+        git=git, ctx=ctx, dependency=dependency,
+        git_url_rewriter=git_url_rewriter, source=source,
+        cwd=testdirectory.path(), fetched_repositories=set(),
+        git_object_cache=git_object_cache)
+
+    def fake_git_clone(repository, directory, cwd, reference):
+        os.makedirs(os.path.join(cwd, directory))
+
+    git.clone = mock.Mock(side_effect=fake_git_clone)
+
+    path = resolver.resolve()
+
+    git_object_cache.mirror.assert_called_once_with(repository=url)
+    git.clone.assert_called_once_with(
+        repository=url, directory=os.path.basename(path),
+        cwd=testdirectory.path(), reference='/cache/links.git')
+
+    # The mirror is updated before the clone is pulled
+    git.reset_mock()
+    git_object_cache.reset_mock()
+    git.missing_alternates.return_value = []
+    git_object_cache.is_referenced.return_value = True
+
+    manager = mock.Mock()
+    manager.attach_mock(git_object_cache.mirror, 'mirror')
+    manager.attach_mock(git.pull, 'pull')
+
+    resolver = GitResolver(
+        git=git, ctx=ctx, dependency=dependency,
+        git_url_rewriter=git_url_rewriter, source=source,
+        cwd=testdirectory.path(), fetched_repositories=set(),
+        git_object_cache=git_object_cache)
+
+    assert resolver.resolve() == path
+
+    assert git.clone.called is False
+    git_object_cache.is_referenced.assert_called_once_with(path=path)
+    assert manager.mock_calls == [
+        mock.call.mirror(repository=url),
+        mock.call.pull(cwd=path, retry=False)]
+
+
+def test_git_resolver_clone_strategy(testdirectory):
+
+    ctx = mock.Mock()
+    git = mock.Mock()
+    source = 'gitlab.com/steinwurf/links.git'
+    url = 'https://gitlab.com/steinwurf/links.git'
+
+    git_url_rewriter = mock.Mock()
+    git_url_rewriter.rewrite_url.return_value = url
+
+    cwd = testdirectory.path()
+
+    def fake_git_clone(repository, directory, cwd, reference, **kwargs):
+        os.makedirs(os.path.join(cwd, directory))
+
+    git.clone = mock.Mock(side_effect=fake_git_clone)
+
+    dependency = mock.Mock()
+    dependency.name = 'links'
+
+    resolver = GitResolver(
+        git=git, ctx=ctx, dependency=dependency,
+        git_url_rewriter=git_url_rewriter, source=source, cwd=cwd,
+        fetched_repositories=set(), clone_strategy='shallow')
+
+    path = resolver.resolve()
+
+    git.clone.assert_called_once_with(
+        repository=url, directory=os.path.basename(path), cwd=cwd,
+        reference=None, depth=1)
+
+
+def test_git_resolver_clone_branch(testdirectory):
+
+    git = mock.Mock()
+    url = 'https://gitlab.com/steinwurf/links.git'
+
+    git_url_rewriter = mock.Mock()
+    git_url_rewriter.rewrite_url.return_value = url
+
+    git_object_cache = mock.Mock()
+    git_object_cache.mirror.return_value = '/cache/links.git'
+
+    resolver = GitResolver(
+        git=git, ctx=mock.Mock(), dependency=mock.Mock(),
+        git_url_rewriter=git_url_rewriter,
+        source='gitlab.com/steinwurf/links.git', cwd=testdirectory.path(),
+        fetched_repositories=set(), git_object_cache=git_object_cache,
+        clone_strategy='blobless')
+
+    # The tags cloned by the GitSemverResolver also use the object cache
+    # and the clone strategy
+    resolver.clone(directory='5.1.0-abcdef', branch='5.1.0')
+
+    git.clone.assert_called_once_with(
+        repository=url, directory='5.1.0-abcdef', cwd=testdirectory.path(),
+        reference='/cache/links.git', filter_spec='blob:none',
+        branch='5.1.0')
@@ -1,7 +1,16 @@
 import os
+import hashlib
+import subprocess
+
 import mock
+import semver
 
+from wurf.git import Git
+from wurf.git_resolver import GitResolver
 from wurf.git_semver_resolver import GitSemverResolver
+from wurf.semver_selector import SemverSelector
+from wurf.git_checkout_backend import CopyCheckoutBackend
+from wurf.error import Error
 
 
 def test_git_semver_resolver(testdirectory):
@@ -22,13 +31,24 @@ def test_git_semver_resolver(testdirectory):
 
     git_resolver = mock.Mock()
     git_resolver.resolve.return_value = master_folder.path()
+    git_resolver.master_path.return_value = master_folder.path()
+    git_resolver.repository_url.return_value = 'https://gitlab.com/links.git'
+
+    # The remote is not available
+    git.remote_tags.side_effect = Error('fatal: unable to access')
 
     semver_selector = mock.Mock()
     semver_selector.select_tag.return_value = selected_tag
 
+    resolve_stamps = mock.Mock()
+    resolve_stamps.checkouts.return_value = []
+    resolve_stamps.verify.return_value = None
+
     resolver = GitSemverResolver(
         git=git, resolver=git_resolver, ctx=ctx,
-        semver_selector=semver_selector, dependency=dependency, cwd=cwd)
+        semver_selector=semver_selector, dependency=dependency, cwd=cwd,
+        checkout_backend=CopyCheckoutBackend(git=git),
+        resolve_stamps=resolve_stamps)
 
     path = resolver.resolve()
 
@@ -38,3 +58,277 @@ def test_git_semver_resolver(testdirectory):
     git.tags.assert_called_once_with(cwd=master_folder.path())
     git.checkout.assert_called_once_with(branch=selected_tag, cwd=path)
     git.pull_submodules.assert_called_once_with(cwd=path)
+
+
+def test_git_semver_resolver_remote_tags(testdirectory):
+
+    ctx = mock.Mock()
+    git = mock.Mock()
+    cwd = testdirectory.path()
+
+    master_path = os.path.join(testdirectory.path(), 'master-01234')
+
+    dependency = mock.Mock()
+    dependency.name = 'links'
+    dependency.major = 5
+    dependency.minor = None
+    selected_tag = '5.1.0'
+    remote_tags = ['4.0.0', '5.0.0', '5.1.0']
+
+    git_resolver = mock.Mock()
+    git_resolver.master_path.return_value = master_path
+    git_resolver.repository_url.return_value = 'https://gitlab.com/links.git'
+
+    git.remote_tags.return_value = remote_tags
+    git.missing_alternates.return_value = []
+
+    def clone(directory, branch, default_strategy):
+        os.mkdir(os.path.join(cwd, directory))
+
+    git_resolver.clone.side_effect = clone
+
+    semver_selector = mock.Mock()
+    semver_selector.select_tag.return_value = selected_tag
+
+    resolve_stamps = mock.Mock()
+    resolve_stamps.checkouts.return_value = []
+    resolve_stamps.verify.return_value = None
+
+    resolver = GitSemverResolver(
+        git=git, resolver=git_resolver, ctx=ctx,
+        semver_selector=semver_selector, dependency=dependency, cwd=cwd,
+        checkout_backend=CopyCheckoutBackend(git=git),
+        resolve_stamps=resolve_stamps)
+
+    path = resolver.resolve()
+
+    assert os.path.isdir(path)
+    assert dependency.git_tag == selected_tag
+
+    # Only the selected tag is cloned, the master is not
+    assert git_resolver.resolve.called is False
+
+    git.remote_tags.assert_called_once_with(
+        repository='https://gitlab.com/links.git', retry=False)
+    semver_selector.select_tag.assert_called_once_with(
+        major=5, tags=remote_tags, minor=None)
+    git_resolver.clone.assert_called_once_with(
+        directory=os.path.basename(path), branch=selected_tag,
+        default_strategy='shallow')
+    git.pull_submodules.assert_called_once_with(cwd=path)
+
+    git.reset_mock()
+
+    git_resolver.reset_mock()
+
+    # The tag is already checked out, only the submodules are checked
+    assert resolver.resolve() == path
+
+    assert git_resolver.clone.called is False
+    git.pull_submodules.assert_called_once_with(cwd=path)
+    assert git_resolver.resolve.called is False
+
+    git.reset_mock()
+
+    # A valid stamp skips checking the submodules
+    resolve_stamps.verify.return_value = 'abc'
+
+    assert resolver.resolve() == path
+    assert dependency.git_commit == 'abc'
+    assert git.pull_submodules.called is False
+
+    git_resolver.reset_mock()
+
+    # A checkout which borrowed objects from a deleted git object cache is
+    # cloned again
+    git.missing_alternates.return_value = ['/cache/links.git/objects']
+    resolve_stamps.verify.return_value = None
+
+    assert resolver.resolve() == path
+
+    git.missing_alternates.assert_called_with(cwd=path)
+    git_resolver.clone.assert_called_once_with(
+        directory=os.path.basename(path), branch=selected_tag,
+        default_strategy='shallow')
+
+
+def test_git_semver_resolver_stamped(testdirectory):
+
+    ctx = mock.Mock()
+    git = mock.Mock()
+    cwd = testdirectory.path()
+
+    master_path = os.path.join(testdirectory.path(), 'master-01234')
+    repo_hash = hashlib.sha1(master_path.encode('utf-8')).hexdigest()[:6]
+
+    dependency = mock.Mock()
+    dependency.name = 'links'
+    dependency.major = 5
+    dependency.minor = None
+
+    git_resolver = mock.Mock()
+    git_resolver.master_path.return_value = master_path
+    git_resolver.repository_url.return_value = 'https://gitlab.com/links.git'
+
+    semver_selector = mock.Mock()
+    semver_selector.select_tag.return_value = '5.1.0'
+
+    # The checkouts of a previous resolve, the last one is from another
+    # repository
+    resolve_stamps = mock.Mock()
+    resolve_stamps.checkouts.return_value = [
+        '5.0.0-' + repo_hash, '5.1.0-' + repo_hash, '6.0.0-abcdef']
+    resolve_stamps.verify.return_value = 'abc'
+
+    resolver = GitSemverResolver(
+        git=git, resolver=git_resolver, ctx=ctx,
+        semver_selector=semver_selector, dependency=dependency, cwd=cwd,
+        checkout_backend=mock.Mock(), resolve_stamps=resolve_stamps)
+
+    path = resolver.resolve()
+
+    assert path == os.path.join(cwd, '5.1.0-' + repo_hash)
+    assert dependency.git_tag == '5.1.0'
+    assert dependency.git_commit == 'abc'
+
+    # The remote is not contacted
+    assert git.remote_tags.called is False
+    assert git_resolver.resolve.called is False
+
+    semver_selector.select_tag.assert_called_once_with(
+        major=5, tags=['5.0.0', '5.1.0'], minor=None)
+    resolve_stamps.verify.assert_called_once_with(
+        checkout_path=path, dependency=dependency, checkout='5.1.0')
+
+    # When the tags are refreshed, the remote tags are listed
+    git.remote_tags.return_value = ['5.0.0', '5.1.0']
+
+    resolver = GitSemverResolver(
+        git=git, resolver=git_resolver, ctx=ctx,
+        semver_selector=semver_selector, dependency=dependency, cwd=cwd,
+        checkout_backend=mock.Mock(), resolve_stamps=resolve_stamps,
+        refresh_tags=True)
+
+    os.mkdir(path)
+
+    assert resolver.resolve() == path
+
+    git.remote_tags.assert_called_once_with(
+        repository='https://gitlab.com/links.git', retry=False)
+
+
+def run(args, cwd=None):
+    return subprocess.check_output(
+        args, cwd=cwd, stderr=subprocess.STDOUT).decode('utf-8')
+
+
+def commit_tag(directory, tag):
+    directory.write_text('version.txt', tag, encoding='utf-8')
+    run(['git', 'add', '.'], cwd=directory.path())
+    run(['git', '-c', 'user.name=John', '-c', 'user.email=doe@email.org',
+         'commit', '-m', tag], cwd=directory.path())
+    run(['git', 'tag', tag], cwd=directory.path())
+
+
+def test_git_semver_resolver_shallow_clone(testdirectory):
+
+    upstream = testdirectory.mkdir('upstream')
+    run(['git', 'init'], cwd=upstream.path())
+
+    for tag in [u'5.0.0', u'5.1.0', u'6.0.0']:
+        commit_tag(directory=upstream, tag=tag)
+
+    ctx = mock.Mock()
+    ctx.cmd_and_log.side_effect = run
+
+    git = Git(git_binary='git', ctx=ctx)
+
+    # The remote tags cannot be listed, so the tags are selected from the
+    # master clone
+    semver_git = mock.Mock(wraps=git)
+    semver_git.remote_tags.side_effect = Error('fatal: unable to access')
+
+    git_url_rewriter = mock.Mock()
+    git_url_rewriter.rewrite_url.return_value = 'file://' + upstream.path()
+
+    dependency = mock.Mock()
+    dependency.name = 'links'
+    dependency.major = 5
+    dependency.minor = None
+
+    cwd = testdirectory.mkdir('resolve').path()
+
+    git_resolver = GitResolver(
+        git=git, ctx=ctx, dependency=dependency,
+        git_url_rewriter=git_url_rewriter, source='upstream', cwd=cwd,
+        fetched_repositories=set(), clone_strategy='shallow')
+
+    resolve_stamps = mock.Mock()
+    resolve_stamps.checkouts.return_value = []
+    resolve_stamps.verify.return_value = None
+
+    resolver = GitSemverResolver(
+        git=semver_git, resolver=git_resolver, ctx=ctx,
+        semver_selector=SemverSelector(semver=semver),
+        dependency=dependency, cwd=cwd,
+        checkout_backend=CopyCheckoutBackend(git=git),
+        resolve_stamps=resolve_stamps)
+
+    path = resolver.resolve()
+
+    # The shallow master clone only contained the newest tag, the other tags
+    # were fetched before the tag was selected
+    assert git.is_shallow(cwd=git_resolver.master_path())
+    assert dependency.git_tag == '5.1.0'
+
+    with open(os.path.join(path, 'version.txt'), 'r') as version_file:
+        assert version_file.read() == '5.1.0'
+
+
+def test_git_semver_resolver_shallow_tag(testdirectory):
+
+    upstream = testdirectory.mkdir('upstream')
+    run(['git', 'init'], cwd=upstream.path())
+
+    for tag in [u'5.0.0', u'5.1.0', u'6.0.0']:
+        commit_tag(directory=upstream, tag=tag)
+
+    ctx = mock.Mock()
+    ctx.cmd_and_log.side_effect = run
+
+    git = Git(git_binary='git', ctx=ctx)
+
+    git_url_rewriter = mock.Mock()
+    git_url_rewriter.rewrite_url.return_value = 'file://' + upstream.path()
+
+    dependency = mock.Mock()
+    dependency.name = 'links'
+    dependency.major = 5
+    dependency.minor = None
+
+    cwd = testdirectory.mkdir('resolve').path()
+
+    # No clone strategy was selected
+    git_resolver = GitResolver(
+        git=git, ctx=ctx, dependency=dependency,
+        git_url_rewriter=git_url_rewriter, source='upstream', cwd=cwd,
+        fetched_repositories=set())
+
+    resolve_stamps = mock.Mock()
+    resolve_stamps.checkouts.return_value = []
+    resolve_stamps.verify.return_value = None
+
+    resolver = GitSemverResolver(
+        git=git, resolver=git_resolver, ctx=ctx,
+        semver_selector=SemverSelector(semver=semver),
+        dependency=dependency, cwd=cwd,
+        checkout_backend=CopyCheckoutBackend(git=git),
+        resolve_stamps=resolve_stamps)
+
+    path = resolver.resolve()
+
+    # Only the tagged commit was cloned
+    assert dependency.git_tag == '5.1.0'
+    assert git.is_shallow(cwd=path)
+    assert run(['git', 'rev-list', '--count', 'HEAD'], cwd=path) == '1\n'
+    assert not os.path.isdir(git_resolver.master_path())
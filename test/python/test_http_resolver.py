@@ -1,7 +1,20 @@
 import mock
 import os
+import hashlib
 
 from wurf.http_resolver import HttpResolver
+from wurf.download_cache import DownloadCache
+from wurf.resolve_scheduler import ResolveJob
+
+
+def submit(download):
+    """ Returns a mock submit(...) function which runs the download. """
+    def run(**kwargs):
+        job = ResolveJob(function=lambda: download(**kwargs))
+        job.run()
+        return job
+
+    return run
 
 
 def test_http_resolver(testdirectory):
@@ -9,11 +22,12 @@ def test_http_resolver(testdirectory):
     url_download = mock.Mock()
     dependency = mock.Mock()
     dependency.filename = None
+    dependency.sha256 = None
 
     http_source = 'http://example.com/file.zip'
     cwd = testdirectory.path()
 
-    def create_file(cwd, source, filename):
+    def create_file(cwd, source, filename, sha256):
         assert http_source == source
         assert filename is None
 
@@ -22,7 +36,7 @@ def test_http_resolver(testdirectory):
 
         return os.path.join(httpdir.path(), 'file.zip')
 
-    url_download.download.side_effect = create_file
+    url_download.submit.side_effect = submit(create_file)
 
     resolver = HttpResolver(
         url_download=url_download, dependency=dependency, source=http_source,
@@ -39,11 +53,12 @@ def test_http_resolver_filename(testdirectory):
     url_download = mock.Mock()
     dependency = mock.Mock()
     dependency.filename = 'foo.zip'
+    dependency.sha256 = None
 
     http_source = 'http://example.com/file.zip'
     cwd = testdirectory.path()
 
-    def create_file(cwd, source, filename):
+    def create_file(cwd, source, filename, sha256):
         assert http_source == source
         assert filename == 'foo.zip'
 
@@ -52,7 +67,7 @@ def test_http_resolver_filename(testdirectory):
 
         return os.path.join(httpdir.path(), 'foo.zip')
 
-    url_download.download.side_effect = create_file
+    url_download.submit.side_effect = submit(create_file)
 
     resolver = HttpResolver(
         url_download=url_download, dependency=dependency, source=http_source,
@@ -62,3 +77,54 @@ def test_http_resolver_filename(testdirectory):
     assert os.path.isfile(path)
 
     assert testdirectory.contains_file('http-*/foo.zip')
+
+
+def test_http_resolver_download_cache(testdirectory):
+
+    url_download = mock.Mock()
+    download_cache = DownloadCache(
+        cache_path=testdirectory.mkdir('cache').path())
+
+    content = b'hello_world'
+    sha256 = hashlib.sha256(content).hexdigest()
+
+    dependency = mock.Mock()
+    dependency.filename = None
+    dependency.sha256 = sha256
+
+    http_source = 'http://example.com/file.zip'
+
+    def create_file(cwd, source, filename, sha256):
+        assert http_source == source
+        assert sha256 == dependency.sha256
+
+        httpdir = testdirectory.from_path(cwd)
+        httpdir.write_binary('file.zip', content)
+
+        return os.path.join(httpdir.path(), 'file.zip')
+
+    url_download.submit.side_effect = submit(create_file)
+
+    resolver = HttpResolver(
+        url_download=url_download, dependency=dependency, source=http_source,
+        cwd=testdirectory.mkdir('first').path(),
+        download_cache=download_cache)
+
+    path = resolver.resolve()
+    assert os.path.isfile(path)
+    assert url_download.submit.call_count == 1
+    assert download_cache.get(sha256=sha256)
+
+    # A second project finds the file in the cache
+    resolver = HttpResolver(
+        url_download=url_download, dependency=dependency, source=http_source,
+        cwd=testdirectory.mkdir('second').path(),
+        download_cache=download_cache)
+
+    path = resolver.resolve()
+    assert os.path.isfile(path)
+    assert os.path.basename(path) == 'file.zip'
+    assert url_download.submit.call_count == 1
+
+    with open(path, 'rb') as f:
+        assert f.read() == content
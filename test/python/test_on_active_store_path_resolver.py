@@ -1,16 +1,30 @@
 import mock
 
 from wurf.on_active_store_path_resolver import OnActiveStorePathResolver
+from wurf.resolve_manifest import ResolveManifest
 
 
 def test_on_active_store_path_resolver(testdirectory):
-    # @todo add tests
+
     resolver = mock.Mock()
+    resolver.resolve.return_value = '/tmp/foo'
+
     dependency = mock.Mock()
-    resolve_config_path = testdirectory.path()
+    dependency.name = 'foo'
+    dependency.sha1 = '1234'
+    dependency.is_symlink = False
+    dependency.real_path = None
+    dependency.git_commit = 'abcd'
+
+    resolve_manifest = ResolveManifest(
+        resolve_config_path=testdirectory.path())
 
     resolve = OnActiveStorePathResolver(
         resolver=resolver, dependency=dependency,
-        resolve_config_path=resolve_config_path)
+        resolve_manifest=resolve_manifest)
+
+    assert resolve.resolve() == '/tmp/foo'
 
-    assert resolve
+    assert resolve_manifest.dependency(name='foo') == {
+        'sha1': '1234', 'path': '/tmp/foo', 'is_symlink': False,
+        'real_path': None, 'commit': 'abcd'}
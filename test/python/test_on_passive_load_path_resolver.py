@@ -1,15 +1,38 @@
 import mock
+import pytest
 
 from wurf.on_passive_load_path_resolver import OnPassiveLoadPathResolver
+from wurf.resolve_manifest import ResolveManifest
+from wurf.error import DependencyError
 
 
 def test_on_passive_load_path_resolver(testdirectory):
-    # @todo add tests
+
     dependency = mock.Mock()
-    resolve_config_path = testdirectory.path()
+    dependency.name = 'foo'
+    dependency.sha1 = '1234'
+
+    foo = testdirectory.mkdir('foo')
+
+    resolve_manifest = ResolveManifest(
+        resolve_config_path=testdirectory.path())
 
     resolve = OnPassiveLoadPathResolver(
-        dependency=dependency,
-        resolve_config_path=resolve_config_path)
+        dependency=dependency, resolve_manifest=resolve_manifest)
+
+    # The dependency is not in the manifest
+    with pytest.raises(DependencyError):
+        resolve.resolve()
+
+    resolve_manifest.store_dependency(name='foo', config={
+        'sha1': '1234', 'path': foo.path(), 'is_symlink': False,
+        'real_path': None, 'commit': 'abcd'})
+
+    assert resolve.resolve() == foo.path()
+    assert dependency.git_commit == 'abcd'
+
+    # The definition of the dependency changed
+    dependency.sha1 = '5678'
 
-    assert resolve
+    with pytest.raises(DependencyError):
+        resolve.resolve()
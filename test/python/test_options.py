@@ -190,3 +190,333 @@ def test_exclusive_lock_options():
                           default_resolve_path='resolve_path',
                           default_symlinks_path="symlinks_path",
                           supported_git_protocols="")
+
+
+def test_resolve_jobs():
+
+    parser = argparse.ArgumentParser()
+    args = ['--foo', '-b']
+
+    options = Options(args=args, parser=parser,
+                      default_resolve_path='resolve_path',
+                      default_symlinks_path="symlinks_path",
+                      supported_git_protocols="")
+
+    assert options.resolve_jobs() == 1
+
+    parser = argparse.ArgumentParser()
+    args = ['--foo', '--resolve_jobs=8', '-b']
+
+    options = Options(args=args, parser=parser,
+                      default_resolve_path='resolve_path',
+                      default_symlinks_path="symlinks_path",
+                      supported_git_protocols="")
+
+    assert options.resolve_jobs() == 8
+
+    # At least one job is needed
+    parser = argparse.ArgumentParser()
+    args = ['--resolve_jobs=0']
+
+    with pytest.raises(SystemExit):
+        options = Options(args=args, parser=parser,
+                          default_resolve_path='resolve_path',
+                          default_symlinks_path="symlinks_path",
+                          supported_git_protocols="")
+
+
+def test_download_jobs():
+
+    parser = argparse.ArgumentParser()
+    args = ['--foo', '-b']
+
+    options = Options(args=args, parser=parser,
+                      default_resolve_path='resolve_path',
+                      default_symlinks_path="symlinks_path",
+                      supported_git_protocols="")
+
+    assert options.download_jobs() == 4
+
+    parser = argparse.ArgumentParser()
+    args = ['--foo', '--download_jobs=2', '-b']
+
+    options = Options(args=args, parser=parser,
+                      default_resolve_path='resolve_path',
+                      default_symlinks_path="symlinks_path",
+                      supported_git_protocols="")
+
+    assert options.download_jobs() == 2
+
+
+def test_race_sources():
+
+    parser = argparse.ArgumentParser()
+    args = ['--foo', '-b']
+
+    options = Options(args=args, parser=parser,
+                      default_resolve_path='resolve_path',
+                      default_symlinks_path="symlinks_path",
+                      supported_git_protocols="")
+
+    assert not options.race_sources()
+
+    parser = argparse.ArgumentParser()
+    args = ['--foo', '--race_sources', '-b']
+
+    options = Options(args=args, parser=parser,
+                      default_resolve_path='resolve_path',
+                      default_symlinks_path="symlinks_path",
+                      supported_git_protocols="")
+
+    assert options.race_sources()
+
+
+def test_submodule_options():
+
+    parser = argparse.ArgumentParser()
+    args = ['--foo', '-b']
+
+    options = Options(args=args, parser=parser,
+                      default_resolve_path='resolve_path',
+                      default_symlinks_path="symlinks_path",
+                      supported_git_protocols="")
+
+    assert options.submodule_jobs() == 4
+    assert not options.shallow_submodules()
+
+    parser = argparse.ArgumentParser()
+    args = ['--foo', '--submodule_jobs=8', '--shallow_submodules', '-b']
+
+    options = Options(args=args, parser=parser,
+                      default_resolve_path='resolve_path',
+                      default_symlinks_path="symlinks_path",
+                      supported_git_protocols="")
+
+    assert options.submodule_jobs() == 8
+    assert options.shallow_submodules()
+
+
+def test_resolve_profile():
+
+    parser = argparse.ArgumentParser()
+    args = ['--foo', '-b']
+
+    options = Options(args=args, parser=parser,
+                      default_resolve_path='resolve_path',
+                      default_symlinks_path="symlinks_path",
+                      supported_git_protocols="")
+
+    assert options.resolve_profile() is None
+    assert not options.resolve_profile_pstats()
+
+    parser = argparse.ArgumentParser()
+    args = ['--foo', '--resolve_profile=trace.json',
+            '--resolve_profile_pstats', '-b']
+
+    options = Options(args=args, parser=parser,
+                      default_resolve_path='resolve_path',
+                      default_symlinks_path="symlinks_path",
+                      supported_git_protocols="")
+
+    assert options.resolve_profile() == 'trace.json'
+    assert options.resolve_profile_pstats()
+
+
+def test_network_options():
+
+    parser = argparse.ArgumentParser()
+    args = ['--foo', '-b']
+
+    options = Options(args=args, parser=parser,
+                      default_resolve_path='resolve_path',
+                      default_symlinks_path="symlinks_path",
+                      supported_git_protocols="")
+
+    assert options.network_timeout() is None
+    assert options.network_retries() == 2
+    assert options.network_backoff() == 1.0
+
+    parser = argparse.ArgumentParser()
+    args = ['--foo', '--network_timeout=30', '--network_retries=0',
+            '--network_backoff=0.5', '-b']
+
+    options = Options(args=args, parser=parser,
+                      default_resolve_path='resolve_path',
+                      default_symlinks_path="symlinks_path",
+                      supported_git_protocols="")
+
+    assert options.network_timeout() == 30.0
+    assert options.network_retries() == 0
+    assert options.network_backoff() == 0.5
+
+
+def test_clone_strategy():
+
+    parser = argparse.ArgumentParser()
+    args = ['--foo', '-b']
+
+    options = Options(args=args, parser=parser,
+                      default_resolve_path='resolve_path',
+                      default_symlinks_path="symlinks_path",
+                      supported_git_protocols="")
+
+    assert options.clone_strategy() is None
+
+    parser = argparse.ArgumentParser()
+    args = ['--foo', '--clone_strategy=blobless', '-b']
+
+    options = Options(args=args, parser=parser,
+                      default_resolve_path='resolve_path',
+                      default_symlinks_path="symlinks_path",
+                      supported_git_protocols="")
+
+    assert options.clone_strategy() == 'blobless'
+
+
+def test_force_resolve():
+
+    parser = argparse.ArgumentParser()
+    args = ['--foo', '-b']
+
+    options = Options(args=args, parser=parser,
+                      default_resolve_path='resolve_path',
+                      default_symlinks_path="symlinks_path",
+                      supported_git_protocols="")
+
+    assert not options.force_resolve()
+
+    parser = argparse.ArgumentParser()
+    args = ['--foo', '--force_resolve', '-b']
+
+    options = Options(args=args, parser=parser,
+                      default_resolve_path='resolve_path',
+                      default_symlinks_path="symlinks_path",
+                      supported_git_protocols="")
+
+    assert options.force_resolve()
+
+
+def test_tag_database_url():
+
+    parser = argparse.ArgumentParser()
+    args = ['--foo', '-b']
+
+    options = Options(args=args, parser=parser,
+                      default_resolve_path='resolve_path',
+                      default_symlinks_path="symlinks_path",
+                      supported_git_protocols="")
+
+    assert options.tag_database_url() is None
+
+    parser = argparse.ArgumentParser()
+    args = ['--foo', '--tag_database_url', 'file:///tmp/tags.json', '-b']
+
+    options = Options(args=args, parser=parser,
+                      default_resolve_path='resolve_path',
+                      default_symlinks_path="symlinks_path",
+                      supported_git_protocols="")
+
+    assert options.tag_database_url() == 'file:///tmp/tags.json'
+
+
+def test_download_cache():
+
+    parser = argparse.ArgumentParser()
+    args = ['--foo', '-b']
+
+    options = Options(args=args, parser=parser,
+                      default_resolve_path='resolve_path',
+                      default_symlinks_path="symlinks_path",
+                      supported_git_protocols="")
+
+    assert options.download_cache() is None
+
+    parser = argparse.ArgumentParser()
+    args = ['--foo', '--download_cache', '~/.cache/downloads', '-b']
+
+    options = Options(args=args, parser=parser,
+                      default_resolve_path='resolve_path',
+                      default_symlinks_path="symlinks_path",
+                      supported_git_protocols="")
+
+    assert options.download_cache() == '~/.cache/downloads'
+    assert options.unknown_args == ['--foo', '-b']
+
+
+def test_dependency_options():
+
+    foo = mock.Mock()
+    foo.name = 'foo'
+    foo.resolver = 'git'
+
+    bar = mock.Mock()
+    bar.name = 'bar'
+    bar.resolver = 'http'
+
+    parser = argparse.ArgumentParser()
+    args = ['configure', '--foo_path', '/tmp/foo', '--bar_path=/tmp/bar',
+            '--foo_checkout', '-j', '4', '--prefix', '/usr', 'build']
+
+    options = Options(args=args, parser=parser,
+                      default_resolve_path='resolve_path',
+                      default_symlinks_path='symlinks_path',
+                      supported_git_protocols='')
+
+    # The dependency options are not removed before the dependency is added
+    assert '--foo_path' in options.unknown_args
+
+    options.add_dependency(foo)
+    options.add_dependency(bar)
+
+    assert options.path(dependency=foo) == '/tmp/foo'
+    assert options.checkout(dependency=foo) is None
+    assert options.path(dependency=bar) == '/tmp/bar'
+
+    # The remaining arguments are passed to waf
+    assert options.unknown_args == ['configure', '-j', '4', '--prefix',
+                                    '/usr', 'build']
+
+    # If an option is repeated the last value is used
+    parser = argparse.ArgumentParser()
+    args = ['--foo_checkout=1.0.0', '--foo_checkout', '2.0.0']
+
+    options = Options(args=args, parser=parser,
+                      default_resolve_path='resolve_path',
+                      default_symlinks_path='symlinks_path',
+                      supported_git_protocols='')
+
+    options.add_dependency(foo)
+
+    assert options.checkout(dependency=foo) == '2.0.0'
+    assert options.unknown_args == []
+
+
+def test_resolve_args():
+
+    foo = mock.Mock()
+    foo.name = 'foo'
+    foo.resolver = 'git'
+
+    parser = argparse.ArgumentParser()
+    args = ['configure', '--foo_path', '/tmp/foo', '--prefix', 'build',
+            '--bar=1', '--resolve_jobs', '2']
+
+    options = Options(args=args, parser=parser,
+                      default_resolve_path='resolve_path',
+                      default_symlinks_path='symlinks_path',
+                      supported_git_protocols='')
+
+    resolve_args = options.resolve_args()
+
+    assert resolve_args['--resolve_jobs'] == 2
+    assert resolve_args['--foo_path'] == '/tmp/foo'
+    assert resolve_args['--bar'] == '1'
+
+    # The argument following a waf option may be a waf command
+    assert resolve_args['--prefix'] is None
+    assert 'build' not in resolve_args.values()
+
+    # The resolve arguments do not change when a dependency is added
+    options.add_dependency(foo)
+
+    assert options.resolve_args() == resolve_args
@@ -0,0 +1,53 @@
+import mock
+
+from wurf.race_sources_resolver import RaceSourcesResolver
+from wurf.source_race import SourceRace
+
+
+def test_race_sources_resolver():
+
+    github = mock.Mock()
+    github.resolve.return_value = '/tmp/github'
+
+    gitlab = mock.Mock()
+    gitlab.resolve.return_value = None
+
+    resolver = RaceSourcesResolver(resolvers=[github, gitlab],
+                                   sources=['github', 'gitlab'])
+
+    assert resolver.resolve() == '/tmp/github'
+    assert gitlab.resolve.call_count == 0
+
+
+def test_race_sources_resolver_lost():
+
+    calls = []
+
+    def resolve_github():
+        calls.append('github')
+
+        # The first fetch races the sources, the race is only lost once
+        if calls.count('github') == 1:
+            raise SourceRace.Lost(source='github', winner='mirror')
+
+        return '/tmp/github'
+
+    def resolve_mirror():
+        calls.append('mirror')
+        return None
+
+    github = mock.Mock()
+    github.resolve.side_effect = resolve_github
+
+    gitlab = mock.Mock()
+    gitlab.resolve.side_effect = lambda: calls.append('gitlab')
+
+    mirror = mock.Mock()
+    mirror.resolve.side_effect = resolve_mirror
+
+    resolver = RaceSourcesResolver(resolvers=[github, gitlab, mirror],
+                                   sources=['github', 'gitlab', 'mirror'])
+
+    # The winner is tried first, then the source which lost the race
+    assert resolver.resolve() == '/tmp/github'
+    assert calls == ['github', 'mirror', 'github']
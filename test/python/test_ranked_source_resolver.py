@@ -0,0 +1,55 @@
+import mock
+import pytest
+
+from wurf.ranked_source_resolver import RankedSourceResolver
+from wurf.error import Error
+
+
+def test_ranked_source_resolver():
+
+    resolver = mock.Mock()
+    resolver.resolve.return_value = '/tmp/foo'
+
+    source_ranking = mock.Mock()
+    source_race = mock.Mock()
+    source_race.fetch_seconds.return_value = 2.5
+
+    ranked = RankedSourceResolver(
+        resolver=resolver, source_ranking=source_ranking,
+        source_race=source_race, source='github.com/foo.git')
+
+    assert ranked.resolve() == '/tmp/foo'
+
+    source_race.fetch_seconds.assert_called_once_with(
+        source='github.com/foo.git')
+    source_ranking.record_success.assert_called_once_with(
+        source='github.com/foo.git', seconds=2.5)
+
+    resolver.resolve.side_effect = Error('clone failed')
+
+    with pytest.raises(Error):
+        ranked.resolve()
+
+    source_ranking.record_failure.assert_called_once_with(
+        source='github.com/foo.git')
+
+
+def test_ranked_source_resolver_no_fetch():
+
+    resolver = mock.Mock()
+    resolver.resolve.return_value = '/tmp/foo'
+
+    source_ranking = mock.Mock()
+
+    # The dependency was resolved without fetching e.g. from a valid stamp
+    source_race = mock.Mock()
+    source_race.fetch_seconds.return_value = None
+
+    ranked = RankedSourceResolver(
+        resolver=resolver, source_ranking=source_ranking,
+        source_race=source_race, source='github.com/foo.git')
+
+    assert ranked.resolve() == '/tmp/foo'
+
+    assert source_ranking.record_success.call_count == 0
+    assert source_ranking.record_failure.call_count == 0
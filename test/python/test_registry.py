@@ -2,6 +2,8 @@ import pytest
 
 from wurf.registry import Registry
 from wurf.registry import RegistryCacheOnceError
+from wurf.registry import RegistryInjectError
+from wurf.registry import provider_arguments
 
 
 class Point(object):
@@ -181,8 +183,11 @@ def test_registry_cache():
     registry.cache_provider(provider_name='foo', once=True)
     registry.cache_provider(provider_name='bar', once=False)
 
+    # Lists are compared by identity
+    data = [1, 2, 3]
+
     with registry.provide_temporary() as tmp:
-        tmp.provide_value('data', [1, 2, 3])
+        tmp.provide_value('data', data)
         tmp.provide_value('value', 2)
 
         f = registry.require('foo')
@@ -204,6 +209,12 @@ def test_registry_cache():
     with registry.provide_temporary() as tmp:
         tmp.provide_value('data', [1, 2, 3])
 
+        with pytest.raises(RegistryCacheOnceError):
+            f = registry.require('foo')
+
+    with registry.provide_temporary() as tmp:
+        tmp.provide_value('data', data)
+
         f = registry.require('foo')
         assert f.seen is True
 
@@ -212,3 +223,68 @@ def test_registry_cache():
         b = registry.require('bar')
         assert b.seen is False
         b.seen = True
+
+
+def test_registry_cache_size():
+
+    registry = Registry(use_providers=False, use_cache_providers=False)
+
+    def build_point(x):
+        return Point(x=x, y=0)
+
+    registry.provide_function('point', build_point)
+    registry.cache_provider(provider_name='point', once=False, max_size=2)
+
+    def require(x):
+        with registry.provide_temporary() as tmp:
+            tmp.provide_value('x', x)
+            return registry.require('point')
+
+    p1 = require(x=1)
+    p2 = require(x=2)
+
+    assert require(x=1) is p1
+
+    # The least recently used value is evicted, which is x=2
+    p3 = require(x=3)
+
+    assert require(x=1) is p1
+    assert require(x=3) is p3
+    assert require(x=2) is not p2
+
+    statistics = registry.cache_statistics()['point']
+
+    assert statistics['hits'] == 3
+    assert statistics['misses'] == 4
+    assert statistics['evictions'] == 2
+    assert statistics['size'] == 2
+    assert statistics['time'] >= 0.0
+
+    registry.purge_cache()
+
+    assert registry.cache_statistics()['point']['size'] == 0
+
+
+def test_registry_provider_arguments():
+
+    def build_point(x, y, registry):
+        return Point(x=x, y=y)
+
+    assert provider_arguments(build_point) == ('x', 'y', 'registry')
+
+    registry = Registry(use_providers=False, use_cache_providers=False)
+    registry.provide_function('point', build_point)
+    registry.provide_value('x', 1)
+
+    with pytest.raises(RegistryInjectError):
+        registry.require('point')
+
+    # The providers are looked up when required, so the value can be
+    # provided after the provider function was added
+    with registry.provide_temporary() as tmp:
+        tmp.provide_value('y', 2)
+
+        p = registry.require('point')
+
+    assert p.x == 1
+    assert p.y == 2
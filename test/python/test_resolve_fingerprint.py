@@ -0,0 +1,104 @@
+import argparse
+
+from wurf.options import Options
+from wurf.resolve_fingerprint import ResolveFingerprint
+
+
+def create_fingerprint(testdirectory, args, environment={}):
+    options = Options(args=args, parser=argparse.ArgumentParser(),
+                      default_resolve_path='resolved_dependencies',
+                      default_symlinks_path='resolve_symlinks',
+                      supported_git_protocols=['https://'])
+
+    return ResolveFingerprint(
+        options=options, environment=environment,
+        project_path=testdirectory.path(),
+        resolve_config_path=testdirectory.mkdir('build').path(),
+        lock_file='lock_resolve.json')
+
+
+def test_resolve_fingerprint(testdirectory):
+
+    args = ['configure', '--foo_path', '/tmp/foo', '--resolve_jobs=4']
+
+    fingerprint = create_fingerprint(testdirectory=testdirectory, args=args)
+
+    assert not fingerprint.is_unchanged()
+
+    fingerprint.store()
+
+    assert fingerprint.is_unchanged()
+
+    # The commands and the --force_resolve option are not resolve inputs
+    fingerprint = create_fingerprint(
+        testdirectory=testdirectory,
+        args=['configure', 'build', '--foo_path', '/tmp/foo',
+              '--resolve_jobs=4', '--force_resolve'])
+
+    assert fingerprint.is_unchanged()
+
+    # The options which only change how the resolve is done are not
+    # resolve inputs
+    fingerprint = create_fingerprint(
+        testdirectory=testdirectory,
+        args=['configure', '--foo_path', '/tmp/foo', '--resolve_jobs=8',
+              '--download_jobs=2', '--network_timeout=30',
+              '--network_retries=5', '--resolve_profile=trace.json'])
+
+    assert fingerprint.is_unchanged()
+
+    # The value of an option changed
+    fingerprint = create_fingerprint(
+        testdirectory=testdirectory,
+        args=['configure', '--foo_path', '/tmp/bar', '--resolve_jobs=4'])
+
+    assert not fingerprint.is_unchanged()
+
+    # A waf command following a waf option is not the value of the option
+    fingerprint = create_fingerprint(
+        testdirectory=testdirectory,
+        args=['configure', '--foo', '--foo_path', '/tmp/foo',
+              '--resolve_jobs=4'])
+    fingerprint.store()
+
+    fingerprint = create_fingerprint(
+        testdirectory=testdirectory,
+        args=['configure', '--foo', 'build', '--foo_path', '/tmp/foo',
+              '--resolve_jobs', '4'])
+
+    assert fingerprint.is_unchanged()
+
+    fingerprint = create_fingerprint(
+        testdirectory=testdirectory,
+        args=['configure', '--foo=build', '--foo_path', '/tmp/foo',
+              '--resolve_jobs=4'])
+
+    assert not fingerprint.is_unchanged()
+
+    fingerprint = create_fingerprint(testdirectory=testdirectory, args=args)
+    fingerprint.store()
+
+    # The environment used by git changed, other variables do not matter
+    fingerprint = create_fingerprint(
+        testdirectory=testdirectory, args=args,
+        environment={'TERM': 'xterm'})
+
+    assert fingerprint.is_unchanged()
+
+    fingerprint = create_fingerprint(
+        testdirectory=testdirectory, args=args,
+        environment={'GIT_SSH_COMMAND': 'ssh -i key'})
+
+    assert not fingerprint.is_unchanged()
+
+    # A lock file was added
+    fingerprint = create_fingerprint(testdirectory=testdirectory, args=args)
+    testdirectory.write_text('lock_resolve.json', u'{}', encoding='utf-8')
+
+    assert not fingerprint.is_unchanged()
+
+    fingerprint.store()
+    assert fingerprint.is_unchanged()
+
+    fingerprint.remove()
+    assert not fingerprint.is_unchanged()
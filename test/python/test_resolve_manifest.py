@@ -0,0 +1,60 @@
+import os
+import json
+
+from wurf.resolve_manifest import ResolveManifest
+
+
+def test_resolve_manifest(testdirectory):
+
+    manifest_path = os.path.join(testdirectory.path(),
+                                 ResolveManifest.MANIFEST_FILE)
+
+    resolve_manifest = ResolveManifest(
+        resolve_config_path=testdirectory.path())
+
+    assert resolve_manifest.dependency(name='foo') is None
+    assert resolve_manifest.tags(name='foo') == {}
+
+    # Nothing changed, so nothing is written
+    resolve_manifest.write()
+    assert not os.path.isfile(manifest_path)
+
+    config = {'sha1': '1234', 'path': '/tmp/foo', 'is_symlink': False,
+              'real_path': None, 'commit': 'abcd'}
+
+    resolve_manifest.store_dependency(name='foo', config=config)
+    resolve_manifest.store_tags(name='foo', tags={'1.0.0': '/tmp/foo'})
+
+    # The manifest is only written on request
+    assert not os.path.isfile(manifest_path)
+    resolve_manifest.write()
+
+    # Only the manifest is left in the folder
+    assert os.listdir(testdirectory.path()) == [ResolveManifest.MANIFEST_FILE]
+
+    with open(manifest_path, 'r') as manifest_file:
+        manifest = json.load(manifest_file)
+
+    assert manifest == {'dependencies': {'foo': config},
+                        'tags': {'foo': {'1.0.0': '/tmp/foo'}}}
+
+    # A new instance reads the manifest once
+    resolve_manifest = ResolveManifest(
+        resolve_config_path=testdirectory.path())
+
+    assert resolve_manifest.dependency(name='foo') == config
+    os.remove(manifest_path)
+    assert resolve_manifest.tags(name='foo') == {'1.0.0': '/tmp/foo'}
+
+    # The returned values are copies
+    resolve_manifest.dependency(name='foo')['path'] = '/tmp/bar'
+    assert resolve_manifest.dependency(name='foo') == config
+
+    # A corrupt manifest is ignored
+    with open(manifest_path, 'w') as manifest_file:
+        manifest_file.write('{')
+
+    resolve_manifest = ResolveManifest(
+        resolve_config_path=testdirectory.path())
+
+    assert resolve_manifest.dependency(name='foo') is None
@@ -0,0 +1,70 @@
+import json
+import os
+import pstats
+import pytest
+
+from wurf.resolve_profile import ResolveProfile
+from wurf.resolve_profile import profile_span
+
+
+def test_resolve_profile(testdirectory):
+
+    path = os.path.join(testdirectory.path(), 'profile.json')
+    profile = ResolveProfile(path=path)
+
+    with profile.phase(name='resolve'):
+
+        with profile.span(name='git clone', category='subprocess',
+                          args={'cwd': '/tmp'}):
+            pass
+
+        with pytest.raises(RuntimeError):
+            with profile.span(name='download', category='http'):
+                raise RuntimeError('timeout')
+
+    # Nothing is recorded without a profile
+    with profile_span(None, name='git pull', category='subprocess'):
+        pass
+
+    profile.write()
+
+    with open(path, 'r') as trace_file:
+        trace = json.load(trace_file)
+
+    events = trace['traceEvents']
+    spans = dict((e['name'], e) for e in events if e['ph'] == 'X')
+
+    assert sorted(spans) == ['download', 'git clone', 'resolve']
+
+    assert spans['git clone']['cat'] == 'subprocess'
+    assert spans['git clone']['args'] == {'cwd': '/tmp'}
+    assert spans['download']['args'] == {'error': 'timeout'}
+    assert spans['resolve']['cat'] == 'phase'
+
+    # The phase contains the spans
+    for name in ['git clone', 'download']:
+        assert spans[name]['ts'] >= spans['resolve']['ts']
+        assert spans[name]['ts'] + spans[name]['dur'] <= \
+            spans['resolve']['ts'] + spans['resolve']['dur']
+
+    # The thread is named once
+    metadata = [e for e in events if e['ph'] == 'M']
+    assert len(metadata) == 1
+    assert metadata[0]['name'] == 'thread_name'
+
+    # Without pstats no statistics are written
+    assert not os.path.exists(profile.pstats_path(phase='resolve'))
+
+
+def test_resolve_profile_pstats(testdirectory):
+
+    path = os.path.join(testdirectory.path(), 'profile.json')
+    profile = ResolveProfile(path=path, pstats=True)
+
+    with profile.phase(name='resolve'):
+        sorted(range(100))
+
+    stats_path = profile.pstats_path(phase='resolve')
+
+    assert stats_path == path + '.resolve.pstats'
+    assert pstats.Stats(stats_path).total_calls > 0
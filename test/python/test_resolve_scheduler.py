@@ -0,0 +1,54 @@
+import threading
+
+import pytest
+
+from wurf.resolve_scheduler import ResolveScheduler
+
+
+def test_resolve_scheduler_single_job():
+
+    scheduler = ResolveScheduler(jobs=1)
+
+    job = scheduler.submit(function=lambda: 42)
+
+    # With a single job the function runs directly and no workers are started
+    assert job.finished.is_set()
+    assert job.result() == 42
+    assert len(scheduler.workers) == 0
+
+
+def test_resolve_scheduler_parallel():
+
+    scheduler = ResolveScheduler(jobs=3)
+
+    # Every job waits until all three jobs have started, this only works
+    # if the jobs run at the same time
+    started = [threading.Event() for _ in range(3)]
+
+    def function(value):
+        started[value].set()
+        for event in started:
+            assert event.wait(10)
+        return value
+
+    jobs = [scheduler.submit(function=lambda v=v: function(v))
+            for v in range(3)]
+
+    assert [job.result() for job in jobs] == [0, 1, 2]
+    assert len(scheduler.workers) == 3
+
+
+def test_resolve_scheduler_error():
+
+    scheduler = ResolveScheduler(jobs=2)
+
+    def function():
+        raise RuntimeError("failed")
+
+    job = scheduler.submit(function=function)
+
+    with pytest.raises(RuntimeError) as e:
+        job.result()
+
+    # The traceback of the worker thread is kept
+    assert 'function' in [entry.name for entry in e.traceback]
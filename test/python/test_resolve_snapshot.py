@@ -0,0 +1,62 @@
+import os
+import collections
+
+from wurf.resolve_snapshot import ResolveSnapshot
+
+
+def test_resolve_snapshot(testdirectory):
+
+    build = testdirectory.mkdir('build')
+    foo = testdirectory.mkdir('foo')
+    bar = testdirectory.mkdir('bar')
+
+    testdirectory.write_text('wscript', u'def resolve(ctx): pass',
+                             encoding='utf-8')
+    foo.write_text('resolve.json', u'[]', encoding='utf-8')
+
+    dependency_cache = collections.OrderedDict()
+    dependency_cache['foo'] = {'path': foo.path(), 'recurse': True}
+    dependency_cache['bar'] = {'path': bar.path(), 'recurse': False}
+
+    snapshot = ResolveSnapshot(resolve_config_path=build.path(),
+                               dependency_cache=dependency_cache)
+
+    # No snapshot stored
+    assert snapshot.load(args=['build']) is None
+
+    wscript_path = os.path.join(testdirectory.path(), 'wscript')
+    snapshot.add_file(path=wscript_path)
+    snapshot.add_file(path=os.path.join(foo.path(), 'resolve.json'))
+    snapshot.add_file(path=os.path.join(bar.path(), 'resolve.json'))
+    snapshot.store()
+
+    dependencies = snapshot.load(args=['build'])
+    assert dependencies == dependency_cache
+    assert list(dependencies.keys()) == ['foo', 'bar']
+
+    # The options of a dependency must be parsed by the resolve step
+    assert snapshot.load(args=['build', '--foo_path=/tmp/foo']) is None
+    assert snapshot.load(args=['build', '--bar_checkout', '1.0.0']) is None
+
+    # A file which did not exist is created
+    bar.write_text('resolve.json', u'[]', encoding='utf-8')
+    assert snapshot.load(args=['build']) is None
+
+    snapshot.store()
+    assert snapshot.load(args=['build']) == dependency_cache
+
+    # A file is changed
+    testdirectory.write_text('wscript', u'def resolve(ctx):\n    pass',
+                             encoding='utf-8')
+    assert snapshot.load(args=['build']) is None
+
+    snapshot.store()
+    assert snapshot.load(args=['build']) == dependency_cache
+
+    # A dependency is removed
+    bar.rmdir()
+    assert snapshot.load(args=['build']) is None
+
+    snapshot.remove()
+    assert not os.path.isfile(
+        os.path.join(build.path(), ResolveSnapshot.SNAPSHOT_FILE))
@@ -0,0 +1,96 @@
+import os
+
+import mock
+
+from wurf.resolve_stamps import ResolveStamps
+
+
+def test_resolve_stamps(testdirectory):
+
+    commits = {}
+
+    git = mock.Mock()
+    git.current_commit.side_effect = lambda cwd: commits[cwd]
+
+    dependency = mock.Mock()
+    dependency.sha1 = '2c3f8ea7c7a8f7c1e2a9d8f1b9a7d5e3c1b2a4f6'
+
+    checkout = testdirectory.mkdir('1.0.0-abcdef')
+    checkout.mkdir('.git')
+    checkout_path = checkout.path()
+    commits[checkout_path] = '4b3a6e4b8f2c2d4e6e8c3c9d8b2b7a6f5e4d3c2b'
+
+    stamps = ResolveStamps(git=git)
+
+    # No stamp yet
+    assert stamps.verify(checkout_path=checkout_path, dependency=dependency,
+                         checkout='1.0.0') is None
+
+    stamps.store(checkout_path=checkout_path, dependency=dependency,
+                 checkout='1.0.0', commit=commits[checkout_path])
+
+    assert os.path.isfile(checkout_path + '.stamp.json')
+    assert stamps.verify(checkout_path=checkout_path, dependency=dependency,
+                         checkout='1.0.0') == commits[checkout_path]
+
+    # A different checkout
+    assert stamps.verify(checkout_path=checkout_path, dependency=dependency,
+                         checkout='2.0.0') is None
+
+    # The dependency definition changed
+    other = mock.Mock()
+    other.sha1 = '5c4b7f5c9a3d3e5f7f9d4d0e9c3c8b7a6f5e4d3c'
+    assert stamps.verify(checkout_path=checkout_path, dependency=other,
+                         checkout='1.0.0') is None
+
+    # A submodule which is not checked out
+    checkout.write_text('.gitmodules', u'[submodule "foo"]\n'
+                        u'\tpath = libs/foo\n'
+                        u'\turl = https://github.com/acme/foo.git\n',
+                        encoding='utf-8')
+
+    assert stamps.verify(checkout_path=checkout_path, dependency=dependency,
+                         checkout='1.0.0') is None
+
+    # The submodule was checked out
+    submodule = checkout.mkdir('libs').mkdir('foo')
+    submodule.write_text('.git', u'gitdir: ../../.git/modules/foo',
+                         encoding='utf-8')
+    commits[submodule.path()] = '6d5c8a6d0b4e4f6a8a0e5e1f0d4d9c8b7a6f5e4d'
+
+    stamps.store(checkout_path=checkout_path, dependency=dependency,
+                 checkout='1.0.0', commit=commits[checkout_path])
+
+    assert stamps.verify(checkout_path=checkout_path, dependency=dependency,
+                         checkout='1.0.0') == commits[checkout_path]
+
+    # The submodule moved to another commit
+    commits[submodule.path()] = '7e6d9b7e1c5f5a7b9b1f6f2a1e5e0d9c8b7a6f5e'
+
+    assert stamps.verify(checkout_path=checkout_path, dependency=dependency,
+                         checkout='1.0.0') is None
+
+    stamps.remove(checkout_path=checkout_path)
+    assert not os.path.isfile(checkout_path + '.stamp.json')
+
+
+def test_resolve_stamps_checkouts(testdirectory):
+
+    stamps = ResolveStamps(git=mock.Mock())
+
+    assert stamps.checkouts(cwd=testdirectory.path()) == []
+
+    testdirectory.mkdir('1.0.0-abcdef')
+    testdirectory.mkdir('1.1.0-abcdef')
+    testdirectory.write_text('1.0.0-abcdef.stamp.json', u'{}',
+                             encoding='utf-8')
+    testdirectory.write_text('1.1.0-abcdef.stamp.json', u'{}',
+                             encoding='utf-8')
+    testdirectory.write_text('foo.json', u'{}', encoding='utf-8')
+
+    assert stamps.checkouts(cwd=testdirectory.path()) == \
+        ['1.0.0-abcdef', '1.1.0-abcdef']
+
+    # The folder does not exist
+    assert stamps.checkouts(
+        cwd=os.path.join(testdirectory.path(), 'missing')) == []
@@ -0,0 +1,68 @@
+import mock
+import pytest
+
+from wurf.retry_policy import RetryPolicy
+from wurf.error import Error
+
+
+def test_retry_policy():
+
+    ctx = mock.Mock()
+    sleep = mock.Mock()
+
+    policy = RetryPolicy(ctx=ctx, timeout=10, retries=3, backoff=0.5,
+                         sleep=sleep)
+
+    function = mock.Mock(side_effect=[Error('fail'), IOError('fail'), 'ok'])
+
+    assert policy.run(description='git clone', function=function) == 'ok'
+    assert function.call_count == 3
+
+    # The backoff is doubled for every retry
+    assert sleep.call_args_list == [mock.call(0.5), mock.call(1.0)]
+
+    # The retries are written to the log
+    assert ctx.to_log.call_count == 2
+
+
+def test_retry_policy_fails():
+
+    ctx = mock.Mock()
+    sleep = mock.Mock()
+
+    policy = RetryPolicy(ctx=ctx, retries=2, sleep=sleep)
+
+    function = mock.Mock(side_effect=IOError('connection refused'))
+
+    # Exceptions which are not wurf errors are raised as an Error, such that
+    # the next source is tried
+    with pytest.raises(Error):
+        policy.run(description='Download of foo', function=function)
+
+    assert function.call_count == 3
+    assert sleep.call_count == 2
+
+    # Other exceptions are not retried
+    function = mock.Mock(side_effect=ValueError('bug'))
+
+    with pytest.raises(ValueError):
+        policy.run(description='Download of foo', function=function)
+
+    assert function.call_count == 1
+
+
+def test_retry_policy_not_transient():
+
+    ctx = mock.Mock()
+    sleep = mock.Mock()
+
+    policy = RetryPolicy(ctx=ctx, retries=2, sleep=sleep)
+
+    function = mock.Mock(side_effect=Error('not found'))
+
+    with pytest.raises(Error):
+        policy.run(description='Download of foo', function=function,
+                   is_transient=lambda e: False)
+
+    assert function.call_count == 1
+    assert not sleep.called
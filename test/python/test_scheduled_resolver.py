@@ -0,0 +1,18 @@
+import mock
+
+from wurf.resolve_scheduler import ResolveScheduler
+from wurf.scheduled_resolver import ScheduledResolver
+
+
+def test_scheduled_resolver():
+
+    resolver = mock.Mock()
+    resolver.resolve.return_value = '/tmp/path'
+
+    resolve_scheduler = ResolveScheduler(jobs=2)
+
+    scheduled_resolver = ScheduledResolver(
+        resolver=resolver, resolve_scheduler=resolve_scheduler)
+
+    assert scheduled_resolver.resolve() == '/tmp/path'
+    resolver.resolve.assert_called_once_with()
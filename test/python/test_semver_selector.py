@@ -1,3 +1,4 @@
+import pytest
 import semver
 
 from wurf.semver_selector import SemverSelector
@@ -18,3 +19,51 @@ def test_semver_selector():
 
     # Select latest tag for major version 3 (LTS tags should be ignored)
     assert selector.select_tag(major=3, tags=tags) == '3.0.0'
+
+    # Select latest tag for major version 1 and minor version 1
+    assert selector.select_tag(major=1, tags=tags, minor=1) == '1.1.2'
+    assert selector.select_tag(major=1, tags=tags, minor=2) is None
+
+    # No tags for major version 4
+    assert selector.select_tag(major=4, tags=tags) is None
+
+
+def test_semver_selector_precedence():
+
+    selector = SemverSelector(semver=semver)
+
+    # Pre-release identifiers are compared one by one, numeric identifiers
+    # are compared numerically
+    tags = ['1.0.0-alpha', '1.0.0-alpha.1', '1.0.0-alpha.beta', '1.0.0-beta',
+            '1.0.0-beta.2', '1.0.0-beta.11', '1.0.0-rc.1', 'invalid']
+
+    assert selector.select_tag(major=1, tags=tags) == '1.0.0-rc.1'
+    assert selector.select_tag(major=1, tags=tags[:6]) == '1.0.0-beta.11'
+    assert selector.select_tag(major=1, tags=tags[:3]) == '1.0.0-alpha.beta'
+    assert selector.select_tag(major=1, tags=['invalid']) is None
+
+
+def test_semver_selector_range():
+
+    selector = SemverSelector(semver=semver)
+
+    tags = ['0.0.3', '0.0.4', '0.2.3', '0.2.9', '0.3.0', '1.2.3', '1.2.9',
+            '1.3.0', '1.9.0-rc.1', '2.0.0']
+
+    assert selector.select_range('1', tags) == '1.9.0-rc.1'
+    assert selector.select_range('1.2', tags) == '1.2.9'
+    assert selector.select_range('1.2.3', tags) == '1.2.3'
+    assert selector.select_range('1.2.4', tags) is None
+
+    assert selector.select_range('^1.2.3', tags) == '1.9.0-rc.1'
+    assert selector.select_range('^1.4.0', tags) == '1.9.0-rc.1'
+    assert selector.select_range('^2.0.1', tags) is None
+    assert selector.select_range('^0.2.3', tags) == '0.2.9'
+    assert selector.select_range('^0.0.3', tags) == '0.0.3'
+
+    assert selector.select_range('~1.2.3', tags) == '1.2.9'
+    assert selector.select_range('~1.3', tags) == '1.3.0'
+    assert selector.select_range('~0.2.5', tags) == '0.2.9'
+
+    with pytest.raises(ValueError):
+        selector.select_range('>=1.2.3', tags)
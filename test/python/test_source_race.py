@@ -0,0 +1,53 @@
+import mock
+import pytest
+
+from wurf.source_race import SourceRace
+
+
+def test_source_race():
+
+    ctx = mock.Mock()
+    source_ranking = mock.Mock()
+    source_ranking.race.return_value = 'gitlab'
+    probe = mock.Mock()
+
+    race = SourceRace(ctx=ctx, source_ranking=source_ranking,
+                      sources=['github', 'gitlab', 'mirror'], probe=probe,
+                      dependency=mock.Mock())
+
+    # Nothing is raced before the first fetch
+    assert source_ranking.race.call_count == 0
+    assert race.fetch_seconds(source='github') is None
+
+    # The first source lost the race
+    with pytest.raises(SourceRace.Lost) as e:
+        race.fetch(source='github')
+
+    assert e.value.source == 'github'
+    assert e.value.winner == 'gitlab'
+
+    source_ranking.race.assert_called_once_with(
+        sources=['github', 'gitlab'], probe=probe)
+
+    race.fetch(source='gitlab')
+    assert race.fetch_seconds(source='gitlab') >= 0
+
+    # The sources are only raced once, the loser may be tried later
+    race.fetch(source='github')
+    assert source_ranking.race.call_count == 1
+    assert race.fetch_seconds(source='github') >= 0
+
+
+def test_source_race_no_probe():
+
+    source_ranking = mock.Mock()
+
+    race = SourceRace(ctx=mock.Mock(), source_ranking=source_ranking,
+                      sources=['github', 'gitlab'], probe=None,
+                      dependency=mock.Mock())
+
+    race.fetch(source='github')
+
+    assert source_ranking.race.call_count == 0
+    assert race.fetch_seconds(source='github') >= 0
+    assert race.fetch_seconds(source='gitlab') is None
@@ -0,0 +1,87 @@
+import os
+import json
+import time
+import threading
+
+from wurf.source_ranking import SourceRanking
+
+
+def test_source_ranking(testdirectory):
+
+    ranking_path = os.path.join(testdirectory.path(),
+                                SourceRanking.RANKING_FILE)
+
+    source_ranking = SourceRanking(resolve_path=testdirectory.path())
+
+    sources = ['mirror', 'github', 'gitlab']
+
+    # Without history the order is kept
+    assert source_ranking.rank(sources=sources) == sources
+
+    source_ranking.record_success(source='github', seconds=1.0)
+    source_ranking.record_success(source='gitlab', seconds=2.0)
+
+    # The sources with history come first, ordered by their time
+    assert source_ranking.rank(sources=sources) == \
+        ['github', 'gitlab', 'mirror']
+
+    # The time is a moving average
+    source_ranking.record_success(source='github', seconds=11.0)
+    assert source_ranking.rank(sources=sources) == \
+        ['gitlab', 'github', 'mirror']
+
+    # A failed source is tried last
+    source_ranking.record_failure(source='gitlab')
+    assert source_ranking.rank(sources=sources) == \
+        ['github', 'mirror', 'gitlab']
+
+    with open(ranking_path, 'r') as ranking_file:
+        history = json.load(ranking_file)
+
+    assert history['github']['latency'] == 0.3 * 11.0 + 0.7 * 1.0
+    assert history['gitlab']['failures'] == 1
+
+    # The ranking is read from the resolve path
+    source_ranking = SourceRanking(resolve_path=testdirectory.path())
+    assert source_ranking.rank(sources=sources) == \
+        ['github', 'mirror', 'gitlab']
+
+    # After the retry interval the failed source is ranked by its time
+    source_ranking.RETRY_INTERVAL = 0
+    assert source_ranking.rank(sources=sources) == \
+        ['gitlab', 'github', 'mirror']
+
+    # A success resets the failures
+    source_ranking.RETRY_INTERVAL = 3600
+    source_ranking.record_success(source='gitlab', seconds=2.0)
+    assert source_ranking.rank(sources=sources) == \
+        ['gitlab', 'github', 'mirror']
+
+
+def test_source_ranking_race(testdirectory):
+
+    source_ranking = SourceRanking(resolve_path=testdirectory.path())
+
+    release = threading.Event()
+
+    def probe(source):
+        if source == 'dead':
+            raise RuntimeError('unreachable')
+        if source == 'slow':
+            release.wait()
+
+    assert source_ranking.race(
+        sources=['slow', 'fast'], probe=probe) == 'fast'
+
+    assert source_ranking.race(
+        sources=['dead', 'fast'], probe=probe) == 'fast'
+
+    assert source_ranking.race(
+        sources=['dead', 'dead'], probe=probe) is None
+
+    start = time.time()
+    assert source_ranking.race(
+        sources=['slow', 'dead'], probe=probe, timeout=0.1) is None
+    assert time.time() - start < 5
+
+    release.set()
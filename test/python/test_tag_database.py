@@ -1,20 +1,133 @@
+import os
+import json
+import threading
+
 import pytest
 import mock
 
 from wurf.tag_database import TagDatabase
 
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+
 
 @pytest.mark.networktest
-def test_tag_database():
+def test_tag_database(testdirectory):
 
     ctx = mock.Mock()
 
-    db = TagDatabase(ctx=ctx)
+    db = TagDatabase(ctx=ctx, cache_path=os.path.join(
+        testdirectory.path(), 'tag_database.json'))
 
     # Test that we can retrive the tags for a common Steinwurf project
     tags = db.project_tags(project_name='waf-tools')
 
+    # A failed download is logged and gives no tags, e.g. when offline
+    if ctx.logger.debug.called:
+        pytest.skip("Tag database not reachable: {}".format(
+            ctx.logger.debug.call_args))
+
+    assert tags is not None, "No tags for waf-tools in the tag database"
+
     # Check some unique tags for waf-tools
     assert len(tags) > 0, "mock ctx %s" % ctx
     assert '2.53.1' in tags
     assert '3.19.0' in tags
+
+
+def test_tag_database_local_file(testdirectory):
+
+    ctx = mock.Mock()
+
+    testdirectory.write_text('tags.json', u'{"foo": ["1.0.0", "1.1.0"]}',
+                             encoding='utf-8')
+
+    tags_path = os.path.join(testdirectory.path(), 'tags.json')
+    cache_path = os.path.join(testdirectory.path(), 'tag_database.json')
+
+    for url in [tags_path, 'file://' + tags_path]:
+
+        if os.path.isfile(cache_path):
+            os.remove(cache_path)
+
+        db = TagDatabase(ctx=ctx, cache_path=cache_path, url=url)
+
+        assert db.project_tags(project_name='foo') == ['1.0.0', '1.1.0']
+        assert db.project_tags(project_name='bar') is None
+
+
+class TagsHandler(BaseHTTPRequestHandler):
+
+    # State shared between the request handlers and the test
+    requests = []
+    available = True
+
+    def do_GET(self):
+
+        TagsHandler.requests.append(self.headers.get('If-None-Match'))
+
+        if not TagsHandler.available:
+            self.send_error(500)
+            return
+
+        if self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        body = json.dumps({'foo': ['1.0.0']}).encode('utf-8')
+
+        self.send_response(200)
+        self.send_header('ETag', '"v1"')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_tag_database_cache(testdirectory):
+
+    ctx = mock.Mock()
+
+    server = HTTPServer(('127.0.0.1', 0), TagsHandler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+
+    url = 'http://127.0.0.1:{}/tags.json'.format(server.server_address[1])
+    cache_path = os.path.join(testdirectory.path(), 'tag_database.json')
+
+    def project_tags(ttl):
+        db = TagDatabase(ctx=ctx, cache_path=cache_path, url=url, ttl=ttl)
+        return db.project_tags(project_name='foo')
+
+    try:
+        # The tags are downloaded and cached
+        assert project_tags(ttl=3600) == ['1.0.0']
+        assert TagsHandler.requests == [None]
+
+        # The cached tags are used within the time-to-live
+        assert project_tags(ttl=3600) == ['1.0.0']
+        assert TagsHandler.requests == [None]
+
+        # The cached tags are revalidated when they expire
+        assert project_tags(ttl=0) == ['1.0.0']
+        assert TagsHandler.requests == [None, '"v1"']
+
+        # The cached tags are used if the server fails
+        TagsHandler.available = False
+
+        assert project_tags(ttl=0) == ['1.0.0']
+        assert len(TagsHandler.requests) == 3
+
+        # The server is not contacted again right after a failure
+        assert project_tags(ttl=0) == ['1.0.0']
+        assert len(TagsHandler.requests) == 3
+
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,84 @@
+import mock
+
+from wurf.trace_resolver import TraceResolver
+
+
+class FakeResolver(object):
+
+    def __init__(self, resolver=None, resolvers=None):
+        self.resolver = resolver
+        self.resolvers = resolvers
+
+    def resolve(self):
+        if self.resolver:
+            return self.resolver.resolve()
+
+        for resolver in self.resolvers:
+            path = resolver.resolve()
+            if path:
+                return path
+
+
+def test_trace_resolver():
+
+    resolver = mock.Mock(spec=['resolve', 'master_path'])
+    resolver.resolve.return_value = '/tmp/foo'
+    resolver.master_path.return_value = '/tmp/master'
+
+    resolve_profile = mock.MagicMock()
+    dependency = mock.Mock()
+    dependency.name = 'foo'
+
+    traced = TraceResolver(resolver=resolver,
+                           resolve_profile=resolve_profile,
+                           dependency=dependency)
+
+    assert traced.resolve() == '/tmp/foo'
+
+    resolve_profile.span.assert_called_once_with(
+        name='Mock', category='resolver', args={'dependency': 'foo'})
+
+    # Other attributes are forwarded to the resolver
+    assert traced.master_path() == '/tmp/master'
+
+
+def test_trace_resolver_chain():
+
+    first = mock.Mock(spec=['resolve'])
+    first.resolve.return_value = None
+
+    second = mock.Mock(spec=['resolve'])
+    second.resolve.return_value = '/tmp/foo'
+
+    shared = FakeResolver(resolvers=[first, second])
+    chain = FakeResolver(resolver=shared)
+
+    resolve_profile = mock.MagicMock()
+    dependency = mock.Mock()
+    dependency.name = 'foo'
+
+    traced = TraceResolver.trace_chain(
+        resolver=chain, resolve_profile=resolve_profile,
+        dependency=dependency)
+
+    assert isinstance(traced, TraceResolver)
+    assert isinstance(chain.resolver, TraceResolver)
+    assert all(isinstance(r, TraceResolver) for r in shared.resolvers)
+
+    assert traced.resolve() == '/tmp/foo'
+
+    names = [kwargs['name']
+             for _, kwargs in resolve_profile.span.call_args_list]
+    assert names == ['FakeResolver', 'FakeResolver', 'Mock', 'Mock']
+
+    # A resolver shared with another chain is not traced twice
+    other = FakeResolver(resolver=shared)
+
+    TraceResolver.trace_chain(
+        resolver=other, resolve_profile=resolve_profile,
+        dependency=dependency)
+
+    assert isinstance(other.resolver, TraceResolver)
+    assert not isinstance(other.resolver.resolver, TraceResolver)
+    assert all(not isinstance(r.resolver, TraceResolver)
+               for r in shared.resolvers)
@@ -1,7 +1,94 @@
 import vcr
+import mock
 import os
+import hashlib
+import threading
+import pytest
 
 from wurf.url_download import UrlDownload
+from wurf.error import Error
+from wurf.retry_policy import RetryPolicy
+from wurf.compat import IS_PY2
+
+if IS_PY2:
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+    from SocketServer import ThreadingMixIn
+else:
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+    from socketserver import ThreadingMixIn
+
+
+class ThreadingServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class Handler(BaseHTTPRequestHandler):
+    """ Serves the files in server.files using keep-alive connections. """
+
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        self.server.connections += 1
+
+    def do_GET(self):
+        if self.server.failures.get(self.path):
+            self.server.failures[self.path] -= 1
+            self.send_error(503)
+            return
+
+        if self.path in self.server.redirects:
+            self.send_response(302)
+            self.send_header('Location', self.server.redirects[self.path])
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        if self.path not in self.server.files:
+            self.send_error(404)
+            return
+
+        content = self.server.files[self.path]
+        etag = self.server.etags.get(self.path)
+
+        if etag and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        self.server.downloads += 1
+
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(content)))
+        if etag:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingServer(('127.0.0.1', 0), Handler)
+    server.files = {}
+    server.redirects = {}
+    server.failures = {}
+    server.etags = {}
+    server.connections = 0
+    server.downloads = 0
+    server.url = 'http://127.0.0.1:{}'.format(server.server_address[1])
+
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
 
 
 def test_url_download_url_filename():
@@ -69,3 +156,139 @@ def test_url_download_stub(testdirectory):
     path = download.download(cwd=cwd, source=source)
 
     assert os.path.join(cwd, '6.0.0.zip') == path
+
+
+def test_url_download_sha256(testdirectory):
+    content = b'hello_world'
+    sha256 = hashlib.sha256(content).hexdigest()
+
+    serverdir = testdirectory.mkdir('server')
+    serverdir.write_binary('data.txt', content)
+    source = 'file://' + os.path.join(serverdir.path(), 'data.txt')
+
+    cwd = testdirectory.mkdir('download').path()
+
+    download = UrlDownload()
+
+    path = download.download(cwd=cwd, source=source, sha256=sha256)
+    assert os.path.join(cwd, 'data.txt') == path
+    assert os.listdir(cwd) == ['data.txt']
+
+    with pytest.raises(Error):
+        download.download(cwd=cwd, source=source, filename='other.txt',
+                          sha256='0' * 64)
+
+    # The partially downloaded file is removed
+    assert os.listdir(cwd) == ['data.txt']
+
+
+def test_url_download_keep_alive(testdirectory, server):
+    server.files['/a.txt'] = b'a' * 100000
+    server.files['/b.txt'] = b'b' * 100
+    server.redirects['/latest.txt'] = '/b.txt'
+
+    cwd = testdirectory.path()
+
+    download = UrlDownload(buffer_size=1024)
+
+    path = download.download(cwd=cwd, source=server.url + '/a.txt')
+    assert os.path.join(cwd, 'a.txt') == path
+
+    path = download.download(cwd=cwd, source=server.url + '/latest.txt')
+    assert os.path.join(cwd, 'latest.txt') == path
+
+    with open(path, 'rb') as f:
+        assert f.read() == b'b' * 100
+
+    # All requests used the same connection
+    assert server.connections == 1
+
+    download.probe(source=server.url + '/a.txt')
+
+    with pytest.raises(Error):
+        download.download(cwd=cwd, source=server.url + '/missing.txt')
+
+
+def test_url_download_submit(testdirectory, server):
+    names = ['{}.txt'.format(i) for i in range(8)]
+
+    for name in names:
+        server.files['/' + name] = name.encode('utf-8') * 1000
+
+    cwd = testdirectory.path()
+
+    download = UrlDownload(jobs=4)
+
+    jobs = [download.submit(cwd=cwd, source=server.url + '/' + name)
+            for name in names]
+
+    paths = [job.result() for job in jobs]
+
+    assert paths == [os.path.join(cwd, name) for name in names]
+
+    # At most one connection per concurrent download
+    assert server.connections <= 4
+
+
+def test_url_download_retry(testdirectory, server):
+    server.files['/flaky.txt'] = b'flaky'
+    server.failures['/flaky.txt'] = 2
+
+    cwd = testdirectory.path()
+
+    ctx = mock.Mock()
+    sleep = mock.Mock()
+    retry_policy = RetryPolicy(ctx=ctx, timeout=5, retries=2, sleep=sleep)
+
+    download = UrlDownload(retry_policy=retry_policy)
+    assert download.connection_pool.timeout == 5
+
+    path = download.download(cwd=cwd, source=server.url + '/flaky.txt')
+
+    with open(path, 'rb') as f:
+        assert f.read() == b'flaky'
+
+    assert sleep.call_count == 2
+
+    # A missing file is not retried
+    with pytest.raises(Error):
+        download.download(cwd=cwd, source=server.url + '/missing.txt')
+
+    assert sleep.call_count == 2
+
+
+def test_url_download_not_modified(testdirectory, server):
+    server.files['/data.txt'] = b'version 1'
+    server.etags['/data.txt'] = '"v1"'
+
+    cwd = testdirectory.path()
+    source = server.url + '/data.txt'
+
+    download = UrlDownload()
+
+    path = download.download(cwd=cwd, source=source)
+    assert server.downloads == 1
+
+    # The server answers that the file did not change
+    assert download.download(cwd=cwd, source=source) == path
+    assert server.downloads == 1
+
+    # A file modified locally is downloaded again
+    with open(path, 'wb') as f:
+        f.write(b'modified')
+
+    assert download.download(cwd=cwd, source=source) == path
+    assert server.downloads == 2
+
+    with open(path, 'rb') as f:
+        assert f.read() == b'version 1'
+
+    # The file changed on the server
+    server.files['/data.txt'] = b'version 2'
+    server.etags['/data.txt'] = '"v2"'
+
+    assert download.download(cwd=cwd, source=source) == path
+    assert server.downloads == 3
+
+    with open(path, 'rb') as f:
+        assert f.read() == b'version 2'